@@ -0,0 +1,148 @@
+"""
+RAG Artifact Store
+One directory holds every build of the retrieval artifacts (FAISS index,
+context store, id mapping, BM25 index, metadata columns, ...) as immutable
+versions, plus a manifest naming the live one:
+
+    Vector_Store/cache/                 (or $RAG_ARTIFACT_DIR)
+        manifest.json                   current version, model, row count, checksums
+        versions/v000041/...            previous build, still readable
+        versions/v000042/...            current build
+
+embedFunc writes a new version directory and then replaces manifest.json
+atomically, so readers only ever see a complete build. Running processes poll
+the manifest and swap the new version in without a restart (see
+RetrievalEngine.start_watching). Caches written before the manifest existed
+are plain files directly in the directory and are still readable.
+"""
+import os
+import json
+import time
+import shutil
+import hashlib
+import logging
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE = "manifest.json"
+VERSIONS_DIR = "versions"
+MANIFEST_FORMAT = 1
+
+DEFAULT_ARTIFACT_DIR = os.environ.get(
+    'RAG_ARTIFACT_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache')
+)
+
+
+def version_path(root: str, version: int) -> str:
+    return os.path.join(root, VERSIONS_DIR, f"v{int(version):06d}")
+
+
+def prepare_version_dir(root: str, version: int) -> str:
+    """Create an empty directory for a new version, discarding leftovers of an interrupted build"""
+    path = version_path(root, version)
+    if os.path.exists(path):
+        shutil.rmtree(path)
+    os.makedirs(path)
+    return path
+
+
+def file_checksum(path: str, chunk_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def read_manifest(root: str) -> Optional[Dict[str, Any]]:
+    """The current manifest of an artifact directory, or None if it has none"""
+    manifest_path = os.path.join(root, MANIFEST_FILE)
+    if not os.path.exists(manifest_path):
+        return None
+    with open(manifest_path) as f:
+        return json.load(f)
+
+
+def manifest_mtime(root: str) -> Optional[int]:
+    """Cheap change check for watchers"""
+    try:
+        return os.stat(os.path.join(root, MANIFEST_FILE)).st_mtime_ns
+    except OSError:
+        return None
+
+
+def resolve_artifact_dir(root: str) -> Tuple[str, Optional[Dict[str, Any]]]:
+    """
+    Directory holding the live artifacts of root.
+
+    Returns:
+        tuple: (directory, manifest) - (root, None) for a legacy flat cache
+    """
+    manifest = read_manifest(root)
+    if manifest is None:
+        return root, None
+    return os.path.join(root, manifest["path"]), manifest
+
+
+def publish_version(root: str, version: int, model_name: str, num_rows: int,
+                    extra: Optional[Dict[str, Any]] = None, keep: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Record checksums of a finished version directory and make it the live one
+    by atomically replacing manifest.json. Older versions beyond `keep` are
+    deleted; processes that still have their files open keep reading them.
+    """
+    directory = version_path(root, version)
+    files = {}
+    for name in sorted(os.listdir(directory)):
+        path = os.path.join(directory, name)
+        if os.path.isfile(path):
+            files[name] = {"bytes": os.path.getsize(path), "sha256": file_checksum(path)}
+
+    manifest = {
+        "format": MANIFEST_FORMAT,
+        "version": int(version),
+        "path": os.path.relpath(directory, root),
+        "model_name": model_name,
+        "num_rows": int(num_rows),
+        "created_at": time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        "files": files,
+    }
+    manifest.update(extra or {})
+
+    tmp_path = os.path.join(root, f"{MANIFEST_FILE}.tmp")
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, os.path.join(root, MANIFEST_FILE))
+    logger.info(f"Published RAG artifacts version {version} ({num_rows} rows) in {root}")
+
+    prune_versions(root, keep if keep is not None else int(os.environ.get('RAG_KEEP_VERSIONS', 3)))
+    return manifest
+
+
+def prune_versions(root: str, keep: int):
+    """Delete all but the newest `keep` version directories (never the live one)"""
+    versions_root = os.path.join(root, VERSIONS_DIR)
+    if keep < 1 or not os.path.isdir(versions_root):
+        return
+    manifest = read_manifest(root)
+    live = os.path.basename(manifest["path"]) if manifest else None
+    names = sorted(name for name in os.listdir(versions_root) if name.startswith('v'))
+    for name in names[:-keep]:
+        if name != live:
+            shutil.rmtree(os.path.join(versions_root, name), ignore_errors=True)
+
+
+def verify_manifest(root: str, manifest: Dict[str, Any], checksums: bool = True):
+    """Raise ValueError if a file listed in the manifest is missing, truncated or altered"""
+    directory = os.path.join(root, manifest["path"])
+    for name, expected in manifest["files"].items():
+        path = os.path.join(directory, name)
+        if not os.path.exists(path):
+            raise ValueError(f"{path} listed in the manifest is missing")
+        if os.path.getsize(path) != expected["bytes"]:
+            raise ValueError(f"{path} has {os.path.getsize(path)} bytes, manifest says {expected['bytes']}")
+        if checksums and file_checksum(path) != expected["sha256"]:
+            raise ValueError(f"{path} does not match its manifest checksum")
@@ -0,0 +1,193 @@
+"""
+Bulk Embedding Job
+Embeds a large catalog across a pool of worker processes. The search texts
+built by embedFunc are split into fixed-size shards; every finished shard is
+written to disk as a .npy checkpoint, so an interrupted run resumes with the
+shards that are still missing. Once all shards exist they are merged into
+the FAISS index and saved to the cache exactly like embedFunc does.
+
+Usage:
+    python Vector_Store/bulk_embed.py --workers 32 --shard-size 20000
+    python Vector_Store/bulk_embed.py --index-type ivf_pq --restart
+"""
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+# Allow running this file directly as well as importing it from the Vector_Store package
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from Vector_Store.embedFunc import (
+    CACHE_DIR, load_product_data, preprocess_product_columns, build_product_texts, compute_product_ids,
+    compute_content_hashes, next_catalog_version, save_cache, build_product_metadata,
+)
+from Vector_Store.index_factory import build_index
+from Vector_Store.lexical_index import build_bm25_index
+
+SHARD_MANIFEST_FILE = "shards.json"
+
+# Per-process model, loaded once by the pool initializer
+_worker_model = None
+
+
+def available_cpus():
+    """CPUs this process may run on (respects container/affinity limits)"""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def _init_worker(model_name, threads_per_worker):
+    """Load the model in each worker and keep its thread pool to its share of the cores"""
+    global _worker_model
+    import torch
+    from sentence_transformers import SentenceTransformer
+    torch.set_num_threads(threads_per_worker)
+    _worker_model = SentenceTransformer(model_name)
+
+
+def _embed_shard(shard_path, texts, batch_size):
+    """Encode one shard and write it atomically as a .npy checkpoint"""
+    start = time.perf_counter()
+    embeddings = np.asarray(
+        _worker_model.encode(texts, batch_size=batch_size, show_progress_bar=False), dtype='float32'
+    )
+    tmp_path = f"{shard_path}.tmp.npy"
+    np.save(tmp_path, embeddings)
+    os.replace(tmp_path, shard_path)
+    return shard_path, len(texts), time.perf_counter() - start
+
+
+def _catalog_fingerprint(content_hashes):
+    """Identifies the exact set of texts a checkpoint directory was built for"""
+    return hashlib.blake2b(content_hashes.tobytes(), digest_size=16).hexdigest()
+
+
+def _prepare_checkpoint_dir(checkpoint_dir, fingerprint, num_rows, shard_size, restart):
+    """Reuse existing shards only if they were produced for the same catalog and shard size"""
+    os.makedirs(checkpoint_dir, exist_ok=True)
+    manifest_path = os.path.join(checkpoint_dir, SHARD_MANIFEST_FILE)
+    manifest = {"fingerprint": fingerprint, "num_rows": num_rows, "shard_size": shard_size}
+
+    previous = None
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            previous = json.load(f)
+
+    if restart or previous != manifest:
+        if previous is not None:
+            print("bulk_embed.py: Catalog or shard size changed since the last run. Discarding old checkpoints.")
+        for name in os.listdir(checkpoint_dir):
+            if name.startswith('shard_') and name.endswith('.npy'):
+                os.remove(os.path.join(checkpoint_dir, name))
+        with open(manifest_path, 'w') as f:
+            json.dump(manifest, f, indent=2)
+
+
+def _shard_is_complete(shard_path, expected_rows):
+    if not os.path.exists(shard_path):
+        return False
+    try:
+        return np.load(shard_path, mmap_mode='r').shape[0] == expected_rows
+    except (ValueError, OSError):
+        return False
+
+
+def run_bulk_embedding(workers=None, shard_size=20000, batch_size=64, index_type=None,
+                       cache_dir=CACHE_DIR, checkpoint_dir=None, restart=False,
+                       model_name='all-MiniLM-L6-v2', rerank=False, product_df=None):
+    """
+    Embed the whole catalog with a process pool, checkpointing each shard, and
+    write the merged index, contexts and catalog state to cache_dir.
+
+    Args:
+        product_df: Catalog to embed instead of the DataSet CSV
+    """
+    workers = workers or available_cpus()
+    index_type = index_type or os.environ.get('RAG_INDEX_TYPE', 'flat')
+    checkpoint_dir = checkpoint_dir or os.path.join(cache_dir, 'shards')
+
+    product_df = load_product_data() if product_df is None else preprocess_product_columns(product_df.copy())
+    texts, contexts = build_product_texts(product_df)
+    product_ids = compute_product_ids(product_df)
+    content_hashes = compute_content_hashes(texts)
+    metadata = build_product_metadata(product_df)
+    del product_df
+
+    _prepare_checkpoint_dir(checkpoint_dir, _catalog_fingerprint(content_hashes),
+                            len(texts), shard_size, restart)
+
+    shard_ranges = [(start, min(start + shard_size, len(texts))) for start in range(0, len(texts), shard_size)]
+    shard_paths = [os.path.join(checkpoint_dir, f"shard_{i:05d}.npy") for i in range(len(shard_ranges))]
+    pending = [i for i, (start, end) in enumerate(shard_ranges)
+               if not _shard_is_complete(shard_paths[i], end - start)]
+
+    print(f"bulk_embed.py: {len(texts)} products in {len(shard_ranges)} shards; "
+          f"{len(shard_ranges) - len(pending)} already checkpointed, {len(pending)} to embed "
+          f"with {workers} worker(s)")
+
+    if pending:
+        threads_per_worker = max(1, available_cpus() // workers)
+        start_time = time.perf_counter()
+        embedded = 0
+        # Fresh interpreters rather than forks: a forked copy of a parent that already
+        # started torch or tokenizer threads can deadlock in the workers
+        with ProcessPoolExecutor(max_workers=min(workers, len(pending)), initializer=_init_worker,
+                                 initargs=(model_name, threads_per_worker),
+                                 mp_context=multiprocessing.get_context('spawn')) as pool:
+            futures = [
+                pool.submit(_embed_shard, shard_paths[i], texts[shard_ranges[i][0]:shard_ranges[i][1]], batch_size)
+                for i in pending
+            ]
+            for future in as_completed(futures):
+                shard_path, rows, seconds = future.result()
+                embedded += rows
+                elapsed = time.perf_counter() - start_time
+                print(f"bulk_embed.py: {os.path.basename(shard_path)} done ({rows} rows in {seconds:.1f}s), "
+                      f"{embedded / elapsed:.0f} rows/s overall")
+
+    print("bulk_embed.py: Merging shards...")
+    dimension = np.load(shard_paths[0], mmap_mode='r').shape[1]
+    embeddings = np.empty((len(texts), dimension), dtype='float32')
+    for (start, end), shard_path in zip(shard_ranges, shard_paths):
+        embeddings[start:end] = np.load(shard_path, mmap_mode='r')
+
+    faiss_index_instance, built_params = build_index(embeddings, index_type, ids=product_ids,
+                                                     rerank=rerank or None)
+    save_cache(cache_dir, faiss_index_instance, built_params, contexts,
+               product_ids, content_hashes, next_catalog_version(cache_dir),
+               build_bm25_index(texts), metadata,
+               embeddings if built_params.get('rerank') else None)
+    print(f"bulk_embed.py: {built_params['index_type']} index with {faiss_index_instance.ntotal} products written.")
+    return faiss_index_instance.ntotal
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: available cores)")
+    parser.add_argument('--shard-size', type=int, default=20000, help="Rows per checkpointed shard")
+    parser.add_argument('--batch-size', type=int, default=64, help="encode() batch size inside each worker")
+    parser.add_argument('--index-type', default=None, help="flat, hnsw, ivf_flat, ivf_pq, fp16, sq8 or pq")
+    parser.add_argument('--rerank', action='store_true', help="Keep float32 vectors to re-rank quantized results")
+    parser.add_argument('--checkpoint-dir', default=None, help="Where shard .npy files are kept")
+    parser.add_argument('--restart', action='store_true', help="Ignore existing checkpoints")
+    args = parser.parse_args()
+
+    try:
+        run_bulk_embedding(workers=args.workers, shard_size=args.shard_size, batch_size=args.batch_size,
+                           index_type=args.index_type, checkpoint_dir=args.checkpoint_dir,
+                           restart=args.restart, rerank=args.rerank)
+        print("Bulk embedding successful.")
+    except Exception as e:
+        print(f"Bulk embedding failed: {e}")
+        sys.exit(1)
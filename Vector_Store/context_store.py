@@ -0,0 +1,123 @@
+"""
+Memory-Mapped Context Store
+Binary replacement for product_contexts.pkl. The file holds every product
+context as one UTF-8 blob followed by an offsets array, and is opened with
+mmap so lookups by FAISS id only touch the pages they need and those pages are
+shared between every process (gunicorn workers, Telegram bot) by the OS.
+
+File layout (all integers little-endian uint64):
+    header   magic(8) | count | offsets_position
+    blob     context 0 bytes | context 1 bytes | ...
+    offsets  count + 1 positions into the file, offsets[i]..offsets[i+1] is context i
+"""
+import os
+import sys
+import mmap
+import array
+import struct
+from typing import Iterable, Iterator, Union
+
+CONTEXT_STORE_FILE = "product_contexts.bin"
+
+_MAGIC = b'PCTXv1\x00\x00'
+_HEADER = struct.Struct('<8sQQ')
+_OFFSET = struct.Struct('<Q')
+_OFFSET_PAIR = struct.Struct('<QQ')
+
+
+class ContextStoreWriter:
+    """Streams contexts to disk one at a time; the file appears atomically on close()"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._tmp_path = f"{path}.tmp"
+        self._file = open(self._tmp_path, 'wb')
+        self._file.write(_HEADER.pack(_MAGIC, 0, 0))
+        self._offsets = array.array('Q', [_HEADER.size])
+
+    def add(self, text: str):
+        data = text.encode('utf-8')
+        self._file.write(data)
+        self._offsets.append(self._offsets[-1] + len(data))
+
+    def add_many(self, texts: Iterable[str]):
+        for text in texts:
+            self.add(text)
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def close(self):
+        offsets_position = self._offsets[-1]
+        if sys.byteorder != 'little':
+            self._offsets.byteswap()
+        self._file.write(self._offsets.tobytes())
+        self._file.seek(0)
+        self._file.write(_HEADER.pack(_MAGIC, len(self), offsets_position))
+        self._file.close()
+        os.replace(self._tmp_path, self.path)
+
+    def abort(self):
+        self._file.close()
+        if os.path.exists(self._tmp_path):
+            os.remove(self._tmp_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def write_context_store(path: str, contexts: Iterable[str]) -> int:
+    """Write all contexts to a context store file and return how many were written"""
+    with ContextStoreWriter(path) as writer:
+        writer.add_many(contexts)
+        return len(writer)
+
+
+class ContextStore:
+    """Read-only, memory-mapped sequence of product contexts indexed by FAISS id"""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self._count, self._offsets_position = _HEADER.unpack_from(self._mmap, 0)
+        if magic != _MAGIC:
+            self._mmap.close()
+            raise ValueError(f"{path} is not a product context store")
+        self._view = memoryview(self._mmap)
+
+    def __len__(self):
+        return self._count
+
+    def get_bytes(self, index: int) -> memoryview:
+        """Zero-copy view of one context's UTF-8 bytes"""
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError(f"context index {index} out of range")
+        start, end = _OFFSET_PAIR.unpack_from(self._mmap, self._offsets_position + index * _OFFSET.size)
+        return self._view[start:end]
+
+    def __getitem__(self, index: Union[int, slice]):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._count))]
+        return str(self.get_bytes(index), 'utf-8')
+
+    def __iter__(self) -> Iterator[str]:
+        for i in range(self._count):
+            yield self[i]
+
+    @property
+    def blob_bytes(self) -> int:
+        """Size of the UTF-8 context data (excluding header and offsets)"""
+        return self._offsets_position - _HEADER.size
+
+    def close(self):
+        self._view.release()
+        self._mmap.close()
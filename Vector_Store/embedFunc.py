@@ -1,28 +1,55 @@
 \
 import os
+import sys
+import hashlib
 import pandas as pd
 import numpy as np
-from sentence_transformers import SentenceTransformer
 import faiss
-import pickle
 
-def generate_embeddings_and_cache():
-    print("embedFunc.py: Starting embedding generation and caching process...")
-    # Define cache directory and file paths
-    cache_dir = os.path.join(os.path.dirname(__file__), 'cache')
-    faiss_index_path = os.path.join(cache_dir, "faiss_index.idx")
-    contexts_path = os.path.join(cache_dir, "product_contexts.pkl")
-    
-    # Initialize Sentence Transformer model
+# Allow running this file directly as well as importing it from the Vector_Store package
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from Vector_Store.index_factory import (
+    build_index, save_index_params, load_index_params, resolve_index_params,
+    create_index, training_sample_size, apply_search_params,
+    RERANK_VECTORS_FILE, load_rerank_vectors,
+)
+from Vector_Store.context_store import CONTEXT_STORE_FILE, ContextStoreWriter, write_context_store
+from Vector_Store.lexical_index import BM25_INDEX_FILE, BM25Builder, build_bm25_index
+from Vector_Store.product_metadata import METADATA_FILE, ProductMetadata
+from Vector_Store.artifact_store import (
+    DEFAULT_ARTIFACT_DIR, version_path, prepare_version_dir, publish_version, read_manifest, resolve_artifact_dir,
+)
+
+EMBEDDING_MODEL_NAME = 'all-MiniLM-L6-v2'
+# Every build is written as a new version under this directory (see artifact_store.py)
+CACHE_DIR = DEFAULT_ARTIFACT_DIR
+FAISS_INDEX_FILE = "faiss_index.idx"
+# Stable FAISS id of every context, in context-store order
+PRODUCT_IDS_FILE = "product_ids.npy"
+# Stable ids and search-text hashes of the last build, used for incremental updates
+CATALOG_STATE_FILE = "catalog_state.npz"
+
+
+def load_sentence_model():
+    """Load the SentenceTransformer used to embed the catalog"""
     # This model is loaded here specifically for the embedding generation process.
-    # app.py will also load it for query embeddings.
+    # The retrieval engine loads its own copy for query embeddings.
+    # Imported here so that importing this module does not load torch
+    from sentence_transformers import SentenceTransformer
     try:
-        sentence_model = SentenceTransformer('all-MiniLM-L6-v2')
+        sentence_model = SentenceTransformer(EMBEDDING_MODEL_NAME)
         print("embedFunc.py: SentenceTransformer model loaded successfully for embedding generation.")
+        return sentence_model
     except Exception as e:
         print(f"embedFunc.py: Error loading SentenceTransformer model: {e}")
         raise  # Re-raise the exception to be caught by app.py or halt if run directly
 
+
+def load_product_data():
+    """Load the product catalog CSV and normalise the columns used for the texts"""
     # --- Load and process data from CSV ---
     product_df = pd.DataFrame()
     cleaned_data_path = os.path.join(os.path.dirname(__file__), 'DataSet', 'clean_product_info.csv')
@@ -42,11 +69,7 @@ def generate_embeddings_and_cache():
         try:
             product_df = pd.read_csv(original_data_path)
             print(f"embedFunc.py: Successfully loaded original product data from {original_data_path}")
-            if 'ingredients' not in product_df.columns: product_df['ingredients'] = ''
-            if 'skin_type' not in product_df.columns: product_df['skin_type'] = ''
-            if 'primary_category' not in product_df.columns and 'category' in product_df.columns:
-                 product_df['primary_category'] = product_df['category']
-            elif 'primary_category' not in product_df.columns: product_df['primary_category'] = ''
+            _complete_original_columns(product_df)
             data_loaded = True
         except Exception as e_load_orig:
             print(f"embedFunc.py: Error loading original data from {original_data_path}: {e_load_orig}")
@@ -56,7 +79,50 @@ def generate_embeddings_and_cache():
         print("embedFunc.py: Error: No product data could be loaded. Cannot generate embeddings.")
         raise ValueError("Failed to load product data for embedding.")
 
-    # Preprocess data columns
+    return preprocess_product_columns(product_df)
+
+
+def _complete_original_columns(product_df):
+    """The raw product_info.csv lacks some of the columns the cleaned file has"""
+    if 'ingredients' not in product_df.columns: product_df['ingredients'] = ''
+    if 'skin_type' not in product_df.columns: product_df['skin_type'] = ''
+    if 'primary_category' not in product_df.columns and 'category' in product_df.columns:
+         product_df['primary_category'] = product_df['category']
+    elif 'primary_category' not in product_df.columns: product_df['primary_category'] = ''
+    return product_df
+
+
+def iter_product_chunks(chunk_size=10000, data_path=None):
+    """
+    Stream the product catalog CSV in preprocessed chunks of chunk_size rows,
+    preferring the cleaned file over the original one.
+
+    Args:
+        chunk_size: Rows per chunk
+        data_path: CSV to stream instead of the DataSet files
+    """
+    cleaned_data_path = os.path.join(os.path.dirname(__file__), 'DataSet', 'clean_product_info.csv')
+    original_data_path = os.path.join(os.path.dirname(__file__), 'DataSet', 'product_info.csv')
+    if data_path is not None:
+        # Like a product_df given to generate_embeddings_and_cache, it may lack columns
+        is_original = True
+    elif os.path.exists(cleaned_data_path):
+        data_path, is_original = cleaned_data_path, False
+    elif os.path.exists(original_data_path):
+        data_path, is_original = original_data_path, True
+    else:
+        print("embedFunc.py: Error: No product data could be loaded. Cannot generate embeddings.")
+        raise ValueError("Failed to load product data for embedding.")
+
+    print(f"embedFunc.py: Streaming product data from {data_path} in chunks of {chunk_size} rows")
+    for chunk in pd.read_csv(data_path, chunksize=chunk_size):
+        if is_original:
+            _complete_original_columns(chunk)
+        yield preprocess_product_columns(chunk)
+
+
+def preprocess_product_columns(product_df):
+    """Fill missing values and fix the dtypes of the columns used for the texts"""
     product_df['product_name'] = product_df.get('product_name', pd.Series(dtype='str')).fillna('').astype(str)
     product_df['highlights'] = product_df.get('highlights', pd.Series(dtype='str')).fillna('').astype(str)
     product_df['ingredients'] = product_df.get('ingredients', pd.Series(dtype='str')).fillna('').astype(str)
@@ -64,16 +130,83 @@ def generate_embeddings_and_cache():
     product_df['skin_type'] = product_df.get('skin_type', pd.Series(dtype='str')).fillna('').astype(str)
     product_df['price_usd'] = product_df.get('price_usd', pd.Series(dtype='float')).fillna(0).astype(float)
     product_df['out_of_stock'] = product_df.get('out_of_stock', pd.Series(dtype='int')).fillna(1).astype(int)
+    return product_df
+
+
+def build_product_texts(product_df):
+    """
+    Build the text that is embedded and the context that is shown to the LLM for every row.
+
+    Works column-wise instead of with DataFrame.iterrows; the output is
+    identical to the original per-row loop (see benchmarks/bench_text_building.py).
+
+    Returns:
+        tuple: (list of search texts, list of LLM contexts), in row order
+    """
+    product_df = product_df.reset_index(drop=True)
+    combined_skin_type_info = _combine_skin_types(product_df['skin_type'], product_df['highlights'])
 
-    local_product_texts_for_embedding = []
-    local_product_contexts_for_llm = []
+    # Plain object arrays: element-wise '+' on them is a tight C loop over Python strings
+    product_name = product_df['product_name'].to_numpy(dtype=object)
+    highlights = product_df['highlights'].to_numpy(dtype=object)
+    ingredients_val = product_df['ingredients'].to_numpy(dtype=object)
+    category = product_df['primary_category'].to_numpy(dtype=object)
+    combined_skin_type_info = combined_skin_type_info.to_numpy(dtype=object)
 
-    for index, row in product_df.iterrows():
-        product_name = str(row.get('product_name', ''))
-        highlights = str(row.get('highlights', ''))
-        ingredients_val = str(row.get('ingredients', ''))
-        category = str(row.get('primary_category', ''))
-        skin_type_col_value = str(row.get('skin_type', ''))
+    search_text = (
+        "Product Name: " + product_name + ". "
+        + "Suitable for Skin Types: " + combined_skin_type_info + ". "
+        + "Features and Highlights: " + highlights + ". "
+        + "Category: " + category + ". "
+        + "Ingredients: " + np.where(ingredients_val != '', ingredients_val, 'Not specified') + "."
+    )
+
+    stock_info = np.where(product_df['out_of_stock'].to_numpy() == 0, "In Stock", "Out of Stock").astype(object)
+    price_usd = product_df['price_usd'].map('{:.2f}'.format).to_numpy(dtype=object)
+    context_text = (
+        "Product Name: " + product_name + "\\n"
+        + "Category: " + category + "\\n"
+        + "Skin Type Information: " + np.where(combined_skin_type_info != 'Not specified', combined_skin_type_info, 'N/A') + "\\n"
+        + "Price: USD " + price_usd + "\\n"
+        + "Stock: " + stock_info + "\\n"
+        + "Highlights: " + np.where(highlights != '', highlights, 'N/A') + "\\n"
+        + "Ingredients: " + np.where(ingredients_val != '', ingredients_val, 'N/A')
+    )
+    return search_text.tolist(), context_text.tolist()
+
+
+# Skin types mentioned in highlights, added when the skin_type column does not cover them
+SKIN_TYPE_TERMS = {
+    "oily skin": "Oily Skin", "dry skin": "Dry Skin",
+    "combination skin": "Combination Skin", "sensitive skin": "Sensitive Skin",
+    "all skin types": "All Skin Types"
+}
+
+
+def _combine_skin_types(skin_type, highlights):
+    """
+    Merge the ';'-separated skin_type column with skin types found in the
+    highlights into one sorted, de-duplicated '; '-joined string per row.
+
+    The result only depends on the skin_type value and on which SKIN_TYPE_TERMS
+    the highlights mention, so the string is built once per distinct
+    (skin_type, mentioned terms) pair and broadcast back to the rows.
+    """
+    skin_type_codes, skin_type_values = pd.factorize(skin_type)
+    highlights_lower = highlights.str.lower()
+
+    mentioned_terms = np.zeros(len(highlights), dtype='int64')
+    for bit, term in enumerate(SKIN_TYPE_TERMS):
+        mentioned = highlights_lower.str.contains(term, regex=False).to_numpy(dtype=bool)
+        mentioned_terms |= mentioned.astype('int64') << bit
+
+    combination_keys = skin_type_codes.astype('int64') * (1 << len(SKIN_TYPE_TERMS)) + mentioned_terms
+    combination_codes, combinations = pd.factorize(combination_keys)
+
+    combined_values = []
+    for key in combinations:
+        skin_type_code, mentioned_bits = divmod(int(key), 1 << len(SKIN_TYPE_TERMS))
+        skin_type_col_value = skin_type_values[skin_type_code]
 
         current_skin_types = set()
         if skin_type_col_value:
@@ -82,72 +215,371 @@ def generate_embeddings_and_cache():
                 if s_type_cleaned:
                     current_skin_types.add(s_type_cleaned.capitalize())
 
-        highlights_lower = highlights.lower()
-        skin_type_map = {
-            "oily skin": "Oily Skin", "dry skin": "Dry Skin",
-            "combination skin": "Combination Skin", "sensitive skin": "Sensitive Skin",
-            "all skin types": "All Skin Types"
-        }
-        for term, standardized_term in skin_type_map.items():
-            if term in highlights_lower:
+        for bit, (term, standardized_term) in enumerate(SKIN_TYPE_TERMS.items()):
+            if mentioned_bits & (1 << bit):
                 already_present = any(term in existing_st.lower() for existing_st in current_skin_types)
                 if not already_present:
                     current_skin_types.add(standardized_term)
-        
-        combined_skin_type_info = "; ".join(sorted(list(current_skin_types))) if current_skin_types else "Not specified"
-
-        search_text = (
-            f"Product Name: {product_name}. "
-            f"Suitable for Skin Types: {combined_skin_type_info}. "
-            f"Features and Highlights: {highlights}. "
-            f"Category: {category}. "
-            f"Ingredients: {ingredients_val if ingredients_val else 'Not specified'}."
-        )
-        local_product_texts_for_embedding.append(search_text)
-
-        stock_info = "In Stock" if row.get('out_of_stock', 1) == 0 else "Out of Stock"
-        price_usd = row.get('price_usd', 0.0)
-        context_text = (
-            f"Product Name: {product_name}\\n"
-            f"Category: {category}\\n"
-            f"Skin Type Information: {combined_skin_type_info if combined_skin_type_info != 'Not specified' else 'N/A'}\\n"
-            f"Price: USD {price_usd:.2f}\\n"
-            f"Stock: {stock_info}\\n"
-            f"Highlights: {highlights if highlights else 'N/A'}\\n"
-            f"Ingredients: {ingredients_val if ingredients_val else 'N/A'}"
-        )
-        local_product_contexts_for_llm.append(context_text)
+
+        combined_values.append("; ".join(sorted(current_skin_types)) if current_skin_types else "Not specified")
+
+    return pd.Series(np.array(combined_values, dtype=object)[combination_codes], index=highlights.index)
+
+
+def build_product_metadata(product_df):
+    """Price, stock, category and skin type columns used to filter searches, in row order"""
+    product_df = product_df.reset_index(drop=True)
+    return ProductMetadata.from_columns(
+        price=product_df['price_usd'].to_numpy(),
+        out_of_stock=product_df['out_of_stock'].to_numpy(),
+        category=product_df['primary_category'].to_numpy(dtype=object),
+        skin_types=_combine_skin_types(product_df['skin_type'], product_df['highlights']).to_numpy(dtype=object),
+    )
+
+
+def compute_product_ids(product_df, seen=None):
+    """
+    Derive a stable int64 FAISS id per row from its product_id (or name), so a
+    product keeps its id across catalog refreshes.
+
+    Args:
+        product_df: Catalog rows
+        seen: Occurrence counts per key, shared between chunks of one catalog
+            so duplicate keys get distinct ids
+    """
+    key_column = 'product_id' if 'product_id' in product_df.columns else 'product_name'
+    seen = {} if seen is None else seen
+    product_ids = np.empty(len(product_df), dtype='int64')
+    for i, key in enumerate(product_df[key_column].fillna('').astype(str)):
+        occurrence = seen.get(key, 0)
+        seen[key] = occurrence + 1
+        unique_key = key if occurrence == 0 else f"{key}#{occurrence}"
+        digest = hashlib.blake2b(unique_key.encode('utf-8'), digest_size=8).digest()
+        product_ids[i] = int.from_bytes(digest, 'little') & 0x7FFFFFFFFFFFFFFF
+    return product_ids
+
+
+def compute_content_hashes(texts):
+    """Hash of each search text; a row is re-embedded only when its hash changes"""
+    return np.array(
+        [hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest() for text in texts],
+        dtype='S16'
+    )
+
+
+def _load_catalog_state(cache_dir):
+    state_path = os.path.join(resolve_artifact_dir(cache_dir)[0], CATALOG_STATE_FILE)
+    if not os.path.exists(state_path):
+        return None
+    with np.load(state_path, allow_pickle=False) as state:
+        return state['product_ids'], state['content_hashes'], int(state['version'])
+
+
+def next_catalog_version(cache_dir):
+    """Version number for the next index written to cache_dir"""
+    previous_state = _load_catalog_state(cache_dir)
+    manifest = read_manifest(cache_dir)
+    return max(previous_state[2] if previous_state else 0, manifest["version"] if manifest else 0) + 1
+
+
+def save_cache(cache_dir, faiss_index_instance, built_params, contexts, product_ids, content_hashes, version,
+               lexical_index=None, metadata=None, rerank_vectors=None):
+    """
+    Write the index, contexts, id mapping and catalog state as a new version
+    directory under cache_dir, then publish it in the manifest so running
+    processes pick it up.
+
+    Pass contexts=None when the context store (and any re-ranking vectors)
+    have already been streamed into version_path(cache_dir, version).
+    The BM25 index and product metadata, when given, are saved alongside for
+    hybrid retrieval and filtered search, and rerank_vectors (float32, row
+    order) for indexes built with rerank=True.
+    """
+    if contexts is not None:
+        version_dir = prepare_version_dir(cache_dir, version)
+        write_context_store(os.path.join(version_dir, CONTEXT_STORE_FILE), contexts)
+    else:
+        version_dir = version_path(cache_dir, version)
+    built_params = dict(built_params, catalog_version=version, num_vectors=int(faiss_index_instance.ntotal))
+    faiss.write_index(faiss_index_instance, os.path.join(version_dir, FAISS_INDEX_FILE))
+    save_index_params(version_dir, built_params)
+    np.save(os.path.join(version_dir, PRODUCT_IDS_FILE), product_ids)
+    if lexical_index is not None:
+        lexical_index.save(os.path.join(version_dir, BM25_INDEX_FILE))
+    if metadata is not None:
+        metadata.save(os.path.join(version_dir, METADATA_FILE))
+    if rerank_vectors is not None:
+        np.ascontiguousarray(rerank_vectors, dtype='float32').tofile(os.path.join(version_dir, RERANK_VECTORS_FILE))
+    np.savez(os.path.join(version_dir, CATALOG_STATE_FILE),
+             product_ids=product_ids, content_hashes=content_hashes, version=version)
+
+    publish_version(cache_dir, version, EMBEDDING_MODEL_NAME, faiss_index_instance.ntotal,
+                    extra={"index_type": built_params["index_type"]})
+    print(f"embedFunc.py: Index version {version} and contexts saved to {version_dir}")
+
+
+def _update_index_incrementally(sentence_model, cache_dir, texts, contexts, product_ids, content_hashes, metadata):
+    """
+    Re-embed only new or changed rows and drop deleted ones from the existing index.
+
+    Returns:
+        bool: False if the existing cache cannot be updated in place and a full build is needed
+    """
+    current_dir = resolve_artifact_dir(cache_dir)[0]
+    faiss_index_path = os.path.join(current_dir, FAISS_INDEX_FILE)
+    previous_state = _load_catalog_state(cache_dir)
+    if previous_state is None or not os.path.exists(faiss_index_path):
+        print("embedFunc.py: No previous catalog state found. Running a full build.")
+        return False
+
+    built_params = load_index_params(current_dir)
+    if built_params.get('index_type') == 'hnsw':
+        print("embedFunc.py: HNSW indexes do not support removals. Running a full build.")
+        return False
+
+    faiss_index_instance = faiss.read_index(faiss_index_path)
+    if not isinstance(faiss_index_instance, faiss.IndexIDMap):
+        print("embedFunc.py: Cached index has no stable product ids. Running a full build.")
+        return False
+
+    previous_ids, previous_hashes, _ = previous_state
+    previous_rerank_vectors = None
+    if built_params.get('rerank'):
+        previous_rerank_vectors = load_rerank_vectors(current_dir, built_params, len(previous_ids))
+        if previous_rerank_vectors is None:
+            print("embedFunc.py: Re-ranking vectors are missing. Running a full build.")
+            return False
+    previous_hash_by_id = dict(zip(previous_ids.tolist(), previous_hashes.tolist()))
+    changed_rows = np.array(
+        [previous_hash_by_id.get(pid) != h for pid, h in zip(product_ids.tolist(), content_hashes.tolist())],
+        dtype=bool
+    )
+    deleted_ids = np.setdiff1d(previous_ids, product_ids)
+    stale_ids = np.concatenate([deleted_ids, product_ids[changed_rows & np.isin(product_ids, previous_ids)]])
+
+    if stale_ids.size:
+        faiss_index_instance.remove_ids(stale_ids.astype('int64'))
+    if changed_rows.any():
+        changed_texts = [texts[i] for i in np.flatnonzero(changed_rows)]
+        print(f"embedFunc.py: Re-embedding {len(changed_texts)} new or changed products...")
+        embeddings = np.array(sentence_model.encode(changed_texts, show_progress_bar=True)).astype('float32')
+        faiss_index_instance.add_with_ids(embeddings, product_ids[changed_rows])
+
+    rerank_vectors = None
+    if previous_rerank_vectors is not None:
+        # Carry unchanged vectors over to their new rows
+        rerank_vectors = np.empty((len(product_ids), previous_rerank_vectors.shape[1]), dtype='float32')
+        previous_order = np.argsort(previous_ids)
+        unchanged_rows = np.flatnonzero(~changed_rows)
+        previous_rows = previous_order[np.searchsorted(previous_ids[previous_order], product_ids[unchanged_rows])]
+        rerank_vectors[unchanged_rows] = previous_rerank_vectors[previous_rows]
+        if changed_rows.any():
+            rerank_vectors[changed_rows] = embeddings
+        del previous_rerank_vectors
+
+    print(f"embedFunc.py: Incremental update: {int(changed_rows.sum())} embedded, "
+          f"{deleted_ids.size} removed, {len(texts) - int(changed_rows.sum())} unchanged.")
+    save_cache(cache_dir, faiss_index_instance, built_params, contexts,
+               product_ids, content_hashes, next_catalog_version(cache_dir), build_bm25_index(texts), metadata,
+               rerank_vectors)
+    return True
+
+
+def generate_embeddings_and_cache(index_type=None, incremental=False, cache_dir=None, product_df=None,
+                                  **index_params):
+    """
+    Build the product embeddings, FAISS index and LLM contexts and save them to the cache.
+
+    Args:
+        index_type: One of index_factory.INDEX_TYPES, e.g. 'flat', 'hnsw', 'ivf_pq' or 'sq8'
+            (defaults to RAG_INDEX_TYPE or 'flat')
+        incremental: Re-embed only rows whose content hash changed since the last build
+        cache_dir: Artifact directory to publish to (defaults to CACHE_DIR)
+        product_df: Catalog to embed instead of the DataSet CSV, e.g. for benchmarks
+        **index_params: Build/search overrides such as nlist, pq_m, hnsw_m, nprobe, ef_search,
+            or rerank=True to keep float32 vectors for re-ranking quantized results
+    """
+    index_type = index_type or os.environ.get('RAG_INDEX_TYPE', 'flat')
+    print("embedFunc.py: Starting embedding generation and caching process...")
+    cache_dir = cache_dir or CACHE_DIR
+
+    sentence_model = load_sentence_model()
+    if product_df is None:
+        product_df = load_product_data()
+    else:
+        product_df = preprocess_product_columns(_complete_original_columns(product_df.copy()))
+    local_product_texts_for_embedding, local_product_contexts_for_llm = build_product_texts(product_df)
 
     if not local_product_texts_for_embedding:
         print("embedFunc.py: No product texts generated for embedding. FAISS index cannot be built.")
         raise ValueError("No product texts generated for embedding.")
 
+    product_ids = compute_product_ids(product_df)
+    content_hashes = compute_content_hashes(local_product_texts_for_embedding)
+
+    if incremental and _update_index_incrementally(
+            sentence_model, cache_dir, local_product_texts_for_embedding,
+            local_product_contexts_for_llm, product_ids, content_hashes, build_product_metadata(product_df)):
+        print("embedFunc.py: Embedding generation and caching process completed.")
+        return
+
     try:
         print(f"embedFunc.py: Generating embeddings for {len(local_product_texts_for_embedding)} products...")
         embeddings = sentence_model.encode(local_product_texts_for_embedding, show_progress_bar=True)
         embeddings = np.array(embeddings).astype('float32')
 
-        dimension = embeddings.shape[1]
-        faiss_index_instance = faiss.IndexFlatL2(dimension)
-        faiss_index_instance.add(embeddings)
-        print(f"embedFunc.py: FAISS index built successfully with {faiss_index_instance.ntotal} products.")
+        faiss_index_instance, built_params = build_index(embeddings, index_type, ids=product_ids, **index_params)
+        print(f"embedFunc.py: FAISS {built_params['index_type']} index built successfully with {faiss_index_instance.ntotal} products.")
 
-        os.makedirs(cache_dir, exist_ok=True)
-        faiss.write_index(faiss_index_instance, faiss_index_path)
-        with open(contexts_path, 'wb') as f:
-            pickle.dump(local_product_contexts_for_llm, f)
-        print(f"embedFunc.py: Index and contexts saved to {cache_dir}")
+        save_cache(cache_dir, faiss_index_instance, built_params, local_product_contexts_for_llm,
+                   product_ids, content_hashes, next_catalog_version(cache_dir),
+                   build_bm25_index(local_product_texts_for_embedding), build_product_metadata(product_df),
+                   embeddings if built_params.get('rerank') else None)
         print("embedFunc.py: Embedding generation and caching process completed.")
 
     except Exception as e_build_save:
         print(f"embedFunc.py: Error building and saving FAISS index: {e_build_save}")
         raise # Re-raise to indicate failure
 
+def peak_rss_bytes():
+    """Peak resident set size of this process so far, or None if the platform cannot tell"""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+        return peak if sys.platform == 'darwin' else peak * 1024
+    except ImportError:
+        pass
+    try:
+        import psutil
+        return psutil.Process(os.getpid()).memory_info().peak_wset
+    except (ImportError, AttributeError):
+        return None
+
+
+def _count_csv_rows(chunk_size, data_path=None):
+    return sum(len(chunk) for chunk in iter_product_chunks(chunk_size, data_path))
+
+
+def generate_embeddings_streaming(chunk_size=10000, index_type=None, batch_size=64, cache_dir=None,
+                                  data_path=None, **index_params):
+    """
+    Build the cache with bounded memory: the CSV is read in chunks and every
+    chunk goes through text building, encoding and the index before the next
+    one is read. Contexts are streamed straight into the new version's context store.
+
+    Only the indexes themselves (FAISS and BM25 postings) and about 32 bytes
+    per product of ids, content hashes and context offsets grow with the
+    catalog; use ivf_pq to keep the FAISS index small as well.
+
+    Args:
+        cache_dir: Artifact directory to publish to (defaults to CACHE_DIR)
+        data_path: CSV to stream instead of the DataSet files
+    """
+    index_type = index_type or os.environ.get('RAG_INDEX_TYPE', 'flat')
+    print("embedFunc.py: Starting streaming embedding generation...")
+    cache_dir = cache_dir or CACHE_DIR
+    sentence_model = load_sentence_model()
+    version = next_catalog_version(cache_dir)
+    version_dir = prepare_version_dir(cache_dir, version)
+
+    # IVF parameters depend on the catalog size, which costs one extra cheap pass to learn
+    num_rows = None
+    if index_type in ('ivf_flat', 'ivf_pq'):
+        num_rows = _count_csv_rows(chunk_size, data_path)
+
+    faiss_index_instance = None
+    built_params = None
+    training_buffer = []
+    seen_keys = {}
+    id_chunks, hash_chunks = [], []
+    bm25_builder = BM25Builder()
+    metadata_chunks = []
+    rerank_file = None
+    rows_done = 0
+
+    with ContextStoreWriter(os.path.join(version_dir, CONTEXT_STORE_FILE)) as context_writer:
+        for chunk in iter_product_chunks(chunk_size, data_path):
+            texts, contexts = build_product_texts(chunk)
+            product_ids = compute_product_ids(chunk, seen_keys)
+            context_writer.add_many(contexts)
+            bm25_builder.add_many(texts)
+            metadata_chunks.append(build_product_metadata(chunk))
+            id_chunks.append(product_ids)
+            hash_chunks.append(compute_content_hashes(texts))
+
+            embeddings = np.asarray(
+                sentence_model.encode(texts, batch_size=batch_size, show_progress_bar=False), dtype='float32'
+            )
+            if faiss_index_instance is None:
+                built_params = resolve_index_params(index_type, num_rows or len(texts),
+                                                    embeddings.shape[1], **index_params)
+                faiss_index_instance = faiss.IndexIDMap(create_index(built_params))
+                if built_params.get('rerank'):
+                    rerank_file = open(os.path.join(version_dir, RERANK_VECTORS_FILE), 'wb')
+            if rerank_file is not None:
+                embeddings.tofile(rerank_file)
+
+            if faiss_index_instance.is_trained:
+                faiss_index_instance.add_with_ids(embeddings, product_ids)
+            else:
+                # Hold back the first vectors until there are enough to train on
+                training_buffer.append((embeddings, product_ids))
+                if sum(len(ids) for _, ids in training_buffer) >= training_sample_size(built_params):
+                    _train_and_flush(faiss_index_instance, training_buffer)
+
+            rows_done += len(texts)
+            print(f"embedFunc.py: {rows_done} products embedded so far")
+
+        if training_buffer:
+            _train_and_flush(faiss_index_instance, training_buffer)
+
+    if faiss_index_instance is None:
+        raise ValueError("No product texts generated for embedding.")
+
+    if rerank_file is not None:
+        rerank_file.close()
+
+    apply_search_params(faiss_index_instance, built_params)
+    save_cache(cache_dir, faiss_index_instance, built_params, None,
+               np.concatenate(id_chunks), np.concatenate(hash_chunks), version,
+               bm25_builder.build(), ProductMetadata.concatenate(metadata_chunks))
+    peak = peak_rss_bytes()
+    peak_text = f"{peak / 1e6:.0f} MB" if peak else "unavailable"
+    print(f"embedFunc.py: Streaming build finished: {faiss_index_instance.ntotal} products, peak RSS {peak_text}")
+
+
+def _train_and_flush(faiss_index_instance, training_buffer):
+    embeddings = np.concatenate([e for e, _ in training_buffer])
+    product_ids = np.concatenate([ids for _, ids in training_buffer])
+    print(f"embedFunc.py: Training index on {len(embeddings)} vectors...")
+    faiss_index_instance.train(embeddings)
+    faiss_index_instance.add_with_ids(embeddings, product_ids)
+    training_buffer.clear()
+
+
 if __name__ == '__main__':
     # This allows running embedFunc.py directly to generate cache if needed
+    import argparse
+    parser = argparse.ArgumentParser(description="Generate the product embedding cache")
+    parser.add_argument('--index-type', default=None, help="flat, hnsw, ivf_flat, ivf_pq, fp16, sq8 or pq")
+    parser.add_argument('--rerank', action='store_true',
+                        help="Keep float32 vectors on disk to re-rank the short list of quantized indexes")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Only re-embed products whose content changed since the last build")
+    parser.add_argument('--streaming', action='store_true',
+                        help="Read the CSV in chunks to keep peak memory flat on large catalogs")
+    parser.add_argument('--chunk-size', type=int, default=10000, help="Rows per chunk in streaming mode")
+    args = parser.parse_args()
+
     print("Running embedFunc.py directly to generate cache...")
     try:
-        generate_embeddings_and_cache()
+        if args.streaming:
+            generate_embeddings_streaming(chunk_size=args.chunk_size, index_type=args.index_type,
+                                          rerank=args.rerank or None)
+        else:
+            generate_embeddings_and_cache(index_type=args.index_type, incremental=args.incremental,
+                                          rerank=args.rerank or None)
         print("Cache generation successful.")
     except Exception as e:
         print(f"Cache generation failed: {e}")
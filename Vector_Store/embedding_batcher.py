@@ -0,0 +1,131 @@
+"""
+Embedding Batcher
+Collects query texts from concurrent requests and encodes them together, so a
+burst of /chat or Telegram messages costs one batched forward pass instead of
+many single-row passes competing for the same CPU cores.
+"""
+import time
+import queue
+import logging
+import threading
+from collections import deque
+from concurrent.futures import Future
+from typing import Callable, Dict, Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingBatcher:
+    """
+    Queue-backed micro-batcher around an encode function.
+
+    A background thread waits for the first queued text, then keeps collecting
+    until either max_batch_size texts are queued or max_wait_ms has passed, and
+    encodes them in one call. Each caller gets its own vector through a Future.
+    """
+
+    def __init__(self, encode_fn: Callable[[List[str]], Any],
+                 max_batch_size: int = 32, max_wait_ms: float = 2.0,
+                 latency_window: int = 1000):
+        self.encode_fn = encode_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait_seconds = max(0.0, float(max_wait_ms)) / 1000.0
+        self._queue = queue.Queue()
+        self._stopped = threading.Event()
+        self._metrics_lock = threading.Lock()
+        self._latencies_ms = deque(maxlen=latency_window)
+        self._started_at = time.perf_counter()
+        self._requests = 0
+        self._batches = 0
+        self._errors = 0
+        self._encode_seconds = 0.0
+        self._worker = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+        self._worker.start()
+
+    def submit(self, text: str) -> Future:
+        """Queue a text for encoding and return a Future for its vector"""
+        if self._stopped.is_set():
+            raise RuntimeError("EmbeddingBatcher has been stopped")
+        future = Future()
+        self._queue.put((text, future, time.perf_counter()))
+        return future
+
+    def encode(self, text: str, timeout: Optional[float] = 10.0):
+        """Encode one text through the batch queue and wait for its vector"""
+        return self.submit(text).result(timeout=timeout)
+
+    def stop(self):
+        """Stop the worker thread after the current batch"""
+        self._stopped.set()
+        self._queue.put(None)
+        self._worker.join(timeout=5)
+
+    def _collect_batch(self) -> list:
+        item = self._queue.get()
+        if item is None:
+            return []
+        batch = [item]
+        deadline = time.perf_counter() + self.max_wait_seconds
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                self._stopped.set()
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while not self._stopped.is_set():
+            batch = self._collect_batch()
+            if batch:
+                self._encode_batch(batch)
+
+    def _encode_batch(self, batch: list):
+        texts = [text for text, _, _ in batch]
+        start = time.perf_counter()
+        try:
+            vectors = self.encode_fn(texts)
+        except Exception as e:
+            logger.error(f"Batched encode of {len(texts)} texts failed: {e}", exc_info=True)
+            with self._metrics_lock:
+                self._errors += len(batch)
+            for _, future, _ in batch:
+                future.set_exception(e)
+            return
+
+        finished = time.perf_counter()
+        with self._metrics_lock:
+            self._batches += 1
+            self._requests += len(batch)
+            self._encode_seconds += finished - start
+            for _, _, queued_at in batch:
+                self._latencies_ms.append((finished - queued_at) * 1000)
+
+        for i, (_, future, _) in enumerate(batch):
+            future.set_result(vectors[i])
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Throughput, batch size and per-request latency statistics"""
+        with self._metrics_lock:
+            latencies = sorted(self._latencies_ms)
+            elapsed = time.perf_counter() - self._started_at
+            metrics = {
+                "requests": self._requests,
+                "batches": self._batches,
+                "errors": self._errors,
+                "queued": self._queue.qsize(),
+                "avg_batch_size": round(self._requests / self._batches, 2) if self._batches else 0,
+                "requests_per_second": round(self._requests / elapsed, 2) if elapsed > 0 else 0,
+                "encode_seconds_total": round(self._encode_seconds, 3),
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait_seconds * 1000,
+            }
+        if latencies:
+            metrics["latency_ms_p50"] = round(latencies[len(latencies) // 2], 3)
+            metrics["latency_ms_p95"] = round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 3)
+            metrics["latency_ms_max"] = round(latencies[-1], 3)
+        return metrics
@@ -0,0 +1,247 @@
+"""
+FAISS Index Factory
+Builds the product index in one of several modes so the catalog can grow past
+what an exact search handles comfortably:
+
+- flat:      exact IndexFlatL2 (the original behaviour)
+- hnsw:      graph-based approximate search, no training required
+- ivf_flat:  inverted lists over full vectors, trained with k-means
+- ivf_pq:    inverted lists over product-quantized vectors, smallest footprint
+- fp16:      exact scan over half-precision vectors (1/2 the memory)
+- sq8:       exact scan over 8-bit scalar-quantized vectors (1/4 the memory)
+- pq:        exact scan over product-quantized codes (pq_m bytes per vector)
+
+The build parameters are saved next to the index so query-time knobs
+(nprobe for IVF, efSearch for HNSW) can be applied when it is loaded again.
+
+Quantized modes can be built with rerank=True: the float32 vectors are then
+also written to a flat file that the retrieval engine memory-maps, and the
+short list returned by the compressed index is re-ordered by exact distance.
+The OS page cache shares that file between worker processes, so each worker
+only holds the compressed index on its heap.
+"""
+import os
+import json
+import math
+import logging
+from typing import Optional, Dict, Any, Tuple
+
+import numpy as np
+import faiss
+
+logger = logging.getLogger(__name__)
+
+INDEX_TYPES = ('flat', 'hnsw', 'ivf_flat', 'ivf_pq', 'fp16', 'sq8', 'pq')
+QUANTIZED_INDEX_TYPES = ('ivf_pq', 'fp16', 'sq8', 'pq')
+INDEX_PARAMS_FILE = "index_params.json"
+# Raw float32 vectors in context-row order, used to re-rank quantized results
+RERANK_VECTORS_FILE = "rerank_vectors.f32"
+
+# faiss warns when k-means sees fewer than this many points per centroid
+MIN_POINTS_PER_CENTROID = 39
+
+
+def _default_nlist(num_vectors: int) -> int:
+    """Pick a number of IVF lists that the catalog can actually train"""
+    nlist = int(4 * math.sqrt(num_vectors))
+    return max(1, min(nlist, num_vectors // MIN_POINTS_PER_CENTROID))
+
+
+def _default_pq_m(dimension: int) -> int:
+    """Largest sub-quantizer count <= 48 that divides the dimension"""
+    for m in range(min(48, dimension), 0, -1):
+        if dimension % m == 0:
+            return m
+    return 1
+
+
+def resolve_index_params(index_type: str, num_vectors: int, dimension: int,
+                         **overrides) -> Dict[str, Any]:
+    """
+    Fill in build parameters for an index type, falling back to 'flat' when
+    the catalog is too small to train the requested mode.
+
+    Args:
+        index_type: One of INDEX_TYPES
+        num_vectors: Number of vectors that will be added
+        dimension: Embedding dimension
+        **overrides: Explicit values for nlist, pq_m, pq_nbits, hnsw_m,
+            ef_construction, nprobe, ef_search or rerank
+
+    Returns:
+        dict: The parameters used to build and query the index
+    """
+    index_type = (index_type or 'flat').lower()
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unsupported index type: {index_type}. Choose from {', '.join(INDEX_TYPES)}")
+
+    overrides = {k: v for k, v in overrides.items() if v is not None}
+    params = {"index_type": index_type, "dimension": dimension, "num_vectors": num_vectors}
+    if overrides.get("rerank") and index_type in QUANTIZED_INDEX_TYPES:
+        params["rerank"] = True
+
+    if index_type == 'hnsw':
+        params["hnsw_m"] = int(overrides.get("hnsw_m", 32))
+        params["ef_construction"] = int(overrides.get("ef_construction", 80))
+        params["ef_search"] = int(overrides.get("ef_search", 64))
+
+    elif index_type in ('ivf_flat', 'ivf_pq'):
+        nlist = int(overrides.get("nlist", _default_nlist(num_vectors)))
+        if num_vectors < nlist * MIN_POINTS_PER_CENTROID or nlist < 2:
+            logger.warning(f"Only {num_vectors} vectors - too few to train {index_type} "
+                           f"with nlist={nlist}. Falling back to a flat index.")
+            return resolve_index_params('flat', num_vectors, dimension)
+        params["nlist"] = nlist
+        params["nprobe"] = int(overrides.get("nprobe", max(1, nlist // 16)))
+
+        if index_type == 'ivf_pq':
+            params["pq_m"] = int(overrides.get("pq_m", _default_pq_m(dimension)))
+            params["pq_nbits"] = int(overrides.get("pq_nbits", 8))
+            if dimension % params["pq_m"] != 0:
+                raise ValueError(f"pq_m={params['pq_m']} must divide the dimension {dimension}")
+            if num_vectors < (1 << params["pq_nbits"]):
+                logger.warning(f"Only {num_vectors} vectors - too few to train {params['pq_nbits']}-bit "
+                               f"PQ codebooks. Falling back to ivf_flat.")
+                return resolve_index_params('ivf_flat', num_vectors, dimension, **overrides)
+
+    elif index_type == 'pq':
+        params["pq_m"] = int(overrides.get("pq_m", _default_pq_m(dimension)))
+        params["pq_nbits"] = int(overrides.get("pq_nbits", 8))
+        if dimension % params["pq_m"] != 0:
+            raise ValueError(f"pq_m={params['pq_m']} must divide the dimension {dimension}")
+        if num_vectors < (1 << params["pq_nbits"]):
+            logger.warning(f"Only {num_vectors} vectors - too few to train {params['pq_nbits']}-bit "
+                           f"PQ codebooks. Falling back to sq8.")
+            return resolve_index_params('sq8', num_vectors, dimension, **overrides)
+
+    return params
+
+
+def create_index(params: Dict[str, Any]) -> faiss.Index:
+    """Create an empty (untrained) index from resolved parameters"""
+    dimension = params["dimension"]
+    if params["index_type"] == 'flat':
+        return faiss.IndexFlatL2(dimension)
+    if params["index_type"] == 'hnsw':
+        index = faiss.IndexHNSWFlat(dimension, params["hnsw_m"])
+        index.hnsw.efConstruction = params["ef_construction"]
+        return index
+    if params["index_type"] == 'ivf_flat':
+        return faiss.index_factory(dimension, f"IVF{params['nlist']},Flat")
+    if params["index_type"] == 'fp16':
+        return faiss.IndexScalarQuantizer(dimension, faiss.ScalarQuantizer.QT_fp16)
+    if params["index_type"] == 'sq8':
+        return faiss.IndexScalarQuantizer(dimension, faiss.ScalarQuantizer.QT_8bit)
+    if params["index_type"] == 'pq':
+        return faiss.IndexPQ(dimension, params["pq_m"], params["pq_nbits"])
+    return faiss.index_factory(dimension, f"IVF{params['nlist']},PQ{params['pq_m']}x{params['pq_nbits']}")
+
+
+def training_sample_size(params: Dict[str, Any]) -> int:
+    """How many vectors to collect before training (0 for indexes that need no training)"""
+    if params["index_type"] == 'ivf_flat':
+        return params["nlist"] * MIN_POINTS_PER_CENTROID * 2
+    if params["index_type"] == 'ivf_pq':
+        return max(params["nlist"] * MIN_POINTS_PER_CENTROID * 2, (1 << params["pq_nbits"]) * 100)
+    if params["index_type"] == 'pq':
+        return (1 << params["pq_nbits"]) * 100
+    if params["index_type"] == 'sq8':
+        # Only per-dimension min/max are learned
+        return 20000
+    return 0
+
+
+def build_index(embeddings: np.ndarray, index_type: str = 'flat',
+                ids: Optional[np.ndarray] = None,
+                **overrides) -> Tuple[faiss.Index, Dict[str, Any]]:
+    """
+    Build, train and fill an index from float32 embeddings.
+
+    When ids are given the index is wrapped in an IndexIDMap so each vector
+    keeps a stable product id and can later be removed or replaced in place.
+
+    Returns:
+        tuple: (faiss index, parameters used to build it)
+    """
+    embeddings = np.ascontiguousarray(embeddings, dtype='float32')
+    num_vectors, dimension = embeddings.shape
+    params = resolve_index_params(index_type, num_vectors, dimension, **overrides)
+    index = create_index(params)
+
+    if not index.is_trained:
+        logger.info(f"Training {params['index_type']} index on {num_vectors} vectors...")
+        index.train(embeddings)
+
+    if ids is not None:
+        index = faiss.IndexIDMap(index)
+        index.add_with_ids(embeddings, np.ascontiguousarray(ids, dtype='int64'))
+    else:
+        index.add(embeddings)
+    apply_search_params(index, params)
+    logger.info(f"Built {params['index_type']} index with {index.ntotal} vectors")
+    return index, params
+
+
+def apply_search_params(index: faiss.Index, params: Dict[str, Any],
+                        nprobe: Optional[int] = None, ef_search: Optional[int] = None):
+    """
+    Apply query-time knobs to a loaded index. Explicit arguments win over the
+    saved parameters; knobs that do not apply to the index type are ignored.
+    """
+    nprobe = nprobe or params.get("nprobe")
+    ef_search = ef_search or params.get("ef_search")
+    parameter_space = faiss.ParameterSpace()
+
+    if nprobe and params.get("index_type", '').startswith('ivf'):
+        parameter_space.set_index_parameter(index, "nprobe", int(nprobe))
+    if ef_search and params.get("index_type") == 'hnsw':
+        parameter_space.set_index_parameter(index, "efSearch", int(ef_search))
+
+
+def rerank_candidates(query: np.ndarray, rows: np.ndarray, vectors: np.ndarray, k: int) -> np.ndarray:
+    """
+    Re-order a short list of context rows by exact L2 distance to the query.
+
+    Args:
+        query: (dim,) or (1, dim) float32 query embedding
+        rows: Candidate context rows (all >= 0)
+        vectors: float32 vectors in context-row order, usually a memmap of RERANK_VECTORS_FILE
+        k: Number of rows to keep
+
+    Returns:
+        np.ndarray: The k closest rows, best first
+    """
+    if len(rows) == 0:
+        return rows
+    # Ascending rows turn the memmap gather into a forward scan over the file
+    sorted_rows = np.sort(rows)
+    candidates = np.asarray(vectors[sorted_rows], dtype='float32')
+    distances = ((candidates - query.reshape(1, -1)) ** 2).sum(axis=1)
+    return sorted_rows[np.argsort(distances, kind='stable')[:k]]
+
+
+def load_rerank_vectors(cache_dir: str, params: Dict[str, Any], num_vectors: int) -> Optional[np.ndarray]:
+    """Memory-map the float32 re-ranking vectors if the index was built with rerank=True"""
+    path = os.path.join(cache_dir, RERANK_VECTORS_FILE)
+    if not params.get("rerank") or not os.path.exists(path):
+        return None
+    dimension = int(params["dimension"])
+    if os.path.getsize(path) != num_vectors * dimension * 4:
+        logger.warning(f"{path} does not match the index size. Re-ranking disabled.")
+        return None
+    return np.memmap(path, dtype='float32', mode='r', shape=(num_vectors, dimension))
+
+
+def save_index_params(cache_dir: str, params: Dict[str, Any]):
+    """Write the build parameters next to faiss_index.idx"""
+    with open(os.path.join(cache_dir, INDEX_PARAMS_FILE), 'w') as f:
+        json.dump(params, f, indent=2)
+
+
+def load_index_params(cache_dir: str) -> Dict[str, Any]:
+    """Read saved build parameters; caches built before this file existed are flat"""
+    params_path = os.path.join(cache_dir, INDEX_PARAMS_FILE)
+    if not os.path.exists(params_path):
+        return {"index_type": "flat"}
+    with open(params_path) as f:
+        return json.load(f)
@@ -0,0 +1,196 @@
+"""
+Lexical (BM25) Index
+Sparse inverted index over the same search texts the dense index is built
+from. Dense MiniLM similarity is weak on exact tokens such as brand names,
+product names and ingredients ("niacinamide", "19-69 Kasbah"); BM25 catches
+those, and the two rankings are merged with reciprocal rank fusion.
+
+The index is built once by embedFunc and saved next to faiss_index.idx as
+CSR arrays: a sorted vocabulary, per-term posting offsets, the context row of
+every posting and its precomputed BM25 impact, so a query is just a handful
+of array slices and one bincount.
+"""
+import os
+import re
+import logging
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+BM25_INDEX_FILE = "bm25_index.npz"
+
+# Terms in more than this share of products (the "Product Name:", "Category:"
+# labels every search text carries) score next to nothing and are dropped
+MAX_DOC_FREQUENCY_RATIO = 0.9
+
+_TOKEN_RE = re.compile(r"[^\W_]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-cased alphanumeric tokens; '19-69' becomes ['19', '69']"""
+    return _TOKEN_RE.findall(text.lower())
+
+
+class BM25Builder:
+    """Collects postings document by document and turns them into a BM25Index"""
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._vocabulary: Dict[str, int] = {}
+        self._term_ids: List[np.ndarray] = []
+        self._rows: List[np.ndarray] = []
+        self._tfs: List[np.ndarray] = []
+        self._doc_lengths: List[int] = []
+
+    def __len__(self):
+        return len(self._doc_lengths)
+
+    def add(self, text: str):
+        tokens = tokenize(text)
+        counts = Counter(tokens)
+        term_ids = [self._vocabulary.setdefault(term, len(self._vocabulary)) for term in counts]
+        self._term_ids.append(np.array(term_ids, dtype='int32'))
+        self._tfs.append(np.fromiter(counts.values(), dtype='float32', count=len(counts)))
+        self._rows.append(np.full(len(counts), len(self._doc_lengths), dtype='int32'))
+        self._doc_lengths.append(len(tokens))
+
+    def add_many(self, texts: Iterable[str]):
+        for text in texts:
+            self.add(text)
+
+    def build(self) -> 'BM25Index':
+        num_docs = len(self._doc_lengths)
+        vocabulary = np.array(list(self._vocabulary), dtype=str)
+        if num_docs == 0 or len(vocabulary) == 0:
+            return BM25Index(vocabulary[:0], np.zeros(1, dtype='int64'),
+                             np.zeros(0, dtype='int32'), np.zeros(0, dtype='float32'), num_docs)
+
+        term_ids = np.concatenate(self._term_ids)
+        rows = np.concatenate(self._rows)
+        tfs = np.concatenate(self._tfs)
+        doc_lengths = np.asarray(self._doc_lengths, dtype='float32')
+
+        doc_freq = np.bincount(term_ids, minlength=len(vocabulary))
+        idf = np.log1p((num_docs - doc_freq + 0.5) / (doc_freq + 0.5)).astype('float32')
+        length_norm = self.k1 * (1 - self.b + self.b * doc_lengths / max(doc_lengths.mean(), 1.0))
+        impacts = idf[term_ids] * tfs * (self.k1 + 1) / (tfs + length_norm[rows])
+
+        # Renumber the kept terms in sorted order so lookups can use searchsorted
+        keep = doc_freq <= max(1, MAX_DOC_FREQUENCY_RATIO * num_docs)
+        order = np.argsort(vocabulary)
+        order = order[keep[order]]
+        new_term_id = np.full(len(vocabulary), -1, dtype='int64')
+        new_term_id[order] = np.arange(len(order))
+
+        posting_terms = new_term_id[term_ids]
+        kept_postings = posting_terms >= 0
+        posting_terms = posting_terms[kept_postings]
+        postings_order = np.argsort(posting_terms, kind='stable')
+        indptr = np.zeros(len(order) + 1, dtype='int64')
+        np.cumsum(np.bincount(posting_terms, minlength=len(order)), out=indptr[1:])
+
+        return BM25Index(vocabulary[order], indptr,
+                         rows[kept_postings][postings_order],
+                         impacts[kept_postings][postings_order].astype('float32'),
+                         num_docs)
+
+
+class BM25Index:
+    """Read-only BM25 index returning context rows, compatible with the FAISS row order"""
+
+    def __init__(self, vocabulary: np.ndarray, indptr: np.ndarray, rows: np.ndarray,
+                 impacts: np.ndarray, num_docs: int):
+        self.vocabulary = vocabulary
+        self.indptr = indptr
+        self.rows = rows
+        self.impacts = impacts
+        self.num_docs = int(num_docs)
+
+    def __len__(self):
+        return self.num_docs
+
+    @property
+    def nbytes(self) -> int:
+        return self.vocabulary.nbytes + self.indptr.nbytes + self.rows.nbytes + self.impacts.nbytes
+
+    def _term_slice(self, term: str) -> Optional[slice]:
+        position = int(np.searchsorted(self.vocabulary, term))
+        if position < len(self.vocabulary) and self.vocabulary[position] == term:
+            return slice(int(self.indptr[position]), int(self.indptr[position + 1]))
+        return None
+
+    def search(self, query: str, top_k: int = 10,
+               max_postings: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Score the query against every product.
+
+        Args:
+            query: Free-text query
+            top_k: Number of rows to return
+            max_postings: Latency budget; the rarest query terms are scored
+                first and terms that would exceed the budget are skipped
+
+        Returns:
+            tuple: (context rows, BM25 scores), best first
+        """
+        slices = [s for s in (self._term_slice(term) for term in set(tokenize(query))) if s is not None]
+        if not slices:
+            return np.zeros(0, dtype='int64'), np.zeros(0, dtype='float32')
+
+        slices.sort(key=lambda s: s.stop - s.start)
+        if max_postings:
+            budgeted, used = [], 0
+            for s in slices:
+                if budgeted and used + (s.stop - s.start) > max_postings:
+                    break
+                budgeted.append(s)
+                used += s.stop - s.start
+            slices = budgeted
+
+        rows = np.concatenate([self.rows[s] for s in slices])
+        impacts = np.concatenate([self.impacts[s] for s in slices])
+        unique_rows, inverse = np.unique(rows, return_inverse=True)
+        scores = np.bincount(inverse, weights=impacts)
+
+        if len(scores) > top_k:
+            best = np.argpartition(-scores, top_k - 1)[:top_k]
+        else:
+            best = np.arange(len(scores))
+        best = best[np.argsort(-scores[best], kind='stable')]
+        return unique_rows[best].astype('int64'), scores[best].astype('float32')
+
+    def save(self, path: str):
+        tmp_path = f"{path}.tmp.npz"
+        np.savez(tmp_path, vocabulary=self.vocabulary, indptr=self.indptr, rows=self.rows,
+                 impacts=self.impacts, num_docs=np.int64(self.num_docs))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> 'BM25Index':
+        with np.load(path) as data:
+            return cls(data['vocabulary'], data['indptr'], data['rows'],
+                       data['impacts'], int(data['num_docs']))
+
+
+def build_bm25_index(texts: Iterable[str], **params) -> BM25Index:
+    builder = BM25Builder(**params)
+    builder.add_many(texts)
+    return builder.build()
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[int]], top_k: int, k: int = 60) -> List[int]:
+    """
+    Merge several rankings of context rows: each row scores sum(1 / (k + rank)).
+    Rows missing from a ranking simply get nothing from it.
+    """
+    scores: Dict[int, float] = {}
+    for ranking in rankings:
+        for rank, row in enumerate(ranking):
+            if row < 0:
+                continue
+            scores[int(row)] = scores.get(int(row), 0.0) + 1.0 / (k + rank + 1)
+    return sorted(scores, key=lambda row: -scores[row])[:top_k]
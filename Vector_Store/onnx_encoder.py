@@ -0,0 +1,222 @@
+"""
+ONNX Runtime Query Encoder
+CPU backend for encoding queries without PyTorch. export_onnx_model() converts
+the SentenceTransformer once (optionally adding a dynamically int8-quantized
+copy); OnnxSentenceEncoder then reproduces the SentenceTransformer pipeline
+(tokenize -> transformer -> mean pooling -> L2 normalize) with onnxruntime
+and the Rust `tokenizers` package only, so serving processes never import torch.
+
+The retrieval engine picks the backend from RAG_ENCODER_BACKEND
+('torch', 'onnx' or 'onnx-int8') and the model directory from
+RAG_ONNX_MODEL_DIR. The FAISS index is still built with the torch model, so
+every export is checked against it (check_parity) before it is used.
+
+Usage:
+    pip install onnx onnxruntime tokenizers
+    python Vector_Store/onnx_encoder.py --quantize
+"""
+import os
+import sys
+import json
+import argparse
+import logging
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+ENCODER_BACKENDS = ('torch', 'onnx', 'onnx-int8')
+ONNX_MODEL_FILE = "model.onnx"
+ONNX_INT8_MODEL_FILE = "model_int8.onnx"
+ENCODER_CONFIG_FILE = "encoder_config.json"
+
+# fp32 ONNX must reproduce torch almost exactly; int8 only has to keep the ranking
+FP32_MAX_ABS_DIFF = 1e-4
+INT8_MIN_COSINE = 0.98
+
+PARITY_SAMPLE_TEXTS = [
+    "moisturizer for dry skin",
+    "Is the Niacinamide 10% + Zinc 1% serum good for oily skin?",
+    "fragrance free sunscreen under $30",
+    "19-69 Kasbah Eau de Parfum",
+    "What's a good gift for someone who loves matte lipstick?",
+    "hello",
+]
+
+
+def default_onnx_model_dir(model_name: str) -> str:
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), 'onnx', model_name)
+
+
+def export_onnx_model(model_name: str = 'all-MiniLM-L6-v2', output_dir: Optional[str] = None,
+                      quantize: bool = False, opset: int = 14) -> str:
+    """
+    Export the SentenceTransformer's transformer to ONNX next to its tokenizer
+    and pooling settings, plus an int8 copy when quantize is True.
+
+    Returns:
+        str: The directory the model was written to
+    """
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    output_dir = output_dir or default_onnx_model_dir(model_name)
+    os.makedirs(output_dir, exist_ok=True)
+    model = SentenceTransformer(model_name, device='cpu')
+    transformer = model[0]
+    tokenizer = transformer.tokenizer
+    auto_model = transformer.auto_model.eval()
+
+    pooling = model[1]
+    if not getattr(pooling, 'pooling_mode_mean_tokens', False):
+        raise ValueError(f"{model_name} does not use mean pooling, which is all OnnxSentenceEncoder implements")
+
+    sample = tokenizer(["export sample"], padding=True, truncation=True, return_tensors='pt')
+    input_names = [name for name in ('input_ids', 'attention_mask', 'token_type_ids') if name in sample]
+
+    class _HiddenStates(torch.nn.Module):
+        def __init__(self, wrapped):
+            super().__init__()
+            self.wrapped = wrapped
+
+        def forward(self, *inputs):
+            return self.wrapped(**dict(zip(input_names, inputs))).last_hidden_state
+
+    dynamic_axes = {name: {0: 'batch', 1: 'sequence'} for name in input_names}
+    dynamic_axes['last_hidden_state'] = {0: 'batch', 1: 'sequence'}
+    model_path = os.path.join(output_dir, ONNX_MODEL_FILE)
+    with torch.no_grad():
+        torch.onnx.export(
+            _HiddenStates(auto_model), tuple(sample[name] for name in input_names), model_path,
+            input_names=input_names, output_names=['last_hidden_state'],
+            dynamic_axes=dynamic_axes, opset_version=opset, do_constant_folding=True,
+        )
+    tokenizer.save_pretrained(output_dir)
+
+    config = {
+        "model_name": model_name,
+        "dimension": model.get_sentence_embedding_dimension(),
+        "max_seq_length": model.max_seq_length,
+        "normalize": any(type(module).__name__ == 'Normalize' for module in model),
+        "pad_token": tokenizer.pad_token,
+        "pad_token_id": tokenizer.pad_token_id,
+    }
+    with open(os.path.join(output_dir, ENCODER_CONFIG_FILE), 'w') as f:
+        json.dump(config, f, indent=2)
+    logger.info(f"Exported {model_name} to {model_path}")
+
+    if quantize:
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+        quantize_dynamic(model_path, os.path.join(output_dir, ONNX_INT8_MODEL_FILE), weight_type=QuantType.QInt8)
+        logger.info(f"Wrote dynamically int8-quantized model to {output_dir}")
+    return output_dir
+
+
+class OnnxSentenceEncoder:
+    """Drop-in for SentenceTransformer.encode() backed by onnxruntime on the CPU"""
+
+    def __init__(self, model_dir: str, quantized: bool = False, num_threads: Optional[int] = None):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        with open(os.path.join(model_dir, ENCODER_CONFIG_FILE)) as f:
+            self.config = json.load(f)
+        self.model_path = os.path.join(model_dir, ONNX_INT8_MODEL_FILE if quantized else ONNX_MODEL_FILE)
+        self.quantized = quantized
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, 'tokenizer.json'))
+        self.tokenizer.enable_truncation(max_length=self.config["max_seq_length"])
+        self.tokenizer.enable_padding(pad_id=self.config["pad_token_id"], pad_token=self.config["pad_token"])
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        self.session = ort.InferenceSession(self.model_path, options, providers=['CPUExecutionProvider'])
+        self._input_names = {i.name for i in self.session.get_inputs()}
+
+    @property
+    def nbytes(self) -> int:
+        return os.path.getsize(self.model_path)
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.config["dimension"]
+
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        # SentenceTransformer strips surrounding whitespace before tokenizing
+        encodings = self.tokenizer.encode_batch([str(t).strip() for t in texts])
+        attention_mask = np.array([e.attention_mask for e in encodings], dtype='int64')
+        feed = {
+            "input_ids": np.array([e.ids for e in encodings], dtype='int64'),
+            "attention_mask": attention_mask,
+            "token_type_ids": np.array([e.type_ids for e in encodings], dtype='int64'),
+        }
+        hidden = self.session.run(None, {k: v for k, v in feed.items() if k in self._input_names})[0]
+
+        mask = attention_mask[..., None].astype('float32')
+        embeddings = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        if self.config["normalize"]:
+            embeddings /= np.clip(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12, None)
+        return embeddings.astype('float32')
+
+    def encode(self, sentences: Union[str, List[str]], batch_size: int = 32,
+               show_progress_bar: bool = False, **kwargs) -> np.ndarray:
+        """Encode like SentenceTransformer.encode (numpy output, input order preserved)"""
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        if not texts:
+            return np.zeros((0, self.config["dimension"]), dtype='float32')
+
+        # Batch similar lengths together to minimise padding, as SentenceTransformer does
+        order = np.argsort([-len(t) for t in texts], kind='stable')
+        embeddings = np.empty((len(texts), self.config["dimension"]), dtype='float32')
+        for start in range(0, len(texts), batch_size):
+            batch_rows = order[start:start + batch_size]
+            embeddings[batch_rows] = self._encode_batch([texts[i] for i in batch_rows])
+        return embeddings[0] if single else embeddings
+
+
+def check_parity(encoder, reference_model, texts: Optional[List[str]] = None) -> Dict[str, float]:
+    """
+    Compare an encoder against the torch SentenceTransformer the index was built with.
+
+    Returns:
+        dict: max_abs_diff, min_cosine and whether they are within tolerance
+    """
+    texts = texts or PARITY_SAMPLE_TEXTS
+    expected = np.asarray(reference_model.encode(texts, show_progress_bar=False), dtype='float32')
+    actual = np.asarray(encoder.encode(texts), dtype='float32')
+    cosine = (expected * actual).sum(axis=1) / (
+        np.linalg.norm(expected, axis=1) * np.linalg.norm(actual, axis=1)
+    )
+    result = {
+        "max_abs_diff": float(np.abs(expected - actual).max()),
+        "min_cosine": float(cosine.min()),
+    }
+    quantized = getattr(encoder, 'quantized', False)
+    result["ok"] = (result["min_cosine"] >= INT8_MIN_COSINE if quantized
+                    else result["max_abs_diff"] <= FP32_MAX_ABS_DIFF)
+    return result
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--model-name', default='all-MiniLM-L6-v2')
+    parser.add_argument('--output-dir', default=None, help="Defaults to Vector_Store/onnx/<model name>")
+    parser.add_argument('--quantize', action='store_true', help="Also write a dynamic int8 model")
+    args = parser.parse_args()
+
+    model_dir = export_onnx_model(args.model_name, args.output_dir, quantize=args.quantize)
+
+    from sentence_transformers import SentenceTransformer
+    reference = SentenceTransformer(args.model_name, device='cpu')
+    all_ok = True
+    for quantized in ([False, True] if args.quantize else [False]):
+        parity = check_parity(OnnxSentenceEncoder(model_dir, quantized=quantized), reference)
+        label = 'onnx-int8' if quantized else 'onnx'
+        print(f"{label}: max |diff| {parity['max_abs_diff']:.2e}, min cosine {parity['min_cosine']:.5f} "
+              f"-> {'OK' if parity['ok'] else 'OUT OF TOLERANCE'}")
+        all_ok &= parity['ok']
+    sys.exit(0 if all_ok else 1)
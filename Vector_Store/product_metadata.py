@@ -0,0 +1,182 @@
+"""
+Product Metadata Columns
+Price, stock status, category and skin type of every product, kept as compact
+NumPy columns in context-row order and saved next to the FAISS index. The
+retrieval engine turns a filter dict into a boolean row mask over these
+columns and uses it to restrict the vector search, so a shopper asking for
+"a moisturizer for dry skin under $30 that is in stock" only gets products
+that qualify.
+
+Filters are plain dicts:
+    {"max_price": 30.0, "min_price": 10.0, "in_stock": True,
+     "category": "Skincare", "skin_types": ["dry", "sensitive"]}
+"""
+import os
+import re
+from typing import Any, Dict, Iterable, Optional, Sequence
+
+import numpy as np
+
+METADATA_FILE = "product_metadata.npz"
+
+# One bit per skin type; products marked "All Skin Types" match every skin type filter
+SKIN_TYPE_BITS = {"dry": 1, "oily": 2, "combination": 4, "sensitive": 8, "normal": 16}
+ALL_SKIN_TYPES = sum(SKIN_TYPE_BITS.values())
+
+_NUMBER = r"\$?\s*(\d+(?:\.\d+)?)"
+_MAX_PRICE_RE = re.compile(r"\b(?:under|below|less than|cheaper than|no more than|max(?:imum)?)\s*(?:usd\s*)?" + _NUMBER)
+_MIN_PRICE_RE = re.compile(r"\b(?:over|above|more than|at least|min(?:imum)?)\s*(?:usd\s*)?" + _NUMBER)
+_PRICE_RANGE_RE = re.compile(r"(?:\bbetween\s*" + _NUMBER + r"|\$\s*(\d+(?:\.\d+)?))\s*(?:and|to|-)\s*" + _NUMBER)
+_IN_STOCK_RE = re.compile(r"\bin[\s-]stock\b")
+_SKIN_TYPE_RE = re.compile(r"\b(" + "|".join(SKIN_TYPE_BITS) + r")\s+skin\b")
+
+
+def skin_type_bits(skin_type_values: Sequence[str]) -> np.ndarray:
+    """Bitmask per product from the combined 'Dry Skin; Oily' style skin type strings"""
+    unique_values, inverse = np.unique(np.asarray(skin_type_values, dtype=str), return_inverse=True)
+    unique_bits = np.zeros(len(unique_values), dtype='uint8')
+    for i, value in enumerate(unique_values):
+        value = value.lower()
+        if "all skin" in value:
+            unique_bits[i] = ALL_SKIN_TYPES
+            continue
+        for name, bit in SKIN_TYPE_BITS.items():
+            if name in value:
+                unique_bits[i] |= bit
+    return unique_bits[inverse.reshape(-1)]
+
+
+class ProductMetadata:
+    """Filterable product columns, one entry per context row"""
+
+    def __init__(self, price: np.ndarray, in_stock: np.ndarray, category_codes: np.ndarray,
+                 categories: np.ndarray, skin_types: np.ndarray):
+        self.price = price
+        self.in_stock = in_stock
+        self.category_codes = category_codes
+        self.categories = categories
+        self.skin_types = skin_types
+        self._category_lookup = {str(c).lower(): code for code, c in enumerate(categories)}
+
+    @classmethod
+    def from_columns(cls, price, out_of_stock, category, skin_types) -> 'ProductMetadata':
+        """Build from raw catalog columns (out_of_stock == 0 means in stock, like the contexts)"""
+        categories, category_codes = np.unique(np.asarray(category, dtype=str), return_inverse=True)
+        return cls(
+            price=np.asarray(price, dtype='float32'),
+            in_stock=np.asarray(out_of_stock) == 0,
+            category_codes=category_codes.reshape(-1).astype('uint16'),
+            categories=categories,
+            skin_types=skin_type_bits(skin_types),
+        )
+
+    @classmethod
+    def concatenate(cls, parts: Iterable['ProductMetadata']) -> 'ProductMetadata':
+        """Join metadata built chunk by chunk, merging the category vocabularies"""
+        parts = list(parts)
+        categories = np.unique(np.concatenate([p.categories for p in parts]))
+        remapped = [np.searchsorted(categories, p.categories)[p.category_codes] for p in parts]
+        return cls(
+            price=np.concatenate([p.price for p in parts]),
+            in_stock=np.concatenate([p.in_stock for p in parts]),
+            category_codes=np.concatenate(remapped).astype('uint16'),
+            categories=categories,
+            skin_types=np.concatenate([p.skin_types for p in parts]),
+        )
+
+    def __len__(self):
+        return len(self.price)
+
+    @property
+    def nbytes(self) -> int:
+        return (self.price.nbytes + self.in_stock.nbytes + self.category_codes.nbytes
+                + self.categories.nbytes + self.skin_types.nbytes)
+
+    def matching_rows(self, filters: Dict[str, Any]) -> np.ndarray:
+        """Boolean mask of the rows that satisfy every filter"""
+        mask = np.ones(len(self), dtype=bool)
+        if filters.get("max_price") is not None:
+            mask &= self.price <= float(filters["max_price"])
+        if filters.get("min_price") is not None:
+            mask &= self.price >= float(filters["min_price"])
+        if filters.get("in_stock"):
+            mask &= self.in_stock
+        if filters.get("category"):
+            code = self._category_lookup.get(str(filters["category"]).lower())
+            if code is None:
+                return np.zeros(len(self), dtype=bool)
+            mask &= self.category_codes == code
+        if filters.get("skin_types"):
+            wanted = 0
+            for skin_type in filters["skin_types"]:
+                wanted |= SKIN_TYPE_BITS.get(str(skin_type).lower(), 0)
+            mask &= (self.skin_types & wanted) != 0
+        return mask
+
+    def save(self, path: str):
+        tmp_path = f"{path}.tmp.npz"
+        np.savez(tmp_path, price=self.price, in_stock=self.in_stock, category_codes=self.category_codes,
+                 categories=self.categories, skin_types=self.skin_types)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> 'ProductMetadata':
+        with np.load(path) as data:
+            return cls(data['price'], data['in_stock'], data['category_codes'],
+                       data['categories'], data['skin_types'])
+
+
+def extract_filters(query: str, categories: Sequence[str] = ()) -> Dict[str, Any]:
+    """
+    Pull price, stock, category and skin type constraints out of a shopper's message.
+
+    Args:
+        query: The user message
+        categories: Known category names; one mentioned as a word becomes a filter
+
+    Returns:
+        dict: Filters for ProductMetadata.matching_rows (empty if none found)
+    """
+    text = query.lower()
+    filters: Dict[str, Any] = {}
+
+    price_range = _PRICE_RANGE_RE.search(text)
+    if price_range:
+        low = float(price_range.group(1) or price_range.group(2))
+        high = float(price_range.group(3))
+        filters["min_price"], filters["max_price"] = min(low, high), max(low, high)
+    else:
+        max_price = _MAX_PRICE_RE.search(text)
+        if max_price:
+            filters["max_price"] = float(max_price.group(1))
+        min_price = _MIN_PRICE_RE.search(text)
+        if min_price:
+            filters["min_price"] = float(min_price.group(1))
+
+    if _IN_STOCK_RE.search(text):
+        filters["in_stock"] = True
+
+    words = set(re.findall(r"[a-z]+", text))
+    for category in categories:
+        name = str(category).lower()
+        if not name:
+            continue
+        if name.isalpha():
+            mentioned = name in words or f"{name}s" in words
+        else:
+            mentioned = re.search(rf"\b{re.escape(name)}\b", text) is not None
+        if mentioned:
+            filters["category"] = str(category)
+            break
+
+    skin_types = sorted(set(_SKIN_TYPE_RE.findall(text)))
+    if skin_types:
+        filters["skin_types"] = skin_types
+    return filters
+
+
+def filters_key(filters: Optional[Dict[str, Any]]) -> tuple:
+    """Hashable form of a filter dict, for cache keys"""
+    if not filters:
+        return ()
+    return tuple(sorted((k, tuple(v) if isinstance(v, list) else v) for k, v in filters.items()))
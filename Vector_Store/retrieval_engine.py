@@ -0,0 +1,720 @@
+"""
+Retrieval Engine Module
+Owns the RAG components (query encoder, FAISS index and product contexts) so
+they are loaded once per process and shared by the Flask app, AIService and
+the Telegram bot.
+
+The query encoder is the torch SentenceTransformer by default; set
+RAG_ENCODER_BACKEND=onnx or onnx-int8 to use the exported ONNX model from
+Vector_Store/onnx_encoder.py instead (torch is then never imported).
+
+Everything read from the cache lives in one RetrievalArtifacts snapshot. When
+embedFunc publishes a new version (see Vector_Store/artifact_store.py) the
+engine loads it next to the current one and swaps the reference, so searches
+already running finish on the old version and no restart is needed.
+"""
+import os
+import time
+import pickle
+import logging
+import threading
+from typing import Optional, Dict, Any, List
+
+import numpy as np
+import faiss
+
+from Vector_Store.index_factory import (
+    load_index_params, apply_search_params, load_rerank_vectors, rerank_candidates,
+)
+from Vector_Store.embedding_batcher import EmbeddingBatcher
+from Vector_Store.onnx_encoder import ENCODER_BACKENDS, OnnxSentenceEncoder, default_onnx_model_dir
+from Vector_Store.query_cache import LRUCache, normalize_query
+from Vector_Store.context_store import CONTEXT_STORE_FILE, ContextStore
+from Vector_Store.lexical_index import BM25_INDEX_FILE, BM25Index, reciprocal_rank_fusion
+from Vector_Store.product_metadata import METADATA_FILE, ProductMetadata, extract_filters, filters_key
+from Vector_Store.artifact_store import (
+    DEFAULT_ARTIFACT_DIR, manifest_mtime, resolve_artifact_dir, verify_manifest,
+)
+
+logger = logging.getLogger(__name__)
+
+MODEL_NAME = 'all-MiniLM-L6-v2'
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Cache locations in order of priority: the versioned artifact store written by
+# embedFunc, then flat caches left by older entry points
+DEFAULT_CACHE_DIRS = [
+    DEFAULT_ARTIFACT_DIR,
+    os.path.join(PROJECT_ROOT, 'cache'),
+    os.path.join(PROJECT_ROOT, 'chatbot', 'cache'),
+]
+
+FAISS_INDEX_FILE = "faiss_index.idx"
+# Stable FAISS id of every context, written by embedFunc for ID-mapped indexes
+PRODUCT_IDS_FILE = "product_ids.npy"
+# Pickled list of contexts written by older versions of embedFunc
+LEGACY_CONTEXTS_FILE = "product_contexts.pkl"
+
+
+def _current_rss_bytes() -> Optional[int]:
+    """Return the resident set size of this process, or None if unknown"""
+    try:
+        import psutil
+        return psutil.Process(os.getpid()).memory_info().rss
+    except ImportError:
+        pass
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+class RetrievalArtifacts:
+    """
+    One loaded cache version: the FAISS index, contexts and every structure
+    derived from them. Searches read a single snapshot from start to finish;
+    reloading builds a new one instead of mutating this.
+    """
+
+    def __init__(self, directory: str, index, contexts, contexts_bytes: int,
+                 manifest: Optional[Dict[str, Any]] = None):
+        self.directory = directory
+        self.faiss_index = index
+        self.product_contexts = contexts
+        self.manifest = manifest
+        faiss_index_path = os.path.join(directory, FAISS_INDEX_FILE)
+        if manifest is not None:
+            self.index_version = f"v{manifest['version']}:{index.ntotal}"
+        else:
+            self.index_version = f"{os.stat(faiss_index_path).st_mtime_ns}:{index.ntotal}"
+        self.index_params = load_index_params(directory)
+        self._sorted_ids = None
+        self._rows_by_sorted_id = None
+        self._load_product_ids(index.ntotal)
+        self.stats = {
+            "index_bytes": os.path.getsize(faiss_index_path),
+            "contexts_bytes": contexts_bytes,
+            "bm25_bytes": None,
+            "metadata_bytes": None,
+        }
+        self.lexical_index = self._load_lexical_index(index.ntotal)
+        self.product_metadata = self._load_metadata(index.ntotal)
+        # Memory-mapped float32 vectors for re-ranking quantized indexes (None when not built)
+        self.rerank_vectors = load_rerank_vectors(directory, self.index_params, index.ntotal)
+        # Inner index and context row of every position in it, for ID-selector filtered search
+        self._search_index = None
+        self._position_rows = None
+        self._prepare_filtered_search(index)
+        self.filter_cache = LRUCache(max_size=64, ttl_seconds=None)
+
+    @classmethod
+    def load(cls, directory: str, manifest: Optional[Dict[str, Any]] = None) -> Optional['RetrievalArtifacts']:
+        """
+        Load the cache files in directory.
+
+        Returns:
+            RetrievalArtifacts, or None if the directory holds no complete cache
+        """
+        faiss_index_path = os.path.join(directory, FAISS_INDEX_FILE)
+        contexts_path = os.path.join(directory, CONTEXT_STORE_FILE)
+        legacy_contexts_path = os.path.join(directory, LEGACY_CONTEXTS_FILE)
+        if not os.path.exists(faiss_index_path):
+            return None
+        if not (os.path.exists(contexts_path) or os.path.exists(legacy_contexts_path)):
+            return None
+
+        index = faiss.read_index(faiss_index_path)
+        if os.path.exists(contexts_path):
+            contexts = ContextStore(contexts_path)
+            contexts_bytes = contexts.blob_bytes
+        else:
+            logger.warning(f"Loading legacy pickled contexts from {legacy_contexts_path}. "
+                           "Re-run embedFunc.py to switch to the memory-mapped store.")
+            with open(legacy_contexts_path, 'rb') as f:
+                contexts = pickle.load(f)
+            contexts_bytes = sum(len(c.encode('utf-8')) for c in contexts)
+
+        if index.ntotal != len(contexts):
+            logger.error(f"Mismatch between FAISS index size ({index.ntotal}) "
+                         f"and number of contexts ({len(contexts)}) in {directory}")
+            if isinstance(contexts, ContextStore):
+                contexts.close()
+            return None
+        return cls(directory, index, contexts, contexts_bytes, manifest)
+
+    def _load_lexical_index(self, expected: int) -> Optional[BM25Index]:
+        """Load the BM25 index saved next to the FAISS index; hybrid search is skipped without it"""
+        bm25_path = os.path.join(self.directory, BM25_INDEX_FILE)
+        if not os.path.exists(bm25_path):
+            logger.info("No BM25 index in the cache - using dense retrieval only. "
+                        "Re-run embedFunc.py to enable hybrid search.")
+            return None
+        try:
+            lexical_index = BM25Index.load(bm25_path)
+        except Exception as e:
+            logger.warning(f"Could not load BM25 index from {bm25_path}: {e}")
+            return None
+        if len(lexical_index) != expected:
+            logger.warning(f"BM25 index covers {len(lexical_index)} products, expected {expected}. Ignoring it.")
+            return None
+        self.stats["bm25_bytes"] = lexical_index.nbytes
+        return lexical_index
+
+    def _load_metadata(self, expected: int) -> Optional[ProductMetadata]:
+        """Load the filterable product columns; filters are ignored without them"""
+        metadata_path = os.path.join(self.directory, METADATA_FILE)
+        if not os.path.exists(metadata_path):
+            logger.info("No product metadata in the cache - search filters are disabled. "
+                        "Re-run embedFunc.py to enable them.")
+            return None
+        try:
+            metadata = ProductMetadata.load(metadata_path)
+        except Exception as e:
+            logger.warning(f"Could not load product metadata from {metadata_path}: {e}")
+            return None
+        if len(metadata) != expected:
+            logger.warning(f"Product metadata covers {len(metadata)} products, expected {expected}. Ignoring it.")
+            return None
+        self.stats["metadata_bytes"] = metadata.nbytes
+        return metadata
+
+    def _prepare_filtered_search(self, index):
+        """Map every position of the (inner) index to its context row"""
+        if isinstance(index, faiss.IndexIDMap):
+            self._search_index = faiss.downcast_index(index.index)
+            self._position_rows = self.ids_to_rows(faiss.vector_to_array(index.id_map))
+        else:
+            self._search_index = index
+            self._position_rows = np.arange(index.ntotal)
+
+    def _load_product_ids(self, expected: int):
+        """Build the FAISS id -> context row lookup for indexes with stable product ids"""
+        ids_path = os.path.join(self.directory, PRODUCT_IDS_FILE)
+        if not os.path.exists(ids_path):
+            return
+        product_ids = np.load(ids_path)
+        if len(product_ids) != expected:
+            raise ValueError(f"{ids_path} has {len(product_ids)} ids, expected {expected}")
+        self._rows_by_sorted_id = np.argsort(product_ids, kind='stable')
+        self._sorted_ids = product_ids[self._rows_by_sorted_id]
+
+    def ids_to_rows(self, ids: np.ndarray) -> np.ndarray:
+        """Map ids returned by FAISS to context rows; unknown ids become -1"""
+        if self._sorted_ids is None:
+            return ids
+        positions = np.searchsorted(self._sorted_ids, ids).clip(0, len(self._sorted_ids) - 1)
+        found = (self._sorted_ids[positions] == ids) & (ids >= 0)
+        return np.where(found, self._rows_by_sorted_id[positions], -1)
+
+    def filter_masks(self, filters: Dict[str, Any]):
+        """(row mask, position bitmap, matching count) for a filter dict, cached per snapshot"""
+        key = filters_key(filters)
+        masks = self.filter_cache.get(key)
+        if masks is None:
+            row_mask = self.product_metadata.matching_rows(filters)
+            position_mask = np.zeros(len(self._position_rows), dtype=bool)
+            valid = self._position_rows >= 0
+            position_mask[valid] = row_mask[self._position_rows[valid]]
+            bitmap = np.packbits(position_mask, bitorder='little')
+            masks = (row_mask, bitmap, int(row_mask.sum()))
+            self.filter_cache.put(key, masks)
+        return masks
+
+    def _selector_params(self, bitmap: np.ndarray):
+        """Search parameters restricting the inner index to the set bits, with the usual knobs"""
+        selector = faiss.IDSelectorBitmap(len(self._position_rows), faiss.swig_ptr(bitmap))
+        if isinstance(self._search_index, faiss.IndexIVF):
+            params = faiss.SearchParametersIVF(sel=selector, nprobe=int(self.index_params.get("nprobe", 1)))
+        elif isinstance(self._search_index, faiss.IndexHNSW):
+            params = faiss.SearchParametersHNSW(sel=selector, efSearch=int(self.index_params.get("ef_search", 16)))
+        else:
+            params = faiss.SearchParameters(sel=selector)
+        return params, selector
+
+    def filtered_dense_rows(self, query_embedding: np.ndarray, k: int, filters: Dict[str, Any],
+                            overfetch: int) -> np.ndarray:
+        """
+        Nearest rows among those matching the filters. The index is searched
+        with an ID-selector bitmap so only matching products are scored; if that
+        yields too few hits (approximate indexes with very selective filters)
+        or is unsupported, an over-fetched unfiltered search is post-filtered.
+        """
+        row_mask, bitmap, matching = self.filter_masks(filters)
+        k = min(k, matching)
+        if k == 0:
+            return np.zeros(0, dtype='int64')
+
+        try:
+            params, _selector = self._selector_params(bitmap)
+            _, positions = self._search_index.search(query_embedding, k, params=params)
+            positions = positions[0][positions[0] >= 0]
+            rows = self._position_rows[positions]
+            if len(rows) >= k:
+                return rows
+        except (RuntimeError, TypeError, AttributeError) as e:
+            logger.debug(f"Selector search unavailable, over-fetching instead: {e}")
+
+        fraction = matching / max(len(row_mask), 1)
+        fetch = min(self.faiss_index.ntotal, int(k * overfetch / fraction) + 1)
+        params = None
+        if isinstance(self._search_index, faiss.IndexIVF):
+            # Over-fetching from the same few lists would not find more matches
+            nprobe = int(self.index_params.get("nprobe", 1)) * overfetch
+            params = faiss.SearchParametersIVF(nprobe=min(nprobe, self._search_index.nlist))
+        _, indices = self.faiss_index.search(query_embedding, fetch, params=params)
+        rows = self.ids_to_rows(indices[0])
+        rows = rows[rows >= 0]
+        return rows[row_mask[rows]][:k]
+
+
+class RetrievalEngine:
+    """Sentence model, FAISS index and product contexts behind one search API"""
+
+    def __init__(self, cache_dirs: Optional[List[str]] = None, model_name: str = MODEL_NAME):
+        self.cache_dirs = cache_dirs or DEFAULT_CACHE_DIRS
+        self.model_name = model_name
+        self.encoder_backend = os.environ.get('RAG_ENCODER_BACKEND', 'torch').lower()
+        if self.encoder_backend not in ENCODER_BACKENDS:
+            logger.warning(f"Unknown RAG_ENCODER_BACKEND '{self.encoder_backend}', using torch")
+            self.encoder_backend = 'torch'
+        self.sentence_model = None
+        self.query_batcher = None
+        # Current cache snapshot; replaced as a whole by reload_if_changed()
+        self._artifacts = None
+        # nprobe / ef_search set at runtime, re-applied to every reloaded version
+        self._search_overrides = {
+            "nprobe": os.environ.get('RAG_NPROBE'),
+            "ef_search": os.environ.get('RAG_EF_SEARCH'),
+        }
+        self.verify_checksums = os.environ.get('RAG_VERIFY_CHECKSUMS', 'true').lower() in ('1', 'true', 'yes')
+        self.reload_interval = float(os.environ.get('RAG_RELOAD_INTERVAL_SECONDS', 30))
+        self._manifest_mtime = None
+        self._watcher = None
+        self._stop_watching = threading.Event()
+        self.filter_overfetch = int(os.environ.get('RAG_FILTER_OVERFETCH', 4))
+        self.rerank_factor = int(os.environ.get('RAG_RERANK_FACTOR', 4))
+        # Hybrid retrieval: dense and BM25 candidates merged with reciprocal rank fusion
+        self.hybrid_enabled = os.environ.get('RAG_HYBRID', 'true').lower() in ('1', 'true', 'yes')
+        self.hybrid_candidates = int(os.environ.get('RAG_HYBRID_CANDIDATES', 20))
+        self.rrf_k = int(os.environ.get('RAG_RRF_K', 60))
+        self.bm25_max_postings = int(os.environ.get('RAG_BM25_MAX_POSTINGS', 200000))
+        cache_size = int(os.environ.get('RAG_CACHE_SIZE', 1024))
+        cache_ttl = float(os.environ.get('RAG_CACHE_TTL_SECONDS', 3600))
+        self.embedding_cache = LRUCache(max_size=cache_size, ttl_seconds=cache_ttl)
+        self.result_cache = LRUCache(max_size=cache_size, ttl_seconds=cache_ttl)
+        self._lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+        self._loaded = False
+        # Set once the first load attempt has finished, successful or not
+        self._load_done = threading.Event()
+        self._warmup_thread = None
+        self.stats = {
+            "model_load_seconds": None,
+            "index_load_seconds": None,
+            "total_load_seconds": None,
+            "rss_before_bytes": None,
+            "rss_after_bytes": None,
+            "model_bytes": None,
+            "load_error": None,
+            "reloads": 0,
+            "last_reload_at": None,
+            "last_reload_error": None,
+        }
+
+    # Read-only views of the current snapshot
+    @property
+    def faiss_index(self):
+        return self._artifacts.faiss_index if self._artifacts else None
+
+    @property
+    def product_contexts(self):
+        return self._artifacts.product_contexts if self._artifacts else []
+
+    @property
+    def cache_dir(self) -> Optional[str]:
+        return self._artifacts.directory if self._artifacts else None
+
+    @property
+    def index_params(self) -> Dict[str, Any]:
+        return self._artifacts.index_params if self._artifacts else {}
+
+    @property
+    def index_version(self) -> Optional[str]:
+        return self._artifacts.index_version if self._artifacts else None
+
+    @property
+    def lexical_index(self) -> Optional[BM25Index]:
+        return self._artifacts.lexical_index if self._artifacts else None
+
+    @property
+    def product_metadata(self) -> Optional[ProductMetadata]:
+        return self._artifacts.product_metadata if self._artifacts else None
+
+    @property
+    def rerank_vectors(self):
+        return self._artifacts.rerank_vectors if self._artifacts else None
+
+    @property
+    def is_ready(self) -> bool:
+        """True when the model, index and contexts are all available"""
+        return (self.sentence_model is not None
+                and self.faiss_index is not None
+                and len(self.product_contexts) > 0)
+
+    def load(self, generate_if_missing: bool = False) -> bool:
+        """
+        Load the model, index and contexts. Safe to call from several entry
+        points; only the first call does any work.
+
+        Args:
+            generate_if_missing: Run embedFunc to build the cache if none is found
+
+        Returns:
+            bool: True if the engine is ready to serve searches
+        """
+        with self._lock:
+            if self._loaded and (self.is_ready or not generate_if_missing):
+                return self.is_ready
+
+            start = time.perf_counter()
+            if self.stats["rss_before_bytes"] is None:
+                self.stats["rss_before_bytes"] = _current_rss_bytes()
+
+            try:
+                if self.sentence_model is None:
+                    self._load_model()
+                if self._artifacts is None:
+                    if not self._load_cache() and generate_if_missing:
+                        self._generate_cache()
+                        self._load_cache()
+                self.stats["load_error"] = None
+            except Exception as e:
+                self.stats["load_error"] = str(e)
+                logger.error(f"Retrieval engine load failed: {e}", exc_info=True)
+
+            elapsed = time.perf_counter() - start
+            self.stats["total_load_seconds"] = round((self.stats["total_load_seconds"] or 0) + elapsed, 3)
+            self.stats["rss_after_bytes"] = _current_rss_bytes()
+            self._loaded = True
+            self._load_done.set()
+            self.start_watching()
+            logger.info(f"Retrieval engine load finished: {self.get_stats()}")
+            return self.is_ready
+
+    def start_background_load(self, generate_if_missing: bool = False) -> threading.Thread:
+        """
+        Run load() in a daemon thread so the caller (e.g. the web server) can
+        start serving immediately. Searches return no context until it is done;
+        use wait_until_ready() to block for it.
+        """
+        with self._lock:
+            if self._warmup_thread is None or (not self._warmup_thread.is_alive() and not self.is_ready):
+                self._warmup_thread = threading.Thread(
+                    target=self.load, kwargs={"generate_if_missing": generate_if_missing},
+                    name="rag-warmup", daemon=True,
+                )
+                self._warmup_thread.start()
+            return self._warmup_thread
+
+    def wait_until_ready(self, timeout: Optional[float] = None) -> bool:
+        """Block until the first load attempt finishes (or timeout seconds pass)"""
+        if not self.is_ready and (self._warmup_thread is not None or self._loaded):
+            self._load_done.wait(timeout)
+        return self.is_ready
+
+    @property
+    def load_state(self) -> str:
+        """'ready', 'loading', 'failed' (loaded but unusable) or 'cold' (not started)"""
+        if self.is_ready:
+            return 'ready'
+        if self._warmup_thread is not None and self._warmup_thread.is_alive():
+            return 'loading'
+        return 'failed' if self._loaded else 'cold'
+
+    def _load_onnx_model(self):
+        """Load the exported ONNX encoder; falls back to torch if it is unavailable"""
+        model_dir = os.environ.get('RAG_ONNX_MODEL_DIR') or default_onnx_model_dir(self.model_name)
+        threads = os.environ.get('RAG_ONNX_THREADS')
+        try:
+            logger.info(f"Loading {self.encoder_backend} query encoder from {model_dir}...")
+            self.sentence_model = OnnxSentenceEncoder(
+                model_dir, quantized=self.encoder_backend == 'onnx-int8',
+                num_threads=int(threads) if threads else None,
+            )
+            self.stats["model_bytes"] = self.sentence_model.nbytes
+        except Exception as e:
+            logger.warning(f"Could not load the {self.encoder_backend} encoder ({e}). "
+                           "Run Vector_Store/onnx_encoder.py to export it. Falling back to torch.")
+            self.encoder_backend = 'torch'
+            self.sentence_model = None
+
+    def _load_model(self):
+        start = time.perf_counter()
+        try:
+            if self.encoder_backend != 'torch':
+                self._load_onnx_model()
+            if self.sentence_model is None:
+                from sentence_transformers import SentenceTransformer
+                logger.info(f"Loading sentence transformer model '{self.model_name}'...")
+                self.sentence_model = SentenceTransformer(self.model_name)
+                self.stats["model_bytes"] = sum(
+                    p.numel() * p.element_size() for p in self.sentence_model.parameters()
+                )
+            # Concurrent queries share one forward pass instead of competing for cores
+            self.query_batcher = EmbeddingBatcher(
+                self.encode,
+                max_batch_size=int(os.environ.get('RAG_QUERY_BATCH_SIZE', 32)),
+                max_wait_ms=float(os.environ.get('RAG_QUERY_BATCH_WAIT_MS', 2)),
+            )
+        except Exception as e:
+            logger.error(f"Failed to load the query encoder: {e}", exc_info=True)
+            self.sentence_model = None
+        self.stats["model_load_seconds"] = round(time.perf_counter() - start, 3)
+
+    def _read_artifacts(self, cache_dir: str) -> Optional[RetrievalArtifacts]:
+        """Load the live version of one cache dir, checking it against its manifest"""
+        directory, manifest = resolve_artifact_dir(cache_dir)
+        if manifest is not None:
+            verify_manifest(cache_dir, manifest, checksums=self.verify_checksums)
+            if manifest.get("model_name") and manifest["model_name"] != self.model_name:
+                logger.warning(f"Artifacts in {cache_dir} were embedded with '{manifest['model_name']}' "
+                               f"but queries are encoded with '{self.model_name}'")
+        artifacts = RetrievalArtifacts.load(directory, manifest)
+        if artifacts is not None:
+            apply_search_params(artifacts.faiss_index, self._apply_overrides(artifacts.index_params))
+        return artifacts
+
+    def _apply_overrides(self, index_params: Dict[str, Any]) -> Dict[str, Any]:
+        if self._search_overrides["nprobe"]:
+            index_params["nprobe"] = int(self._search_overrides["nprobe"])
+        if self._search_overrides["ef_search"]:
+            index_params["ef_search"] = int(self._search_overrides["ef_search"])
+        return index_params
+
+    def _load_cache(self) -> bool:
+        """Load the FAISS index and product contexts from the first valid cache dir"""
+        start = time.perf_counter()
+        for cache_dir in self.cache_dirs:
+            try:
+                mtime = manifest_mtime(cache_dir)
+                artifacts = self._read_artifacts(cache_dir)
+                if artifacts is None:
+                    continue
+            except Exception as e:
+                logger.warning(f"Error loading RAG cache from {cache_dir}: {e}")
+                continue
+
+            self._artifacts = artifacts
+            self._manifest_mtime = mtime
+            self.stats["index_load_seconds"] = round(time.perf_counter() - start, 3)
+            logger.info(f"Loaded FAISS index ({artifacts.faiss_index.ntotal} vectors) "
+                        f"and contexts from {artifacts.directory}")
+            return True
+
+        logger.warning("Could not load RAG cache from any known location: "
+                       f"{', '.join(self.cache_dirs)}")
+        return False
+
+    def reload_if_changed(self) -> bool:
+        """
+        Swap in a newly published artifact version, if there is one. The new
+        version is fully loaded and verified before the single reference swap;
+        searches already running keep the snapshot they started with, and a
+        version that fails to load leaves the current one serving.
+
+        Returns:
+            bool: True if a new version was swapped in
+        """
+        with self._reload_lock:
+            root = self.cache_dirs[0]
+            mtime = manifest_mtime(root)
+            if mtime is None or mtime == self._manifest_mtime:
+                return False
+            current = self._artifacts
+            try:
+                artifacts = self._read_artifacts(root)
+            except Exception as e:
+                self.stats["last_reload_error"] = str(e)
+                logger.error(f"Not reloading RAG artifacts from {root}: {e}")
+                # Retry once the manifest changes again rather than on every poll
+                self._manifest_mtime = mtime
+                return False
+            self._manifest_mtime = mtime
+            if artifacts is None:
+                return False
+            if current is not None and artifacts.index_version == current.index_version:
+                return False
+
+            self._artifacts = artifacts
+            self.stats["reloads"] += 1
+            self.stats["last_reload_at"] = time.strftime('%Y-%m-%dT%H:%M:%S%z')
+            self.stats["last_reload_error"] = None
+            logger.info(f"Hot-reloaded RAG artifacts {current.index_version if current else None} -> "
+                        f"{artifacts.index_version} from {artifacts.directory}")
+            return True
+
+    def _watch(self):
+        while not self._stop_watching.wait(self.reload_interval):
+            try:
+                self.reload_if_changed()
+            except Exception as e:
+                logger.error(f"RAG artifact watcher error: {e}", exc_info=True)
+
+    def start_watching(self):
+        """Poll the artifact manifest every RAG_RELOAD_INTERVAL_SECONDS (0 disables)"""
+        if self.reload_interval <= 0 or (self._watcher and self._watcher.is_alive()):
+            return
+        self._stop_watching.clear()
+        self._watcher = threading.Thread(target=self._watch, name="rag-artifact-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop_watching(self):
+        self._stop_watching.set()
+
+    def _generate_cache(self):
+        """Build the cache with embedFunc when no cache exists yet"""
+        try:
+            from Vector_Store.embedFunc import generate_embeddings_and_cache
+            logger.info("No valid cache found. Calling embedFunc to generate embeddings...")
+            generate_embeddings_and_cache()
+        except Exception as e:
+            logger.error(f"Error during embedding generation: {e}", exc_info=True)
+
+    def set_search_params(self, nprobe: Optional[int] = None, ef_search: Optional[int] = None):
+        """Tune query-time recall/latency: nprobe for IVF indexes, efSearch for HNSW"""
+        if nprobe:
+            self._search_overrides["nprobe"] = int(nprobe)
+        if ef_search:
+            self._search_overrides["ef_search"] = int(ef_search)
+        artifacts = self._artifacts
+        if artifacts is None:
+            return
+        apply_search_params(artifacts.faiss_index, self._apply_overrides(artifacts.index_params))
+        # Cached results were produced with the previous knobs
+        self.result_cache.clear()
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """Encode texts into float32 embeddings"""
+        return np.asarray(
+            self.sentence_model.encode(texts, show_progress_bar=False), dtype='float32'
+        )
+
+    def encode_query(self, query: str) -> np.ndarray:
+        """Encode a single query as a (1, dim) array, batched with concurrent callers"""
+        if self.query_batcher is None:
+            return self.encode([query])
+        return self.query_batcher.encode(query).reshape(1, -1)
+
+    def embed_query(self, query: str) -> np.ndarray:
+        """(1, dim) embedding of the normalized query, shared with search() through the embedding cache"""
+        normalized = normalize_query(query)
+        query_embedding = self.embedding_cache.get(normalized)
+        if query_embedding is None:
+            query_embedding = self.encode_query(normalized)
+            self.embedding_cache.put(normalized, query_embedding)
+        return query_embedding
+
+    def extract_filters(self, query: str) -> Dict[str, Any]:
+        """Price, stock, category and skin type filters mentioned in a query"""
+        metadata = self.product_metadata
+        if metadata is None:
+            return {}
+        return extract_filters(query, metadata.categories.tolist())
+
+    def search(self, query: str, top_k: int = 3, filters: Optional[Dict[str, Any]] = None) -> List[str]:
+        """
+        Return the product contexts closest to the query.
+
+        Args:
+            query: Free-text query
+            top_k: Number of contexts to return
+            filters: Optional constraints (see Vector_Store/product_metadata.py);
+                ignored when the cache has no product metadata
+        """
+        if not self.is_ready:
+            logger.warning("Retrieval engine not ready - returning empty context")
+            return []
+        # One snapshot for the whole request, even if a reload swaps it meanwhile
+        artifacts = self._artifacts
+
+        if artifacts.product_metadata is None:
+            filters = None
+        normalized = normalize_query(query)
+        result_key = (normalized, top_k, filters_key(filters))
+        self.result_cache.ensure_version(artifacts.index_version)
+        cached_contexts = self.result_cache.get(result_key)
+        if cached_contexts is not None:
+            return list(cached_contexts)
+
+        query_embedding = self.embed_query(normalized)
+
+        use_hybrid = self.hybrid_enabled and artifacts.lexical_index is not None
+        num_candidates = max(top_k, self.hybrid_candidates) if use_hybrid else top_k
+        # Quantized distances are approximate: fetch a longer list and re-rank it exactly
+        use_rerank = artifacts.rerank_vectors is not None and self.rerank_factor > 1
+        num_fetch = num_candidates * self.rerank_factor if use_rerank else num_candidates
+        if filters:
+            rows = artifacts.filtered_dense_rows(query_embedding, num_fetch, filters, self.filter_overfetch)
+        else:
+            _, indices = artifacts.faiss_index.search(query_embedding, num_fetch)
+            rows = artifacts.ids_to_rows(indices[0])
+        if use_rerank:
+            rows = rerank_candidates(query_embedding, rows[rows >= 0], artifacts.rerank_vectors, num_candidates)
+
+        if use_hybrid:
+            lexical_rows, _ = artifacts.lexical_index.search(
+                normalized, top_k=num_candidates, max_postings=self.bm25_max_postings
+            )
+            if filters:
+                lexical_rows = lexical_rows[artifacts.filter_masks(filters)[0][lexical_rows]]
+            rows = reciprocal_rank_fusion([rows.tolist(), lexical_rows.tolist()], top_k, k=self.rrf_k)
+
+        contexts = artifacts.product_contexts
+        relevant_contexts = []
+        for idx in rows[:top_k]:
+            if 0 <= idx < len(contexts):
+                logger.debug(f"Found relevant context at index {idx}")
+                relevant_contexts.append(contexts[idx])
+
+        self.result_cache.put(result_key, tuple(relevant_contexts))
+        return relevant_contexts
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Load times and memory footprint of the engine"""
+        artifacts = self._artifacts
+        stats = dict(self.stats)
+        stats.update(artifacts.stats if artifacts else
+                     {"index_bytes": None, "contexts_bytes": None, "bm25_bytes": None, "metadata_bytes": None})
+        if stats["rss_before_bytes"] is not None and stats["rss_after_bytes"] is not None:
+            stats["rss_delta_bytes"] = stats["rss_after_bytes"] - stats["rss_before_bytes"]
+        stats["ready"] = self.is_ready
+        stats["state"] = self.load_state
+        stats["cache_dir"] = artifacts.directory if artifacts else None
+        stats["manifest_version"] = artifacts.manifest["version"] if artifacts and artifacts.manifest else None
+        stats["encoder_backend"] = self.encoder_backend
+        stats["vectors"] = artifacts.faiss_index.ntotal if artifacts else 0
+        stats["index_params"] = artifacts.index_params if artifacts else {}
+        stats["query_batcher"] = self.query_batcher.get_metrics() if self.query_batcher else None
+        stats["index_version"] = artifacts.index_version if artifacts else None
+        stats["hybrid"] = self.hybrid_enabled and artifacts is not None and artifacts.lexical_index is not None
+        stats["filters_available"] = artifacts is not None and artifacts.product_metadata is not None
+        stats["rerank"] = artifacts is not None and artifacts.rerank_vectors is not None
+        stats["embedding_cache"] = self.embedding_cache.get_stats()
+        stats["result_cache"] = self.result_cache.get_stats()
+        return stats
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_retrieval_engine() -> RetrievalEngine:
+    """Return the process-wide RetrievalEngine, creating it on first use"""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = RetrievalEngine()
+    return _engine
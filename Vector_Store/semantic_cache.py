@@ -0,0 +1,143 @@
+"""
+Semantic Response Cache
+Reuses LLM answers for questions that are paraphrases of one already
+answered. Each answer is stored under the (normalized) query embedding in a
+small exact inner-product FAISS index; a lookup returns the closest stored
+answer when its cosine similarity reaches the threshold.
+
+Answers are only comparable within a namespace (model and search filters:
+"serum under $30" and "serum under $50" embed almost identically but need
+different answers) and are dropped when the catalog index version changes.
+Size is bounded with LRU eviction and entries expire after a TTL.
+"""
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+import numpy as np
+import faiss
+
+# Neighbours examined per lookup, so a near-duplicate in another namespace
+# does not hide a match in this one
+SEARCH_NEIGHBOURS = 8
+
+
+class SemanticResponseCache:
+    """Thread-safe similarity cache with size, TTL and version limits and hit/miss counters"""
+
+    def __init__(self, threshold: float = 0.92, max_size: int = 1024, ttl_seconds: Optional[float] = 3600):
+        self.threshold = float(threshold)
+        self.max_size = max(1, int(max_size))
+        self.ttl_seconds = ttl_seconds
+        self.version = None
+        self._index = None
+        # id -> (namespace, value, stored_at), least recently used first
+        self._entries = OrderedDict()
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self._hit_similarity_total = 0.0
+
+    @staticmethod
+    def _normalize(embedding: np.ndarray) -> np.ndarray:
+        vector = np.ascontiguousarray(np.asarray(embedding, dtype='float32').reshape(1, -1))
+        faiss.normalize_L2(vector)
+        return vector
+
+    def _remove(self, ids):
+        for entry_id in ids:
+            del self._entries[entry_id]
+        self._index.remove_ids(np.asarray(ids, dtype='int64'))
+
+    def get(self, embedding: np.ndarray, namespace: Hashable = None) -> Optional[Any]:
+        """Return the answer stored for the most similar question, or None below the threshold"""
+        with self._lock:
+            if self._index is None or self._index.ntotal == 0:
+                self.misses += 1
+                return None
+            similarities, ids = self._index.search(
+                self._normalize(embedding), min(SEARCH_NEIGHBOURS, self._index.ntotal)
+            )
+            now = time.monotonic()
+            expired = []
+            found = None
+            for similarity, entry_id in zip(similarities[0], ids[0]):
+                if entry_id < 0 or similarity < self.threshold:
+                    break
+                entry_namespace, value, stored_at = self._entries[entry_id]
+                if self.ttl_seconds is not None and now - stored_at > self.ttl_seconds:
+                    expired.append(entry_id)
+                    continue
+                if entry_namespace == namespace:
+                    found = (entry_id, value, float(similarity))
+                    break
+            if expired:
+                self._remove(expired)
+                self.expirations += len(expired)
+
+            if found is None:
+                self.misses += 1
+                return None
+            entry_id, value, similarity = found
+            self._entries.move_to_end(entry_id)
+            self.hits += 1
+            self._hit_similarity_total += similarity
+            return value
+
+    def put(self, embedding: np.ndarray, value: Any, namespace: Hashable = None):
+        with self._lock:
+            vector = self._normalize(embedding)
+            if self._index is None or self._index.d != vector.shape[1]:
+                self._index = faiss.IndexIDMap(faiss.IndexFlatIP(vector.shape[1]))
+                self._entries.clear()
+            entry_id = self._next_id
+            self._next_id += 1
+            self._index.add_with_ids(vector, np.array([entry_id], dtype='int64'))
+            self._entries[entry_id] = (namespace, value, time.monotonic())
+            overflow = len(self._entries) - self.max_size
+            if overflow > 0:
+                self._remove(list(self._entries)[:overflow])
+                self.evictions += overflow
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            if self._index is not None:
+                self._index.reset()
+
+    def ensure_version(self, version: Hashable):
+        """Drop every answer if they were generated against another catalog index version"""
+        with self._lock:
+            if version == self.version:
+                return
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            if self._index is not None:
+                self._index.reset()
+            self.version = version
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+            "threshold": self.threshold,
+            "version": self.version,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "mean_hit_similarity": round(self._hit_similarity_total / self.hits, 4) if self.hits else None,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
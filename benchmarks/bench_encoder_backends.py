@@ -0,0 +1,97 @@
+"""
+Encoder Backend Benchmark
+Compares the torch SentenceTransformer with the ONNX Runtime fp32 and int8
+encoders from Vector_Store/onnx_encoder.py on the CPU: single-query latency
+(the /chat path), batch throughput, model size and parity with torch.
+GPUs are hidden so the numbers reflect a CPU-only host.
+
+Usage:
+    python Vector_Store/onnx_encoder.py --quantize     # export once
+    python benchmarks/bench_encoder_backends.py --threads 4
+"""
+import os
+import sys
+import time
+import argparse
+
+os.environ.setdefault('CUDA_VISIBLE_DEVICES', '')
+
+import numpy as np
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from Vector_Store.onnx_encoder import (
+    ONNX_INT8_MODEL_FILE, OnnxSentenceEncoder, check_parity, default_onnx_model_dir,
+)
+
+QUERIES = [
+    "moisturizer for dry skin", "best vitamin c serum", "fragrance free sunscreen under $30",
+    "what is good for acne scars", "long lasting matte lipstick", "gentle cleanser for sensitive skin",
+    "Is niacinamide good for oily skin?", "gift set for someone who loves perfume",
+    "hydrating toner without alcohol", "retinol night cream for beginners",
+]
+
+
+def time_single_queries(encoder, rounds):
+    latencies = []
+    for i in range(rounds):
+        start = time.perf_counter()
+        encoder.encode([QUERIES[i % len(QUERIES)]], show_progress_bar=False)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return np.array(latencies)
+
+
+def time_batch(encoder, texts, batch_size):
+    start = time.perf_counter()
+    encoder.encode(texts, batch_size=batch_size, show_progress_bar=False)
+    return len(texts) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--model-name', default='all-MiniLM-L6-v2')
+    parser.add_argument('--model-dir', default=None, help="Exported ONNX model directory")
+    parser.add_argument('--threads', type=int, default=None, help="Intra-op threads for every backend")
+    parser.add_argument('--rounds', type=int, default=300, help="Single-query encodes per backend")
+    parser.add_argument('--batch-texts', type=int, default=1024)
+    parser.add_argument('--batch-size', type=int, default=32)
+    args = parser.parse_args()
+
+    import torch
+    from sentence_transformers import SentenceTransformer
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    model_dir = args.model_dir or default_onnx_model_dir(args.model_name)
+
+    torch_model = SentenceTransformer(args.model_name, device='cpu')
+    torch_bytes = sum(p.numel() * p.element_size() for p in torch_model.parameters())
+    backends = [('torch', torch_model, torch_bytes, None)]
+    for quantized in (False, True):
+        if quantized and not os.path.exists(os.path.join(model_dir, ONNX_INT8_MODEL_FILE)):
+            print("No int8 model found - export with --quantize to include it")
+            continue
+        encoder = OnnxSentenceEncoder(model_dir, quantized=quantized, num_threads=args.threads)
+        backends.append(('onnx-int8' if quantized else 'onnx', encoder, encoder.nbytes,
+                         check_parity(encoder, torch_model)))
+
+    batch_texts = [f"{QUERIES[i % len(QUERIES)]} product {i}" for i in range(args.batch_texts)]
+    print(f"CPU-only, threads={args.threads or 'default'}, {args.rounds} single queries, "
+          f"{args.batch_texts} texts in batches of {args.batch_size}")
+    print("-" * 96)
+    print(f"{'backend':<11}{'model MB':>10}{'p50 ms':>9}{'p95 ms':>9}{'texts/s':>10}"
+          f"{'max |diff|':>12}{'min cos':>10}  parity")
+    for name, encoder, nbytes, parity in backends:
+        time_single_queries(encoder, 10)  # warm-up
+        latencies = time_single_queries(encoder, args.rounds)
+        throughput = time_batch(encoder, batch_texts, args.batch_size)
+        parity_columns = (f"{parity['max_abs_diff']:>12.2e}{parity['min_cosine']:>10.5f}  "
+                          f"{'OK' if parity['ok'] else 'OUT OF TOLERANCE'}" if parity
+                          else f"{'-':>12}{'-':>10}  reference")
+        print(f"{name:<11}{nbytes / 1e6:>10.1f}{np.percentile(latencies, 50):>9.2f}"
+              f"{np.percentile(latencies, 95):>9.2f}{throughput:>10.0f}{parity_columns}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+"""
+Index Mode Benchmark
+Compares the FAISS index modes from Vector_Store/index_factory.py against the
+exact Flat baseline: recall@k, p50/p99 single-query latency, build time and
+index size. Uses the vectors of the cached product index when available,
+otherwise a synthetic clustered catalog.
+
+Usage:
+    python benchmarks/bench_index_modes.py --num-vectors 200000 --k 3
+    python benchmarks/bench_index_modes.py --modes hnsw ivf_pq --nprobe 16 --ef-search 128
+"""
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+import faiss
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from Vector_Store.index_factory import INDEX_TYPES, build_index, apply_search_params
+
+
+def synthetic_embeddings(num_vectors, dimension=384, num_clusters=256, seed=0):
+    """Clustered vectors roughly shaped like MiniLM product embeddings"""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(num_clusters, dimension)).astype('float32')
+    labels = rng.integers(0, num_clusters, size=num_vectors)
+    vectors = centers[labels] + 0.35 * rng.normal(size=(num_vectors, dimension)).astype('float32')
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def cached_embeddings():
+    """Reconstruct the vectors of the cached flat index, if there is one"""
+    from Vector_Store.retrieval_engine import DEFAULT_CACHE_DIRS, FAISS_INDEX_FILE
+    from Vector_Store.artifact_store import resolve_artifact_dir
+    for cache_dir in DEFAULT_CACHE_DIRS:
+        path = os.path.join(resolve_artifact_dir(cache_dir)[0], FAISS_INDEX_FILE)
+        if os.path.exists(path):
+            index = faiss.read_index(path)
+            if isinstance(index, faiss.IndexIDMap):
+                index = index.index
+            if isinstance(faiss.downcast_index(index), faiss.IndexFlat):
+                return index.reconstruct_n(0, index.ntotal)
+    return None
+
+
+def index_size_bytes(index):
+    return faiss.serialize_index(index).nbytes
+
+
+def measure(index, queries, k):
+    """Return (all result ids, per-query latencies in ms)"""
+    latencies = []
+    results = np.empty((len(queries), k), dtype='int64')
+    for i, query in enumerate(queries):
+        start = time.perf_counter()
+        _, ids = index.search(query.reshape(1, -1), k)
+        latencies.append((time.perf_counter() - start) * 1000)
+        results[i] = ids[0]
+    return results, np.array(latencies)
+
+
+def recall_at_k(results, ground_truth):
+    hits = sum(len(set(r) & set(g)) for r, g in zip(results, ground_truth))
+    return hits / ground_truth.size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--num-vectors', type=int, default=100000)
+    parser.add_argument('--num-queries', type=int, default=500)
+    parser.add_argument('--k', type=int, default=3)
+    parser.add_argument('--modes', nargs='+', default=list(INDEX_TYPES), choices=INDEX_TYPES)
+    parser.add_argument('--nprobe', type=int, default=None)
+    parser.add_argument('--ef-search', type=int, default=None)
+    parser.add_argument('--use-cache', action='store_true', help="Benchmark the cached product vectors")
+    args = parser.parse_args()
+
+    vectors = cached_embeddings() if args.use_cache else None
+    if vectors is None:
+        vectors = synthetic_embeddings(args.num_vectors)
+    rng = np.random.default_rng(1)
+    picks = rng.integers(0, len(vectors), size=args.num_queries)
+    queries = vectors[picks] + 0.05 * rng.normal(size=(args.num_queries, vectors.shape[1])).astype('float32')
+    queries = np.ascontiguousarray(queries, dtype='float32')
+
+    print(f"Benchmarking {len(vectors)} vectors x {vectors.shape[1]} dims, "
+          f"{args.num_queries} queries, recall@{args.k}")
+    print("-" * 86)
+    print(f"{'mode':<10}{'build s':>10}{'size MB':>10}{'recall':>10}{'p50 ms':>10}{'p99 ms':>10}  params")
+
+    baseline, _ = build_index(vectors, 'flat')
+    ground_truth, _ = measure(baseline, queries, args.k)
+
+    for mode in args.modes:
+        start = time.perf_counter()
+        index, params = build_index(vectors, mode)
+        build_seconds = time.perf_counter() - start
+        apply_search_params(index, params, nprobe=args.nprobe, ef_search=args.ef_search)
+
+        results, latencies = measure(index, queries, args.k)
+        knobs = {k: v for k, v in params.items() if k not in ('index_type', 'dimension', 'num_vectors')}
+        print(f"{params['index_type']:<10}{build_seconds:>10.2f}{index_size_bytes(index) / 1e6:>10.1f}"
+              f"{recall_at_k(results, ground_truth):>10.3f}{np.percentile(latencies, 50):>10.3f}"
+              f"{np.percentile(latencies, 99):>10.3f}  {knobs}")
+
+
+if __name__ == '__main__':
+    main()
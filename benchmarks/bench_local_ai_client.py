@@ -0,0 +1,159 @@
+"""
+Local AI HTTP Client Benchmark
+Measures the per-request overhead the pooled keep-alive session
+(chatbot/services/http_client.py) saves over bare requests.post calls, which
+open a new TCP connection (and with --tls a new TLS handshake) per message.
+
+A stub server on localhost answers like the Ollama generate endpoint after
+--server-ms of simulated work and counts the connections it accepts. Real
+deployments add network round trips to every new connection, so the savings
+here are a lower bound.
+
+Usage:
+    python benchmarks/bench_local_ai_client.py --requests 500
+    python benchmarks/bench_local_ai_client.py --tls --concurrency 8
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import requests
+import urllib3
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from chatbot.services.http_client import create_session, timeouts
+
+PAYLOAD = {"model": "openhermes-gpu:latest", "prompt": "Which serum suits dry skin?", "stream": False}
+REPLY = json.dumps({"response": "Try a hyaluronic acid serum.", "done": True}).encode()
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, server_ms):
+        self.server_ms = server_ms
+        self.connections = 0
+        self._lock = threading.Lock()
+        super().__init__(('127.0.0.1', 0), StubHandler)
+
+    def count_connection(self):
+        with self._lock:
+            self.connections += 1
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive
+    # Like real servers; otherwise Nagle and delayed ACKs stall kept-alive connections
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        self.server.count_connection()
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        if self.server.server_ms:
+            time.sleep(self.server.server_ms / 1000)
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(REPLY)))
+        self.end_headers()
+        self.wfile.write(REPLY)
+
+    def log_message(self, *args):
+        pass
+
+
+def self_signed_context(directory):
+    """Server-side SSL context with a throwaway self-signed certificate"""
+    import ssl
+    if shutil.which('openssl') is None:
+        sys.exit("--tls needs the openssl command line tool")
+    cert, key = os.path.join(directory, 'cert.pem'), os.path.join(directory, 'key.pem')
+    subprocess.run(['openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes', '-days', '1', '-subj', '/CN=localhost',
+                    '-keyout', key, '-out', cert], check=True, capture_output=True)
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(cert, key)
+    return context
+
+
+def run(server, url, post, num_requests, concurrency):
+    """Send num_requests POSTs; returns (per-request latencies in ms, seconds, connections opened)"""
+    connections_before = server.connections
+
+    def one(_):
+        start = time.perf_counter()
+        response = post(url)
+        response.raise_for_status()
+        response.json()
+        return (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    if concurrency == 1:
+        latencies = [one(i) for i in range(num_requests)]
+    else:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            latencies = list(pool.map(one, range(num_requests)))
+    return np.asarray(latencies), time.perf_counter() - start, server.connections - connections_before
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=300)
+    parser.add_argument('--concurrency', type=int, default=1)
+    parser.add_argument('--server-ms', type=float, default=0.0, help="Simulated generation time per request")
+    parser.add_argument('--pool-size', type=int, default=10)
+    parser.add_argument('--tls', action='store_true', help="Serve HTTPS with a self-signed certificate")
+    args = parser.parse_args()
+
+    server = StubServer(args.server_ms)
+    tempdir = tempfile.mkdtemp(prefix='bench_http_')
+    try:
+        if args.tls:
+            server.socket = self_signed_context(tempdir).wrap_socket(server.socket, server_side=True)
+            urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f"{'https' if args.tls else 'http'}://127.0.0.1:{server.server_port}/api/generate"
+
+        session = create_session(pool_size=args.pool_size)
+        clients = {
+            "bare requests.post": lambda u: requests.post(u, json=PAYLOAD, timeout=timeouts(), verify=False),
+            "pooled session": lambda u: session.post(u, json=PAYLOAD, timeout=timeouts(), verify=False),
+        }
+        # Warm-up (imports, first connections)
+        for post in clients.values():
+            run(server, url, post, 10, args.concurrency)
+
+        print(f"\n{args.requests} requests, concurrency {args.concurrency}, "
+              f"{'HTTPS' if args.tls else 'HTTP'}, server time {args.server_ms} ms")
+        print("-" * 78)
+        print(f"{'client':<22}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'req/s':>10}{'connections':>14}")
+        means = {}
+        for name, post in clients.items():
+            latencies, seconds, connections = run(server, url, post, args.requests, args.concurrency)
+            means[name] = latencies.mean()
+            print(f"{name:<22}{latencies.mean():>10.3f}{np.percentile(latencies, 50):>10.3f}"
+                  f"{np.percentile(latencies, 95):>10.3f}{args.requests / seconds:>10.0f}{connections:>14}")
+        saved = means["bare requests.post"] - means["pooled session"]
+        print(f"\nOverhead saved per request: {saved:.3f} ms "
+              f"({100 * saved / means['bare requests.post']:.0f}% of the bare request time)")
+        session.close()
+    finally:
+        server.shutdown()
+        shutil.rmtree(tempdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
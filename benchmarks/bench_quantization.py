@@ -0,0 +1,90 @@
+"""
+Quantization Benchmark
+Memory saved versus recall@k lost for the compressed storage modes of
+Vector_Store/index_factory.py (fp16, sq8, pq, ivf_pq), with and without exact
+float re-ranking of the short list. Recall is measured against the exact
+float32 Flat index, so flat itself is the 1.000 / 0% baseline.
+
+"heap MB" is what every worker process holds; the re-ranking vectors are a
+memory-mapped file shared by all workers through the page cache and are
+reported separately.
+
+Usage:
+    python benchmarks/bench_quantization.py --num-vectors 200000 --k 3
+    python benchmarks/bench_quantization.py --modes sq8 pq --rerank-factor 8
+"""
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from Vector_Store.index_factory import QUANTIZED_INDEX_TYPES, build_index, rerank_candidates
+from bench_index_modes import synthetic_embeddings, cached_embeddings, index_size_bytes, measure, recall_at_k
+
+
+def measure_reranked(index, vectors, queries, k, rerank_factor):
+    """Search k * rerank_factor candidates and keep the k closest by exact distance"""
+    latencies = []
+    results = np.empty((len(queries), k), dtype='int64')
+    for i, query in enumerate(queries):
+        start = time.perf_counter()
+        _, ids = index.search(query.reshape(1, -1), k * rerank_factor)
+        rows = rerank_candidates(query, ids[0][ids[0] >= 0], vectors, k)
+        latencies.append((time.perf_counter() - start) * 1000)
+        results[i, :len(rows)] = rows
+        results[i, len(rows):] = -1
+    return results, np.array(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--num-vectors', type=int, default=100000)
+    parser.add_argument('--num-queries', type=int, default=500)
+    parser.add_argument('--k', type=int, default=3)
+    parser.add_argument('--modes', nargs='+', default=list(QUANTIZED_INDEX_TYPES), choices=QUANTIZED_INDEX_TYPES)
+    parser.add_argument('--rerank-factor', type=int, default=4, help="Short list size as a multiple of k")
+    parser.add_argument('--use-cache', action='store_true', help="Benchmark the cached product vectors")
+    args = parser.parse_args()
+
+    vectors = cached_embeddings() if args.use_cache else None
+    if vectors is None:
+        vectors = synthetic_embeddings(args.num_vectors)
+    rng = np.random.default_rng(1)
+    picks = rng.integers(0, len(vectors), size=args.num_queries)
+    queries = vectors[picks] + 0.05 * rng.normal(size=(args.num_queries, vectors.shape[1])).astype('float32')
+    queries = np.ascontiguousarray(queries, dtype='float32')
+
+    baseline, _ = build_index(vectors, 'flat')
+    ground_truth, baseline_latencies = measure(baseline, queries, args.k)
+    baseline_bytes = index_size_bytes(baseline)
+
+    print(f"{len(vectors)} vectors x {vectors.shape[1]} dims, {args.num_queries} queries, "
+          f"recall@{args.k}, re-rank short list {args.k * args.rerank_factor}")
+    print(f"re-rank vectors (mmap, shared by workers): {vectors.nbytes / 1e6:.1f} MB")
+    print("-" * 92)
+    print(f"{'mode':<16}{'heap MB':>10}{'saved':>9}{'recall':>9}{'lost':>9}{'p50 ms':>9}{'p99 ms':>9}")
+    print(f"{'flat':<16}{baseline_bytes / 1e6:>10.1f}{'0%':>9}{1.0:>9.3f}{0.0:>9.3f}"
+          f"{np.percentile(baseline_latencies, 50):>9.3f}{np.percentile(baseline_latencies, 99):>9.3f}")
+
+    for mode in args.modes:
+        index, params = build_index(vectors, mode)
+        size = index_size_bytes(index)
+        saved = f"{100 * (1 - size / baseline_bytes):.0f}%"
+
+        for label, (results, latencies) in (
+            (params['index_type'], measure(index, queries, args.k)),
+            (f"{params['index_type']}+rerank", measure_reranked(index, vectors, queries, args.k, args.rerank_factor)),
+        ):
+            recall = recall_at_k(results, ground_truth)
+            print(f"{label:<16}{size / 1e6:>10.1f}{saved:>9}{recall:>9.3f}{1 - recall:>9.3f}"
+                  f"{np.percentile(latencies, 50):>9.3f}{np.percentile(latencies, 99):>9.3f}")
+
+
+if __name__ == '__main__':
+    main()
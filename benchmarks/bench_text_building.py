@@ -0,0 +1,139 @@
+"""
+Text Building Benchmark
+Times embedFunc.build_product_texts against the original DataFrame.iterrows
+loop on a synthetic catalog and checks that both produce exactly the same
+search texts and LLM contexts.
+
+Usage:
+    python benchmarks/bench_text_building.py --rows 500000
+    python benchmarks/bench_text_building.py --rows 500000 --skip-reference
+"""
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+import pandas as pd
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from Vector_Store.embedFunc import build_product_texts, preprocess_product_columns
+
+
+def synthetic_catalog(rows, seed=0):
+    """Catalog with the same columns and messiness as clean_product_info.csv"""
+    rng = np.random.default_rng(seed)
+    skin_types = ['', 'dry', 'Oily; Combination', ' sensitive ;dry;', 'normal;oily skin', 'ALL SKIN TYPES', None]
+    highlights = [
+        '', 'Vegan, Good for: Dry Skin', 'Hydrating | Oily skin | all skin types', None,
+        'Clean at Sephora', 'Best for combination skin and SENSITIVE SKIN', 'Without Parabens',
+    ]
+    ingredients = ['', 'Water, Glycerin, Niacinamide', 'Aqua/Water/Eau, Squalane, Tocopherol', None]
+    categories = ['Skincare', 'Makeup', 'Fragrance', 'Hair', '']
+    return pd.DataFrame({
+        'product_name': [f"Product {i} Crème" for i in range(rows)],
+        'highlights': rng.choice(np.array(highlights, dtype=object), rows),
+        'ingredients': rng.choice(np.array(ingredients, dtype=object), rows),
+        'primary_category': rng.choice(categories, rows),
+        'skin_type': rng.choice(np.array(skin_types, dtype=object), rows),
+        'price_usd': np.where(rng.random(rows) < 0.05, np.nan, rng.random(rows) * 300),
+        'out_of_stock': np.where(rng.random(rows) < 0.05, np.nan, rng.integers(0, 2, rows)),
+    })
+
+
+def build_product_texts_iterrows(product_df):
+    """The original per-row implementation from embedFunc.py, kept as the reference"""
+    local_product_texts_for_embedding = []
+    local_product_contexts_for_llm = []
+
+    for index, row in product_df.iterrows():
+        product_name = str(row.get('product_name', ''))
+        highlights = str(row.get('highlights', ''))
+        ingredients_val = str(row.get('ingredients', ''))
+        category = str(row.get('primary_category', ''))
+        skin_type_col_value = str(row.get('skin_type', ''))
+
+        current_skin_types = set()
+        if skin_type_col_value:
+            for s_type in skin_type_col_value.split(';'):
+                s_type_cleaned = s_type.strip()
+                if s_type_cleaned:
+                    current_skin_types.add(s_type_cleaned.capitalize())
+
+        highlights_lower = highlights.lower()
+        skin_type_map = {
+            "oily skin": "Oily Skin", "dry skin": "Dry Skin",
+            "combination skin": "Combination Skin", "sensitive skin": "Sensitive Skin",
+            "all skin types": "All Skin Types"
+        }
+        for term, standardized_term in skin_type_map.items():
+            if term in highlights_lower:
+                already_present = any(term in existing_st.lower() for existing_st in current_skin_types)
+                if not already_present:
+                    current_skin_types.add(standardized_term)
+
+        combined_skin_type_info = "; ".join(sorted(list(current_skin_types))) if current_skin_types else "Not specified"
+
+        search_text = (
+            f"Product Name: {product_name}. "
+            f"Suitable for Skin Types: {combined_skin_type_info}. "
+            f"Features and Highlights: {highlights}. "
+            f"Category: {category}. "
+            f"Ingredients: {ingredients_val if ingredients_val else 'Not specified'}."
+        )
+        local_product_texts_for_embedding.append(search_text)
+
+        stock_info = "In Stock" if row.get('out_of_stock', 1) == 0 else "Out of Stock"
+        price_usd = row.get('price_usd', 0.0)
+        context_text = (
+            f"Product Name: {product_name}\\n"
+            f"Category: {category}\\n"
+            f"Skin Type Information: {combined_skin_type_info if combined_skin_type_info != 'Not specified' else 'N/A'}\\n"
+            f"Price: USD {price_usd:.2f}\\n"
+            f"Stock: {stock_info}\\n"
+            f"Highlights: {highlights if highlights else 'N/A'}\\n"
+            f"Ingredients: {ingredients_val if ingredients_val else 'N/A'}"
+        )
+        local_product_contexts_for_llm.append(context_text)
+
+    return local_product_texts_for_embedding, local_product_contexts_for_llm
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=500000)
+    parser.add_argument('--skip-reference', action='store_true',
+                        help="Only time the vectorized builder (the iterrows loop is slow on large catalogs)")
+    args = parser.parse_args()
+
+    product_df = preprocess_product_columns(synthetic_catalog(args.rows))
+    print(f"Building texts for a synthetic catalog of {len(product_df)} rows")
+
+    start = time.perf_counter()
+    texts, contexts = build_product_texts(product_df)
+    vectorized_seconds = time.perf_counter() - start
+    print(f"   vectorized: {vectorized_seconds:8.2f}s")
+
+    if args.skip_reference:
+        return
+
+    start = time.perf_counter()
+    reference_texts, reference_contexts = build_product_texts_iterrows(product_df)
+    reference_seconds = time.perf_counter() - start
+    print(f"   iterrows:   {reference_seconds:8.2f}s")
+    print(f"   speed-up:   {reference_seconds / vectorized_seconds:8.1f}x")
+
+    if texts == reference_texts and contexts == reference_contexts:
+        print("[OK] Vectorized output is identical to the iterrows reference")
+    else:
+        mismatches = sum(a != b for a, b in zip(texts, reference_texts))
+        mismatches += sum(a != b for a, b in zip(contexts, reference_contexts))
+        print(f"[ERROR] {mismatches} texts differ from the iterrows reference")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,18 @@
+"""
+RAG Quality Benchmark
+Measures retrieval quality (recall@k, MRR), latency (p50/p95/p99) and memory
+of the whole retrieval path - embedFunc text building and index build, then
+AIService._search_rag with the filters generate_response would extract - on
+a synthetic catalog with labelled queries (see dataset.py).
+
+Results are compared against baseline.json when it was recorded with the
+same configuration, so that changes to text building, index type or top_k
+show up as regressions in review. Record it on the reference machine with
+--write-baseline and commit it; latency and memory tolerances are relative.
+A run fails (exit status 1) on regressions and when there is no baseline.
+
+Usage (from the project root):
+    python -m benchmarks.rag_quality                     # run and compare
+    python -m benchmarks.rag_quality --index-type sq8 --rerank
+    python -m benchmarks.rag_quality --write-baseline    # accept the current numbers
+"""
@@ -0,0 +1,190 @@
+"""Run the RAG quality benchmark: python -m benchmarks.rag_quality --help"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+from collections import defaultdict
+
+os.environ.setdefault('RAG_RELOAD_INTERVAL_SECONDS', '0')
+
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+for path in (project_root, os.path.join(project_root, 'chatbot')):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from benchmarks.rag_quality import __doc__ as PACKAGE_DOC
+from benchmarks.rag_quality.dataset import CATALOG_COLUMNS, build_catalog, catalog_summary, generate_queries
+from benchmarks.rag_quality.metrics import check_baseline, latency_summary, recall_at_k, reciprocal_rank
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+
+def product_name(context: str) -> str:
+    """Product name from an LLM context ('Product Name: ...' is always the first field)"""
+    # embedFunc separates the context fields with a literal backslash-n
+    first_line = context.split('\\n', 1)[0].split('\n', 1)[0]
+    return first_line[len('Product Name: '):] if first_line.startswith('Product Name: ') else first_line
+
+
+def build_artifacts(catalog, cache_dir, index_type, rerank):
+    from Vector_Store.embedFunc import generate_embeddings_and_cache, peak_rss_bytes
+    start = time.perf_counter()
+    generate_embeddings_and_cache(index_type=index_type, cache_dir=cache_dir,
+                                  product_df=catalog[CATALOG_COLUMNS], rerank=rerank)
+    return round(time.perf_counter() - start, 3), peak_rss_bytes()
+
+
+def run_queries(service, queries, top_k, warm_cache):
+    """Search every query the way generate_response does; returns (retrieved names, latencies)"""
+    engine = service.retrieval_engine
+    retrieved, latencies = [], []
+    for query in queries:
+        if not warm_cache:
+            engine.result_cache.clear()
+            engine.embedding_cache.clear()
+        start = time.perf_counter()
+        filters = engine.extract_filters(query["query"])
+        contexts = service._search_rag(query["query"], top_k=top_k, filters=filters)
+        latencies.append((time.perf_counter() - start) * 1000)
+        retrieved.append([product_name(context) for context in contexts])
+    return retrieved, latencies
+
+
+def quality_metrics(queries, retrieved, ks):
+    groups = defaultdict(list)
+    for query, names in zip(queries, retrieved):
+        groups["all"].append((query, names))
+        groups[query["kind"]].append((query, names))
+    quality = {}
+    for group, pairs in groups.items():
+        metrics = {"queries": len(pairs)}
+        for k in ks:
+            metrics[f"recall@{k}"] = round(sum(recall_at_k(names, q["relevant"], k) for q, names in pairs) / len(pairs), 4)
+        metrics["mrr"] = round(sum(reciprocal_rank(names, q["relevant"]) for q, names in pairs) / len(pairs), 4)
+        quality[group] = metrics
+    return quality
+
+
+def print_report(results, ks):
+    config = results["config"]
+    print(f"\n{config['catalog']['products']} products ({config['catalog']['generated']} generated), "
+          f"{config['queries']} queries, index {config['index_type']}{' + rerank' if config['rerank'] else ''}, "
+          f"encoder {config['encoder_backend']}")
+    print("-" * 72)
+    header = f"{'kind':<12}{'queries':>8}" + ''.join(f"{f'R@{k}':>9}" for k in ks) + f"{'MRR':>9}"
+    print(header)
+    for kind, metrics in results["quality"].items():
+        print(f"{kind:<12}{metrics['queries']:>8}" + ''.join(f"{metrics[f'recall@{k}']:>9.3f}" for k in ks)
+              + f"{metrics['mrr']:>9.3f}")
+    latency = results["latency"]
+    print(f"\nlatency (_search_rag): p50 {latency['p50_ms']:.2f} ms, p95 {latency['p95_ms']:.2f} ms, "
+          f"p99 {latency['p99_ms']:.2f} ms")
+    memory = {k: v for k, v in results["memory"].items() if v is not None}
+    print("memory: " + ", ".join(f"{k.replace('_bytes', '')} {v / 1e6:.1f} MB" for k, v in memory.items()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=PACKAGE_DOC, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--products', type=int, default=5000, help="Generated products")
+    parser.add_argument('--dataset-rows', type=int, default=2000, help="Real DataSet rows to include, if available")
+    parser.add_argument('--queries', type=int, default=400)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--k', type=int, nargs='+', default=[1, 3, 5], help="Cut-offs for recall@k")
+    parser.add_argument('--index-type', default='flat')
+    parser.add_argument('--rerank', action='store_true', help="Keep float32 vectors to re-rank quantized indexes")
+    parser.add_argument('--warm-cache', action='store_true', help="Keep the engine's query caches between queries")
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--write-baseline', action='store_true', help="Save this run as the baseline")
+    parser.add_argument('--output', default=None, help="Also write the results JSON here")
+    parser.add_argument('--quality-tolerance', type=float, default=0.01)
+    parser.add_argument('--latency-tolerance', type=float, default=0.25)
+    parser.add_argument('--memory-tolerance', type=float, default=0.10)
+    args = parser.parse_args()
+
+    from Vector_Store.retrieval_engine import RetrievalEngine
+    from services.ai_service import AIService
+
+    ks = sorted(set(args.k))
+    catalog = build_catalog(args.products, args.dataset_rows, args.seed)
+    queries = generate_queries(catalog, args.queries, args.seed)
+
+    cache_dir = tempfile.mkdtemp(prefix='rag_quality_')
+    try:
+        build_seconds, build_peak_rss = build_artifacts(catalog, cache_dir, args.index_type, args.rerank)
+        engine = RetrievalEngine(cache_dirs=[cache_dir])
+        if not engine.load():
+            sys.exit("The retrieval engine could not load the benchmark artifacts")
+        service = AIService(lazy=True)
+        service.retrieval_engine = engine
+
+        run_queries(service, queries[:20], max(ks), args.warm_cache)  # warm-up
+        retrieved, latencies = run_queries(service, queries, max(ks), args.warm_cache)
+        stats = engine.get_stats()
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    results = {
+        "config": {
+            "catalog": catalog_summary(catalog),
+            "queries": len(queries),
+            "seed": args.seed,
+            "k": ks,
+            "index_type": stats["index_params"].get("index_type", args.index_type),
+            "rerank": args.rerank,
+            "warm_cache": args.warm_cache,
+            "model_name": engine.model_name,
+            "encoder_backend": stats["encoder_backend"],
+        },
+        "quality": quality_metrics(queries, retrieved, ks),
+        "latency": latency_summary(latencies),
+        "memory": {
+            "model_bytes": stats["model_bytes"],
+            "index_bytes": stats["index_bytes"],
+            "contexts_bytes": stats["contexts_bytes"],
+            "bm25_bytes": stats["bm25_bytes"],
+            "metadata_bytes": stats["metadata_bytes"],
+            "engine_rss_delta_bytes": stats.get("rss_delta_bytes"),
+            "build_peak_rss_bytes": build_peak_rss,
+        },
+        "build_seconds": build_seconds,
+    }
+    print_report(results, ks)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    exit_code = 0
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = check_baseline(results, baseline, quality_tolerance=args.quality_tolerance,
+                                     latency_tolerance=args.latency_tolerance,
+                                     memory_tolerance=args.memory_tolerance)
+        if regressions is None:
+            print(f"\nBaseline {args.baseline} was recorded with a different configuration - not comparing.")
+        elif regressions:
+            print(f"\nREGRESSIONS against {args.baseline}:")
+            for line in regressions:
+                print(f"  {line}")
+            exit_code = 1
+        else:
+            print(f"\nNo regressions against {args.baseline}")
+    elif not args.write_baseline:
+        # Without a baseline nothing is gated: fail rather than pass silently
+        print(f"\nNo baseline at {args.baseline}; record one with --write-baseline")
+        exit_code = 1
+
+    if args.write_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent=2)
+            f.write('\n')
+        print(f"Baseline written to {args.baseline}")
+    sys.exit(exit_code)
+
+
+if __name__ == '__main__':
+    main()
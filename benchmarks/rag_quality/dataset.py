@@ -0,0 +1,179 @@
+"""
+Synthetic catalog and labelled queries for the RAG quality benchmark.
+
+The catalog mixes three sources, all in the clean_product_info.csv schema:
+the demo store products (chatbot/Store/data/products.txt), real rows from
+Vector_Store/DataSet when it is present, and generated products whose
+brand, type, benefit, key ingredient, skin types and price are known. Those
+attributes are what the queries are labelled with, so relevance is exact
+rather than judged.
+"""
+import os
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+STORE_PRODUCTS_PATH = os.path.join(PROJECT_ROOT, 'chatbot', 'Store', 'data', 'products.txt')
+DATASET_PATH = os.path.join(PROJECT_ROOT, 'Vector_Store', 'DataSet', 'clean_product_info.csv')
+
+CATALOG_COLUMNS = ['product_id', 'product_name', 'highlights', 'ingredients', 'primary_category',
+                   'skin_type', 'price_usd', 'out_of_stock']
+
+PRODUCT_TYPES = {
+    'Skincare': ['Moisturizer', 'Serum', 'Cleanser', 'Toner', 'Face Mask', 'Eye Cream', 'Sunscreen', 'Exfoliant'],
+    'Makeup': ['Foundation', 'Concealer', 'Lipstick', 'Mascara', 'Eyeshadow Palette', 'Blush', 'Primer'],
+    'Fragrance': ['Eau de Parfum', 'Eau de Toilette', 'Body Mist', 'Perfume Oil'],
+    'Hair': ['Shampoo', 'Conditioner', 'Hair Oil', 'Hair Mask'],
+}
+BRANDS = ['Lumiere Lab', 'Verdant', 'Oakridge', 'Nova Skin', 'Petal & Pine', 'Kosa', 'Aurora Botanics',
+          'Terra Pura', 'Glow Beauty', 'Beauty Co', 'Color Me', 'Hair Plus']
+BENEFITS = ['Hydrating', 'Brightening', 'Firming', 'Soothing', 'Oil-Control', 'Plumping', 'Repairing',
+            'Clarifying', 'Long-Wear', 'Nourishing', 'Smoothing', 'Volumizing']
+KEY_INGREDIENTS = ['Hyaluronic Acid', 'Niacinamide', 'Vitamin C', 'Retinol', 'Ceramides', 'Salicylic Acid',
+                   'Squalane', 'Peptides', 'Green Tea', 'Shea Butter', 'Argan Oil', 'Rosehip Oil']
+SKIN_TYPES = ['Dry', 'Oily', 'Combination', 'Normal', 'Sensitive']
+BASE_INGREDIENTS = ['Water', 'Glycerin', 'Butylene Glycol', 'Caprylic/Capric Triglyceride', 'Tocopherol',
+                    'Phenoxyethanol', 'Sodium Hyaluronate', 'Aloe Barbadensis Leaf Juice']
+
+
+def load_store_products(path: str = STORE_PRODUCTS_PATH) -> pd.DataFrame:
+    """The demo store catalog (pipe-separated) mapped onto the catalog schema"""
+    if not os.path.exists(path):
+        return pd.DataFrame(columns=CATALOG_COLUMNS)
+    store = pd.read_csv(path, sep='|', dtype=str).fillna('')
+    return pd.DataFrame({
+        'product_id': 'store-' + store['ID'],
+        'product_name': store['Name'],
+        'highlights': store['Description'],
+        'ingredients': '',
+        'primary_category': store['Category'],
+        'skin_type': '',
+        'price_usd': pd.to_numeric(store['Price'], errors='coerce').fillna(0),
+        'out_of_stock': (pd.to_numeric(store['Stock'], errors='coerce').fillna(0) <= 0).astype(int),
+    })
+
+
+def load_dataset_products(max_rows: int, path: str = DATASET_PATH) -> pd.DataFrame:
+    """Up to max_rows real catalog rows, if the DataSet CSV is available"""
+    if max_rows <= 0 or not os.path.exists(path):
+        return pd.DataFrame(columns=CATALOG_COLUMNS)
+    dataset = pd.read_csv(path, nrows=max_rows)
+    dataset = dataset.drop_duplicates('product_name').reset_index(drop=True)
+    for column in CATALOG_COLUMNS:
+        if column not in dataset.columns:
+            dataset[column] = '' if column != 'price_usd' else 0.0
+    dataset['product_id'] = 'dataset-' + dataset['product_id'].astype(str)
+    return dataset[CATALOG_COLUMNS]
+
+
+def generate_products(num_products: int, seed: int = 0) -> pd.DataFrame:
+    """
+    Products with known attributes. Names are brand + benefit + key
+    ingredient + type and are unique; the attribute columns (brand,
+    product_type, benefit, key_ingredient, skin_types) are kept for labelling.
+    """
+    rng = np.random.default_rng(seed)
+    categories = list(PRODUCT_TYPES)
+    rows, seen = [], set()
+    attempts = 0
+    while len(rows) < num_products and attempts < num_products * 20:
+        attempts += 1
+        category = categories[rng.integers(len(categories))]
+        product_type = PRODUCT_TYPES[category][rng.integers(len(PRODUCT_TYPES[category]))]
+        brand = BRANDS[rng.integers(len(BRANDS))]
+        benefit = BENEFITS[rng.integers(len(BENEFITS))]
+        key_ingredient = KEY_INGREDIENTS[rng.integers(len(KEY_INGREDIENTS))]
+        name = f"{brand} {benefit} {key_ingredient} {product_type}"
+        if name in seen:
+            continue
+        seen.add(name)
+
+        skin_types = sorted(rng.choice(SKIN_TYPES, size=rng.integers(1, 3), replace=False).tolist())
+        others = rng.choice(BASE_INGREDIENTS, size=4, replace=False).tolist()
+        rows.append({
+            'product_id': f"synthetic-{len(rows)}",
+            'product_name': name,
+            'highlights': f"{benefit}, Good for: {' and '.join(skin_types)} Skin, With {key_ingredient}",
+            'ingredients': ', '.join(others[:2] + [key_ingredient] + others[2:]),
+            'primary_category': category,
+            'skin_type': ';'.join(skin_types),
+            'price_usd': round(float(rng.uniform(8, 150)), 2),
+            'out_of_stock': int(rng.random() < 0.1),
+            'brand': brand,
+            'product_type': product_type,
+            'benefit': benefit,
+            'key_ingredient': key_ingredient,
+            'skin_types': skin_types,
+        })
+    return pd.DataFrame(rows)
+
+
+def build_catalog(num_products: int, dataset_rows: int = 2000, seed: int = 0) -> pd.DataFrame:
+    """Store products, real DataSet rows and generated products, in that order"""
+    catalog = pd.concat(
+        [load_store_products(), load_dataset_products(dataset_rows), generate_products(num_products, seed)],
+        ignore_index=True,
+    )
+    return catalog.drop_duplicates('product_name', keep='first').reset_index(drop=True)
+
+
+def _query(text: str, relevant: List[str], kind: str) -> Dict[str, object]:
+    return {"query": text, "relevant": sorted(set(relevant)), "kind": kind}
+
+
+def generate_queries(catalog: pd.DataFrame, num_queries: int, seed: int = 0) -> List[Dict[str, object]]:
+    """
+    Labelled queries, spread over four kinds:
+
+    - name: a product asked for by (lower-cased) name; one relevant product
+    - paraphrase: brand + type + key ingredient in other words
+    - attribute: a product type for a skin type (many relevant products)
+    - filtered: a product type under a price, exercising the price filter
+    """
+    rng = np.random.default_rng(seed + 1)
+    generated = catalog[catalog['product_id'].astype(str).str.startswith('synthetic-')]
+    if generated.empty:
+        raise ValueError("The catalog has no generated products to label queries with")
+    names = catalog['product_name'].tolist()
+    queries = []
+
+    name_templates = ["{name}", "do you have the {name}?", "tell me about {name}"]
+    for _ in range(num_queries // 4):
+        name = names[rng.integers(len(names))]
+        template = name_templates[rng.integers(len(name_templates))]
+        queries.append(_query(template.format(name=name.lower()), [name], 'name'))
+
+    for _ in range(num_queries // 4):
+        row = generated.iloc[rng.integers(len(generated))]
+        same = generated[(generated['brand'] == row['brand']) & (generated['product_type'] == row['product_type'])
+                         & (generated['key_ingredient'] == row['key_ingredient'])]
+        text = f"a {row['product_type'].lower()} from {row['brand']} that contains {row['key_ingredient'].lower()}"
+        queries.append(_query(text, same['product_name'].tolist(), 'paraphrase'))
+
+    for _ in range(num_queries // 4):
+        row = generated.iloc[rng.integers(len(generated))]
+        skin = row['skin_types'][rng.integers(len(row['skin_types']))]
+        same = generated[(generated['product_type'] == row['product_type'])
+                         & generated['skin_types'].map(lambda types: skin in types)]
+        text = f"{row['product_type'].lower()} for {skin.lower()} skin"
+        queries.append(_query(text, same['product_name'].tolist(), 'attribute'))
+
+    while len(queries) < num_queries:
+        row = generated.iloc[rng.integers(len(generated))]
+        limit = int(np.ceil(row['price_usd'] / 10) * 10)
+        same = generated[(generated['product_type'] == row['product_type']) & (generated['price_usd'] <= limit)]
+        text = f"{row['product_type'].lower()} under ${limit}"
+        queries.append(_query(text, same['product_name'].tolist(), 'filtered'))
+    return queries
+
+
+def catalog_summary(catalog: pd.DataFrame) -> Dict[str, Optional[int]]:
+    product_ids = catalog['product_id'].astype(str)
+    return {
+        "products": len(catalog),
+        "store": int(product_ids.str.startswith('store-').sum()),
+        "dataset": int(product_ids.str.startswith('dataset-').sum()),
+        "generated": int(product_ids.str.startswith('synthetic-').sum()),
+    }
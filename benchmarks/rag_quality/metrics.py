@@ -0,0 +1,89 @@
+"""
+Retrieval metrics and baseline comparison for the RAG quality benchmark.
+"""
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+# Higher is better for quality metrics, lower for latency and memory
+HIGHER_IS_BETTER = ('recall', 'mrr')
+
+
+def recall_at_k(retrieved: Sequence[str], relevant: Iterable[str], k: int) -> float:
+    """Share of the relevant products found in the top k, out of at most k findable"""
+    relevant = set(relevant)
+    if not relevant:
+        return 0.0
+    return len(relevant.intersection(retrieved[:k])) / min(k, len(relevant))
+
+
+def reciprocal_rank(retrieved: Sequence[str], relevant: Iterable[str]) -> float:
+    relevant = set(relevant)
+    for rank, name in enumerate(retrieved, 1):
+        if name in relevant:
+            return 1.0 / rank
+    return 0.0
+
+
+def latency_summary(latencies_ms: List[float]) -> Dict[str, float]:
+    latencies = np.asarray(latencies_ms)
+    return {
+        "p50_ms": round(float(np.percentile(latencies, 50)), 3),
+        "p95_ms": round(float(np.percentile(latencies, 95)), 3),
+        "p99_ms": round(float(np.percentile(latencies, 99)), 3),
+        "mean_ms": round(float(latencies.mean()), 3),
+    }
+
+
+def flatten(results: Dict, prefix: str = '') -> Dict[str, float]:
+    """{"quality": {"all": {"recall@3": 0.9}}} -> {"quality.all.recall@3": 0.9}, numbers only"""
+    flat = {}
+    for key, value in results.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{name}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+
+def compare_to_baseline(results: Dict, baseline: Dict, quality_tolerance: float = 0.01,
+                        latency_tolerance: float = 0.25, memory_tolerance: float = 0.10) -> List[str]:
+    """
+    Regressions of results against a baseline run of the same configuration.
+
+    Quality metrics may drop by at most quality_tolerance (absolute); latency
+    and memory may grow by at most their tolerance (relative).
+
+    Returns:
+        list: One human-readable line per regressed metric (empty if none)
+    """
+    current, previous = flatten(results), flatten(baseline)
+    regressions = []
+    for name, old in sorted(previous.items()):
+        new = current.get(name)
+        if new is None or name.startswith('config.'):
+            continue
+        metric = name.rsplit('.', 1)[-1]
+        if metric.startswith(HIGHER_IS_BETTER):
+            if new < old - quality_tolerance:
+                regressions.append(f"{name}: {old:.4f} -> {new:.4f}")
+        elif name.startswith('latency.') and metric.endswith('_ms'):
+            if old > 0 and new > old * (1 + latency_tolerance):
+                regressions.append(f"{name}: {old:.3f} ms -> {new:.3f} ms")
+        elif name.startswith('memory.') and metric.endswith('_bytes'):
+            if old > 0 and new > old * (1 + memory_tolerance):
+                regressions.append(f"{name}: {old / 1e6:.1f} MB -> {new / 1e6:.1f} MB")
+    return regressions
+
+
+def check_baseline(results: Dict, baseline: Dict, **tolerances) -> Optional[List[str]]:
+    """
+    compare_to_baseline, if the baseline was recorded with the same configuration.
+
+    Returns:
+        list: Regressions (empty if none), or None when the configurations differ
+    """
+    if baseline.get("config") != results.get("config"):
+        return None
+    return compare_to_baseline(results, baseline, **tolerances)
@@ -574,6 +574,14 @@ async function sendMessage() {
     const modelSelect = document.getElementById('aiModelSelect');
     const selectedModel = modelSelect ? modelSelect.value : 'gemini';
     
+    // Stream the reply as it is generated; fall back to the JSON endpoint
+    // only if streaming is unsupported or the stream request is refused
+    try {
+        if (await streamChatReply(message, selectedModel)) return;
+    } catch (error) {
+        console.warn('Streaming failed, falling back to /chat:', error);
+    }
+    
     // Send to backend for processing
     fetch('/chat', {
         method: 'POST',
@@ -591,8 +599,9 @@ async function sendMessage() {
         removeTypingIndicator();
         console.log('Bot response:', data);
         
-        if (data.response) {
-            addChatMessage(data.response, 'bot');
+        const reply = data.reply || data.response;
+        if (reply) {
+            addChatMessage(reply, 'bot');
         } else if (data.error) {
             console.error('Error in response:', data.error);
             addChatMessage(`I'm sorry, but I encountered an error: ${data.error}`, 'bot');
@@ -618,6 +627,77 @@ async function sendMessage() {
     });
 }
 
+// Reads the Server-Sent Events of /chat/stream into a growing bot message.
+// Resolves to false if the stream could not be opened, so the caller can retry
+// with /chat; once it is open the model is already answering, so failures are
+// shown in the chat instead of asking again.
+async function streamChatReply(message, selectedModel) {
+    if (!window.ReadableStream || !window.TextDecoder) return false;
+    const response = await fetch('/chat/stream', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+            'Accept': 'text/event-stream'
+        },
+        body: JSON.stringify({
+            message: message,
+            model: selectedModel,
+            user_id: currentUser?.id || currentUser?.email || 'anonymous'
+        })
+    });
+    if (!response.ok || !response.body) return false;
+    
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    const messagesContainer = document.getElementById('chatbotMessages');
+    let buffer = '';
+    let reply = '';
+    let messageContent = null;
+    const showText = text => {
+        if (!messageContent) {
+            removeTypingIndicator();
+            messageContent = addChatMessage('', 'bot');
+        }
+        messageContent.textContent = text;
+        messagesContainer.scrollTop = messagesContainer.scrollHeight;
+    };
+    
+    try {
+        while (true) {
+            const { value, done } = await reader.read();
+            if (done) break;
+            buffer += decoder.decode(value, { stream: true });
+            let boundary;
+            while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+                const rawEvent = buffer.slice(0, boundary);
+                buffer = buffer.slice(boundary + 2);
+                let eventName = 'message';
+                let data = '';
+                rawEvent.split('\n').forEach(line => {
+                    if (line.startsWith('event: ')) eventName = line.slice(7);
+                    else if (line.startsWith('data: ')) data += line.slice(6);
+                });
+                if (!data) continue;
+                const payload = JSON.parse(data);
+                if (eventName === 'chunk') {
+                    reply += payload.text;
+                    showText(reply);
+                } else if (eventName === 'done') {
+                    showText(payload.reply || 'I apologize, but I received an unexpected response format. Please try again.');
+                } else if (eventName === 'error') {
+                    console.error('Error in response:', payload.error);
+                    showText(payload.reply || `I'm sorry, but I encountered an error: ${payload.error}`);
+                }
+            }
+        }
+    } catch (error) {
+        // Keep the partial reply rather than asking again
+        console.error('Chat stream interrupted:', error);
+    }
+    if (!messageContent) showText("I'm sorry, but the connection to the server was lost. Please try again.");
+    return true;
+}
+
 function sendQuickMessage(message) {
     document.getElementById('chatbotInput').value = message;
     sendMessage();
@@ -639,6 +719,7 @@ function addChatMessage(message, type) {
     
     messagesContainer.appendChild(messageDiv);
     messagesContainer.scrollTop = messagesContainer.scrollHeight;
+    return messageDiv.querySelector('.message-content');
 }
 
 function showTypingIndicator() {
@@ -2,6 +2,7 @@
 
 import os
 import sys
+import json
 import subprocess
 import uuid
 import logging
@@ -9,12 +10,9 @@ from logging.handlers import RotatingFileHandler
 import pandas as pd
 import numpy as np
 import google.generativeai as genai
-import faiss
-import pickle
-from flask import Flask, request, jsonify, render_template
+from flask import Flask, Response, request, jsonify, render_template, stream_with_context
 from dotenv import load_dotenv
 from flask_cors import CORS
-from sentence_transformers import SentenceTransformer
 from flask_socketio import SocketIO
 from flask import send_from_directory
 from routes.main_routes import main_bp
@@ -45,8 +43,7 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Import the function from embedFunc.py
-# Import from parent directory's renamed Vector_Store folder
+# Import the shared retrieval engine from the Vector_Store package
 try:
     parent_dir = os.path.dirname(os.path.dirname(__file__))
     vector_store_path = os.path.join(parent_dir, 'Vector_Store')
@@ -57,16 +54,12 @@ try:
     if vector_store_path not in sys.path:
         sys.path.insert(0, vector_store_path)
     
-    # Import the function
-    from embedFunc import generate_embeddings_and_cache  # type: ignore
-    print("[OK] Successfully imported generate_embeddings_and_cache from Vector_Store directory")
+    from Vector_Store.retrieval_engine import get_retrieval_engine
+    print("[OK] Successfully imported retrieval engine from Vector_Store directory")
 except ImportError as e:
-    print(f"[ERROR] Failed to import generate_embeddings_and_cache: {e}")
+    print(f"[ERROR] Failed to import retrieval engine: {e}")
     print("[WARNING] RAG functionality will not work.")
-    # Define a dummy function to prevent runtime errors
-    def generate_embeddings_and_cache():
-        print("Warning: embedFunc module not available, skipping embedding generation")
-        return True
+    get_retrieval_engine = None
 
 # Import custom service modules with error handling
 try:
@@ -173,11 +166,38 @@ app.register_blueprint(studio_bp)
 def health_check():
     return jsonify({
         "status": "healthy",
-        "rag_available": faiss_index is not None and len(product_contexts_for_llm) > 0,
+        "rag_available": retrieval_engine is not None and retrieval_engine.is_ready,
+        "rag_state": retrieval_engine.load_state if retrieval_engine is not None else None,
         "gemini_available": gemini_manager is not None and gemini_manager.is_configured,
-        "sentence_model_available": sentence_model is not None
+        "sentence_model_available": retrieval_engine is not None and retrieval_engine.sentence_model is not None,
+        "retrieval_engine": retrieval_engine.get_stats() if retrieval_engine is not None else None,
+        "response_cache": ai_service.get_cache_stats() if ai_service is not None else None,
+        "intent_router": ai_service.get_intent_stats() if ai_service is not None else None,
+        "llm_gateway": ai_service.get_gateway_stats() if ai_service is not None else None,
+        "llm_coalescing": ai_service.get_coalescing_stats() if ai_service is not None else None,
+        "model_router": ai_service.get_routing_stats() if ai_service is not None else None
     })
 
+# Liveness: the process is up and serving, whatever is still warming up
+@app.route('/health/live')
+def liveness_check():
+    return jsonify({"status": "alive"})
+
+# Readiness: 200 once retrieval is loaded; until then /chat answers without product context
+@app.route('/health/ready')
+def readiness_check():
+    if ai_service is not None:
+        components = ai_service.readiness()
+    else:
+        components = {"ai_service": {"ready": False}}
+    components["gemini"] = {"ready": gemini_manager is not None and gemini_manager.is_configured}
+    ready = retrieval_engine is not None and retrieval_engine.is_ready
+    state = retrieval_engine.load_state if retrieval_engine is not None else "unavailable"
+    return jsonify({
+        "status": "ready" if ready else state,
+        "components": components,
+    }), 200 if ready else 503
+
 # Add test endpoint for network connectivity
 @app.route('/test-connection', methods=['GET', 'POST'])
 def test_connection():
@@ -200,12 +220,8 @@ def handle_preflight():
         response.headers.add('Access-Control-Allow-Credentials', "true")
         return response
 
-# --- Global Variables for RAG ---
-# product_df is loaded if cache is hit or after embedding generation
-product_df = pd.DataFrame() 
-sentence_model = None # For query embedding
-faiss_index = None
-product_contexts_for_llm = []
+# --- Shared RAG engine (model, FAISS index and contexts are loaded once per process) ---
+retrieval_engine = get_retrieval_engine() if get_retrieval_engine else None
 
 
 # --- Initialize Gemini Manager ---
@@ -224,66 +240,27 @@ except Exception as e:
 
 # --- RAG Setup: Load data from cache or trigger embedding generation ---
 def initialize_rag_components():
-    global product_df, sentence_model, faiss_index, product_contexts_for_llm
-    
-    # Define cache directory and file paths
-    cache_dir = os.path.join(os.path.dirname(__file__), 'cache')
-    parent_cache_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'cache')
-    
-    if os.path.exists(parent_cache_dir):
-        cache_dir = parent_cache_dir
-        print(f"app.py: Using parent directory cache at {parent_cache_dir}")
-    else:
-        print(f"app.py: Using local cache at {cache_dir}")
-        
-    faiss_index_path = os.path.join(cache_dir, "faiss_index.idx")
-    contexts_path = os.path.join(cache_dir, "product_contexts.pkl")
-
-    # 1. Initialize Sentence Transformer model
-    try:
-        sentence_model = SentenceTransformer('all-MiniLM-L6-v2')
-        print("app.py: SentenceTransformer model loaded successfully.")
-    except Exception as e:
-        print(f"app.py: CRITICAL: Failed to load SentenceTransformer model: {e}")
-        sentence_model = None
-        # If model fails, RAG cannot work. Exit the initialization.
+    """
+    Start loading the sentence model, FAISS index and contexts (and checking
+    Local AI) in a background thread so the server can bind right away.
+    /health/ready reports progress. Safe to call repeatedly.
+    """
+    if retrieval_engine is None:
+        print("app.py: Retrieval engine not available. RAG will not work.")
         return
 
-    # 2. Attempt to load from cache
-    if os.path.exists(faiss_index_path) and os.path.exists(contexts_path):
-        print(f"app.py: Loading from cache: {cache_dir}...")
-        try:
-            faiss_index = faiss.read_index(faiss_index_path)
-            with open(contexts_path, 'rb') as f:
-                product_contexts_for_llm = pickle.load(f)
-            print(f"app.py: FAISS index ({faiss_index.ntotal} vectors) and contexts loaded from cache.")
-            return # Success
-        except Exception as e_cache:
-            print(f"app.py: Error loading from cache: {e_cache}. Will try to regenerate.")
-            faiss_index = None
-            product_contexts_for_llm = []
-
-    # 3. If cache fails or doesn't exist, generate new embeddings
-    print("app.py: No valid cache found. Calling embedFunc.py to generate embeddings...")
-    try:
-        generate_embeddings_and_cache() # This function should create and save the cache files
-        print("app.py: embedFunc.py completed. Attempting to load newly generated cache...")
-        
-        # After generation, try to load them again
-        if os.path.exists(faiss_index_path) and os.path.exists(contexts_path):
-            faiss_index = faiss.read_index(faiss_index_path)
-            with open(contexts_path, 'rb') as f:
-                product_contexts_for_llm = pickle.load(f)
-            print(f"app.py: Successfully loaded newly generated FAISS index and contexts.")
-        else:
-            print("app.py: CRITICAL ERROR - Cache files not found after generation. RAG will not work.")
-            faiss_index = None
-            product_contexts_for_llm = []
+    # The engine is shared with AIService, so only one load ever runs
+    if ai_service is not None:
+        ai_service.start_warm_up(generate_if_missing=True)
+    else:
+        retrieval_engine.start_background_load(generate_if_missing=True)
+
 
-    except Exception as e_embed_func:
-        print(f"app.py: CRITICAL ERROR during embedding generation or loading: {e_embed_func}")
-        faiss_index = None
-        product_contexts_for_llm = []
+# WSGI servers import the app without running __main__: warm up on the first request instead
+@app.before_request
+def ensure_warm_up():
+    if retrieval_engine is not None and retrieval_engine.load_state == 'cold':
+        initialize_rag_components()
 
 
 @app.route('/request-agent', methods=['POST'])
@@ -327,28 +304,26 @@ def room_status(room_id):
 ai_service = None
 try:
     from services.ai_service import AIService
-    # Import requests for API testing
-    import requests
-    
-    # Test Local AI connection if URL is configured
-    local_ai_url = os.getenv('LOCAL_AI_URL')
-    if local_ai_url:
-        try:
-            logger.info(f"Testing connection to Local AI at {local_ai_url}")
-            response = requests.get(local_ai_url.replace('/api/generate', '/api/tags'), timeout=5)
-            if response.status_code == 200:
-                logger.info("Successfully connected to Local AI service")
-            else:
-                logger.warning(f"Local AI service returned status code {response.status_code}")
-        except Exception as e:
-            logger.error(f"Failed to connect to Local AI service at {local_ai_url}: {str(e)}")
-    
-    ai_service = AIService()
+    # Local AI check and RAG loading happen in the background (initialize_rag_components)
+    ai_service = AIService(lazy=True)
     logger.info("AI Service initialized")
 except Exception as e:
     logger.error(f"Error initializing AI Service: {e}", exc_info=True)
     ai_service = None
 
+def get_personalized_prompt(user_id, user_message):
+    """Personalized prompt for a signed-in user, or None"""
+    if not user_id:
+        return None
+    try:
+        from services.personalized_agent.agent_manager import PersonalizedAgentManager
+        agent_manager = PersonalizedAgentManager()
+        return agent_manager.generate_personalized_prompt(user_id, user_message)
+    except Exception as e:
+        print(f"Error getting personalized prompt: {e}")
+        # Continue with standard flow
+        return None
+
 @app.route('/chat', methods=['POST'])
 def chat():
     try:
@@ -370,30 +345,23 @@ def chat():
         if not user_message:
             return jsonify({"error": "No message provided"}), 400
             
-        # Check if the selected model is available
-        if model == 'gemini' and (not gemini_manager or not gemini_manager.is_configured):
+        # Check if the selected model, or a model to fail over to, is available
+        if model == 'gemini' and not ai_service.model_available(model, gemini_manager):
             return jsonify({
                 "reply": "I'm sorry, the Gemini AI service is currently unavailable. Please try again later or switch to Local AI.",
                 "session_id": session_id
             })
 
         # Initialize personalized prompt if user_id is provided
-        personalized_prompt = None
-        if user_id:
-            try:
-                from services.personalized_agent.agent_manager import PersonalizedAgentManager
-                agent_manager = PersonalizedAgentManager()
-                personalized_prompt = agent_manager.generate_personalized_prompt(user_id, user_message)
-            except Exception as e:
-                print(f"Error getting personalized prompt: {e}")
-                # Continue with standard flow
+        personalized_prompt = get_personalized_prompt(user_id, user_message)
                 
         # Generate response using the selected model with RAG support
         try:
             response = ai_service.generate_response(
                 message=user_message,
                 model=model,
-                gemini_manager=gemini_manager if model == 'gemini' else None,
+                # Also passed for local AI requests, which may fail over to Gemini
+                gemini_manager=gemini_manager,
                 personalized_prompt=personalized_prompt,
                 session_id=session_id
             )
@@ -401,7 +369,14 @@ def chat():
             return jsonify({
                 "reply": response.get("reply", "I'm sorry, I couldn't generate a response."),
                 "session_id": session_id,
-                "model": response.get("model", model)
+                "model": response.get("model", model),
+                # False while the retrieval engine is still warming up (answer has no product context)
+                "rag_used": ai_service.retrieval_engine.is_ready,
+                "cached": response.get("cached", False),
+                # Set when the intent router answered without an LLM call
+                "intent": response.get("intent"),
+                # Set when the requested model was failing and another one answered
+                "routed_from": response.get("routed_from")
             })
             
         except Exception as e:
@@ -428,6 +403,80 @@ def chat():
             "session_id": session_id if 'session_id' in locals() else str(uuid.uuid4())
         }), 500
 
+def sse_event(event, data):
+    """One Server-Sent Events message with a JSON payload"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+# Streaming variant of /chat: the reply is sent as Server-Sent Events while the
+# model generates it ("chunk" events with the next piece of text, then one
+# "done" event with the same fields as the /chat JSON response, or one "error"
+# event with the error and the reply to show instead if the model failed)
+@app.route('/chat/stream', methods=['POST'])
+def chat_stream():
+    if not ai_service:
+        return jsonify({"error": "The AI service is not properly configured. Please contact support."}), 500
+
+    data = request.json
+    if not data:
+        return jsonify({"error": "No data provided"}), 400
+
+    user_message = data.get('message')
+    user_id = data.get('user_id')
+    session_id = data.get('session_id', str(uuid.uuid4()))
+    model = data.get('model', 'gemini')  # Default to 'gemini' if not specified
+
+    if not user_message:
+        return jsonify({"error": "No message provided"}), 400
+
+    # Check if the selected model, or a model to fail over to, is available
+    if model == 'gemini' and not ai_service.model_available(model, gemini_manager):
+        return jsonify({"error": "The Gemini AI service is currently unavailable. Please try again later or switch to Local AI."}), 503
+
+    personalized_prompt = get_personalized_prompt(user_id, user_message)
+
+    def generate():
+        events = None
+        try:
+            events = ai_service.generate_response_stream(
+                message=user_message,
+                model=model,
+                gemini_manager=gemini_manager,
+                personalized_prompt=personalized_prompt,
+                session_id=session_id
+            )
+            for event in events:
+                if event["type"] == "chunk":
+                    yield sse_event("chunk", {"text": event["text"]})
+                    continue
+                done = {
+                    "reply": event.get("reply") or "I'm sorry, I couldn't generate a response.",
+                    "session_id": session_id,
+                    "model": event.get("model", model),
+                    "rag_used": ai_service.retrieval_engine.is_ready,
+                    "cached": event.get("cached", False),
+                    "intent": event.get("intent"),
+                    "routed_from": event.get("routed_from")
+                }
+                if "error" in event:
+                    done["error"] = event["error"]
+                    yield sse_event("error", done)
+                else:
+                    yield sse_event("done", done)
+        except Exception as e:
+            logger.error(f"Error streaming AI response: {e}", exc_info=True)
+            yield sse_event("error", {
+                "reply": f"I'm sorry, I encountered an error processing your request: {str(e)}",
+                "session_id": session_id,
+                "error": str(e)
+            })
+        finally:
+            # A disconnected client closes this generator; stop generating for it
+            if events is not None:
+                events.close()
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
 # Add basic chatbot route for simple interface
 @app.route('/chatbot')
 def chatbot():
@@ -693,11 +742,11 @@ if __name__ == '__main__':
     
     print("Initializing application...")
     
-    # Initialize the RAG components when the app starts
-    print("Setting up RAG components...")
+    # Heavy components load in the background while the server starts
+    print("Setting up RAG components in the background...")
     try:
         initialize_rag_components()
-        print("✅ RAG components initialized successfully")
+        print("✅ RAG warm-up started (see /health/ready)")
     except Exception as e:
         print(f"⚠️ Warning: RAG initialization failed: {e}")
         print("App will continue with basic functionality")
@@ -708,7 +757,10 @@ if __name__ == '__main__':
     print("  - http://localhost:5000/chatbot (Chatbot interface)")
     print("  - http://localhost:5000/enhanced (Enhanced experience)")
     print("  - http://localhost:5000/chat (API endpoint)")
+    print("  - http://localhost:5000/chat/stream (Streaming API endpoint, Server-Sent Events)")
     print("  - http://localhost:5000/health (Health check)")
+    print("  - http://localhost:5000/health/live (Liveness)")
+    print("  - http://localhost:5000/health/ready (Readiness, per-component load times)")
     print("=" * 60)
     
     try:
@@ -4,42 +4,139 @@ Handles interactions with different AI models (Gemini, Local AI, etc.)
 with RAG (Retrieval-Augmented Generation) support
 """
 import os
+import sys
+import json
+import time
+import threading
+import functools
 import requests
 import logging
-import numpy as np
-import faiss
-from typing import Optional, Dict, Any, List
-from sentence_transformers import SentenceTransformer
+from typing import Optional, Dict, Any, Iterator, List
+
+# Make the shared Vector_Store package importable
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from Vector_Store.retrieval_engine import get_retrieval_engine
+from Vector_Store.semantic_cache import SemanticResponseCache
+from Vector_Store.product_metadata import filters_key
+
+try:
+    from services.context_packer import ContextPacker, TokenCounter
+    from services.intent_router import IntentRouter, greeting_reply
+    from services.http_client import get_local_ai_session, timeouts
+    from services.llm_gateway import GatewayError, GatewayOverloaded, GatewayTimeout, get_llm_gateway
+    from services.single_flight import FlightAbandoned, FlightTimeout, SingleFlight
+    from services.model_router import ModelRouter
+except ImportError:
+    from chatbot.services.context_packer import ContextPacker, TokenCounter
+    from chatbot.services.intent_router import IntentRouter, greeting_reply
+    from chatbot.services.http_client import get_local_ai_session, timeouts
+    from chatbot.services.llm_gateway import GatewayError, GatewayOverloaded, GatewayTimeout, get_llm_gateway
+    from chatbot.services.single_flight import FlightAbandoned, FlightTimeout, SingleFlight
+    from chatbot.services.model_router import ModelRouter
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
 class AIService:
-    def __init__(self):
+    def __init__(self, lazy: bool = False):
+        """
+        Args:
+            lazy: Skip checking Local AI and loading the retrieval engine here;
+                call start_warm_up() once the server is accepting requests
+        """
         self.local_ai_url = os.environ.get('LOCAL_AI_URL')
-        self.faiss_index = None
-        self.product_contexts = []
-        self.sentence_model = None
-        self._test_local_ai_connection()
-        self._initialize_rag_components()
-        
-    def _initialize_rag_components(self):
-        """Initialize RAG components (FAISS index, sentence model, etc.)"""
+        self.retrieval_engine = get_retrieval_engine()
+        # Seconds a request waits for a warming-up retrieval engine before answering without RAG
+        self.warmup_wait_seconds = float(os.environ.get('RAG_WARMUP_WAIT_SECONDS', 0))
+        self.local_ai_status = {"reachable": None, "check_seconds": None}
+        self._warmup_thread = None
+        # Answers to earlier non-personalized questions, reused for paraphrases
+        self.response_cache = None
+        if os.environ.get('RESPONSE_CACHE_ENABLED', 'true').lower() in ('1', 'true', 'yes'):
+            self.response_cache = SemanticResponseCache(
+                threshold=float(os.environ.get('RESPONSE_CACHE_THRESHOLD', 0.92)),
+                max_size=int(os.environ.get('RESPONSE_CACHE_SIZE', 1024)),
+                ttl_seconds=float(os.environ.get('RESPONSE_CACHE_TTL_SECONDS', 3600)),
+            )
+        # Created on first use, once the query encoder (and its tokenizer) is loaded
+        self.context_packer = None
+        self.context_packing_enabled = os.environ.get('CONTEXT_PACKING', 'true').lower() in ('1', 'true', 'yes')
+        # Concurrency limits, wait queues and deadlines per LLM backend
+        self.llm_gateway = get_llm_gateway()
+        # Identical prompts already being answered wait for that answer instead of calling the model again
+        self.single_flight = None
+        if os.environ.get('LLM_COALESCING_ENABLED', 'true').lower() in ('1', 'true', 'yes'):
+            self.single_flight = SingleFlight()
+        # Fails requests over to the other model while the requested one is failing
+        self.model_router = None
+        if os.environ.get('MODEL_ROUTER_ENABLED', 'true').lower() in ('1', 'true', 'yes'):
+            self.model_router = ModelRouter.from_env()
+            self.model_router.set_probe('local-ai', self._test_local_ai_connection)
+        # Greetings, FAQs and "show me ..." commands answered without an LLM call
+        self.intent_router = None
+        if os.environ.get('INTENT_ROUTER_ENABLED', 'true').lower() in ('1', 'true', 'yes'):
+            self.intent_router = IntentRouter(
+                encode=lambda texts: self.retrieval_engine.encode(texts),
+                search=lambda query, top_k: self._search_rag(query, top_k=top_k,
+                                                             filters=self.retrieval_engine.extract_filters(query)),
+            )
+        if not lazy:
+            self._test_local_ai_connection()
+            self._initialize_rag_components()
+
+    def start_warm_up(self, generate_if_missing: bool = False) -> threading.Thread:
+        """Check Local AI and load the RAG components without blocking the caller"""
+        if self._warmup_thread is None:
+            # Started before returning (it has its own thread), so readiness reports 'loading' right away
+            self.retrieval_engine.start_background_load(generate_if_missing=generate_if_missing)
+            self._warmup_thread = threading.Thread(
+                target=self._test_local_ai_connection, name="ai-service-warmup", daemon=True
+            )
+            self._warmup_thread.start()
+        return self._warmup_thread
+
+    def readiness(self) -> Dict[str, Any]:
+        """Load state and load time of every component a response depends on"""
+        stats = self.retrieval_engine.get_stats()
+        return {
+            "retrieval_engine": {"state": stats["state"], "load_seconds": stats["total_load_seconds"],
+                                 "error": stats["load_error"]},
+            "sentence_model": {"ready": self.retrieval_engine.sentence_model is not None,
+                               "load_seconds": stats["model_load_seconds"]},
+            "faiss_index": {"ready": self.retrieval_engine.faiss_index is not None,
+                            "vectors": stats["vectors"], "load_seconds": stats["index_load_seconds"]},
+            "local_ai": dict(self.local_ai_status, configured=bool(self.local_ai_url)),
+        }
+
+    def get_intent_stats(self) -> Optional[Dict[str, Any]]:
+        """Per-intent hit counts and rates of the intent router, or None if it is disabled"""
+        return self.intent_router.get_stats() if self.intent_router is not None else None
+
+    def get_gateway_stats(self) -> Dict[str, Any]:
+        """Per-backend concurrency, queue and deadline counters of the LLM gateway"""
+        return self.llm_gateway.get_stats()
+
+    def get_coalescing_stats(self) -> Optional[Dict[str, Any]]:
+        """Backend calls made and saved by coalescing identical prompts (None when disabled)"""
+        return self.single_flight.get_stats() if self.single_flight is not None else None
+
+    def get_routing_stats(self) -> Optional[Dict[str, Any]]:
+        """Routing decisions, circuit states and rolling latency per backend (None when disabled)"""
+        return self.model_router.get_stats() if self.model_router is not None else None
+
+    def get_cache_stats(self) -> Optional[Dict[str, Any]]:
+        """Hit rate and size of the semantic response cache (None when disabled)"""
+        return self.response_cache.get_stats() if self.response_cache is not None else None
+
+    def _initialize_rag_components(self, generate_if_missing: bool = False):
+        """Initialize RAG components through the shared retrieval engine"""
         try:
-            # Load sentence transformer model
-            logger.info("Loading sentence transformer model...")
-            self.sentence_model = SentenceTransformer('all-MiniLM-L6-v2')
-            
-            # Create cache directory if it doesn't exist
-            cache_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'cache')
-            os.makedirs(cache_dir, exist_ok=True)
-            logger.info(f"Using cache directory: {cache_dir}")
-            
-            # Load or create FAISS index and product contexts
-            self._load_rag_components()
-            
-            if self.faiss_index is not None and self.product_contexts:
-                logger.info(f"RAG components initialized successfully with {len(self.product_contexts)} product contexts")
+            if self.retrieval_engine.load(generate_if_missing=generate_if_missing):
+                logger.info(f"RAG components initialized successfully with "
+                            f"{len(self.retrieval_engine.product_contexts)} product contexts")
             else:
                 logger.warning("RAG components not fully initialized. Some features may be limited.")
                 
@@ -47,98 +144,89 @@ class AIService:
             logger.error(f"Error initializing RAG components: {e}", exc_info=True)
             logger.warning("RAG features will be disabled due to initialization error")
     
-    def _load_rag_components(self):
-        """Load FAISS index and product contexts from cache"""
-        # Initialize to empty values
-        self.faiss_index = None
-        self.product_contexts = []
-        
-        # Define possible cache locations (in order of priority)
-        possible_cache_dirs = [
-            # 1. Check in the chatbot/cache directory (current expected location)
-            os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'cache'),
-            # 2. Check in the root cache directory
-            os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'cache'),
-        ]
-        
-        for cache_dir in possible_cache_dirs:
-            try:
-                faiss_index_path = os.path.join(cache_dir, "faiss_index.idx")
-                contexts_path = os.path.join(cache_dir, "product_contexts.pkl")
-                
-                # Check if both required files exist in this location
-                if os.path.exists(faiss_index_path) and os.path.exists(contexts_path):
-                    logger.info(f"Found RAG cache files in: {cache_dir}")
-                    
-                    # Load FAISS index
-                    logger.info(f"Loading FAISS index from {faiss_index_path}")
-                    self.faiss_index = faiss.read_index(faiss_index_path)
-                    logger.info(f"Loaded FAISS index with {self.faiss_index.ntotal} vectors")
-                    
-                    # Load product contexts
-                    logger.info(f"Loading product contexts from {contexts_path}")
-                    import pickle
-                    with open(contexts_path, 'rb') as f:
-                        self.product_contexts = pickle.load(f)
-                    logger.info(f"Loaded {len(self.product_contexts)} product contexts")
-                    
-                    # Validate that the number of contexts matches the FAISS index
-                    if self.faiss_index.ntotal != len(self.product_contexts):
-                        logger.error(f"Mismatch between FAISS index size ({self.faiss_index.ntotal}) "
-                                   f"and number of contexts ({len(self.product_contexts)}). ")
-                        self.faiss_index = None
-                        self.product_contexts = []
-                        continue  # Try next location
-                        
-                    # If we got here, we successfully loaded both files
-                    logger.info(f"Successfully loaded RAG components from {cache_dir}")
-                    return
-                    
-            except Exception as e:
-                logger.warning(f"Error loading RAG cache from {cache_dir}: {e}")
-                self.faiss_index = None
-                self.product_contexts = []
-                continue  # Try next location
-        
-        # If we get here, we couldn't load from any location
-        logger.warning("Could not load RAG cache from any known location. RAG features will be disabled.")
-        logger.info("To enable RAG, ensure the following files exist in a cache directory:")
-        logger.info("  - faiss_index.idx")
-        logger.info("  - product_contexts.pkl")
-        
-        # No need for a separate except block here as we're already in a try-except in _initialize_rag_components
-    
-    def _search_rag(self, query: str, top_k: int = 3) -> List[str]:
-        """Search for relevant documents using RAG"""
-        # Check if RAG components are available
-        if not all([self.faiss_index, self.product_contexts, self.sentence_model]):
-            logger.warning("RAG components not fully initialized - falling back to empty context")
+    def _search_rag(self, query: str, top_k: int = 3,
+                    filters: Optional[Dict[str, Any]] = None) -> List[str]:
+        """
+        Search for relevant documents using RAG
+
+        Args:
+            query: The user's message
+            top_k: Number of product contexts to return
+            filters: Optional price/stock/category/skin type constraints
+        """
+        # Check if RAG components are available, giving a warm-up in progress a moment to finish
+        if not self.retrieval_engine.is_ready and not self.retrieval_engine.wait_until_ready(self.warmup_wait_seconds):
+            logger.warning(f"RAG components not ready ({self.retrieval_engine.load_state}) "
+                           "- falling back to empty context")
             return []
             
         try:
             logger.debug(f"Performing RAG search for query: {query[:50]}...")
-            
-            # Encode query
-            query_embedding = self.sentence_model.encode([query], show_progress_bar=False).astype('float32')
-            
-            # Search FAISS index
-            distances, indices = self.faiss_index.search(query_embedding, top_k)
-            
-            # Get relevant contexts
-            relevant_contexts = []
-            for i, idx in enumerate(indices[0]):
-                if 0 <= idx < len(self.product_contexts):
-                    distance = distances[0][i]
-                    logger.debug(f"Found relevant context at index {idx} with distance {distance:.4f}")
-                    relevant_contexts.append(self.product_contexts[idx])
-                
+            relevant_contexts = self.retrieval_engine.search(query, top_k=top_k, filters=filters)
+            if filters and not relevant_contexts:
+                # Nothing matches every constraint; closest products are better than no context
+                logger.info(f"No products match filters {filters} - searching without them")
+                relevant_contexts = self.retrieval_engine.search(query, top_k=top_k)
             logger.debug(f"Found {len(relevant_contexts)} relevant contexts")
             return relevant_contexts
             
         except Exception as e:
             logger.error(f"Error in RAG search: {e}", exc_info=True)
             return []
-        
+
+    def _cached_response_key(self, message: str, model: str, filters: Dict[str, Any],
+                             personalized_prompt: Optional[str]):
+        """
+        (query embedding, namespace) under which the answer to message can be
+        cached, or None if it must not be: personalized answers, and anything
+        asked before the retrieval engine is ready.
+        """
+        if self.response_cache is None or personalized_prompt or not self.retrieval_engine.is_ready:
+            return None
+        try:
+            embedding = self.retrieval_engine.embed_query(message)
+        except Exception as e:
+            logger.warning(f"Could not embed message for the response cache: {e}")
+            return None
+        # Answers quote catalog products, so they are only valid for the index they came from
+        self.response_cache.ensure_version(self.retrieval_engine.index_version)
+        canonical_model = 'gemini' if model.lower() == 'gemini' else 'local-ai'
+        return embedding, (canonical_model, filters_key(filters))
+
+    def _route_intent(self, message: str) -> Optional[Dict[str, Any]]:
+        """Templated answer for message if it has a confident intent, else None"""
+        if self.intent_router is None:
+            # Plain greetings are still answered without an LLM call
+            reply = greeting_reply(message)
+            return {"intent": "greeting", "reply": reply} if reply is not None else None
+        embedding = None
+        # Embedding similarity only once the encoder is loaded; the embedding
+        # is cached and reused by retrieval and the response cache
+        if self.retrieval_engine.is_ready:
+            try:
+                embedding = self.retrieval_engine.embed_query(message)
+            except Exception as e:
+                logger.warning(f"Could not embed message for intent routing: {e}")
+        return self.intent_router.route(message, embedding)
+
+    def _pack_contexts(self, message: str, contexts: List[str], model: str) -> List[str]:
+        """Trim the retrieved contexts to the model's prompt token budget"""
+        # Only the local AI prompt includes the product contexts; _gemini_prompt leaves them
+        # out, so packing them for Gemini would save nothing
+        if not self.context_packing_enabled or not contexts or model.lower() == 'gemini':
+            return contexts
+        try:
+            if self.context_packer is None:
+                self.context_packer = ContextPacker(TokenCounter.from_encoder(self.retrieval_engine.sentence_model))
+            packed, stats = self.context_packer.pack(message, contexts, model)
+        except Exception as e:
+            logger.error(f"Context packing failed, using full contexts: {e}", exc_info=True)
+            return contexts
+        logger.info(f"Context packing ({model}): {stats['original_tokens']} -> {stats['packed_tokens']} tokens, "
+                    f"{stats['saved_tokens']} saved (budget {stats['budget']}, "
+                    f"{stats['truncated_fields']} fields truncated, {stats['dropped_fields']} dropped)")
+        return packed
+
     def _test_local_ai_connection(self):
         """Test the connection to the Local AI service"""
         if not self.local_ai_url:
@@ -146,57 +234,110 @@ class AIService:
             return False
             
         test_url = self.local_ai_url.replace('/api/generate', '/api/tags')
+        start = time.perf_counter()
+        reachable = False
         try:
             logger.info(f"Testing connection to Local AI at {test_url}")
-            response = requests.get(test_url, timeout=5)
+            response = get_local_ai_session().get(test_url, timeout=timeouts(5))
             if response.status_code == 200:
                 logger.info("Successfully connected to Local AI service")
-                return True
+                reachable = True
             else:
                 logger.warning(f"Local AI service returned status code {response.status_code}")
-                return False
         except requests.exceptions.RequestException as e:
             logger.error(f"Failed to connect to Local AI service at {test_url}: {str(e)}")
-            return False
+        self.local_ai_status = {"reachable": reachable, "check_seconds": round(time.perf_counter() - start, 3)}
+        return reachable
         
-    def generate_response(self, 
-                        message: str, 
-                        model: str = 'gemini', 
-                        gemini_manager = None,
-                        personalized_prompt: Optional[str] = None,
-                        **kwargs) -> Dict[str, Any]:
+    def _backend_name(self, model: str) -> str:
+        if model.lower() == 'gemini':
+            return 'gemini'
+        if model.lower() in ['local', 'local-ai', 'local_ai']:
+            return 'local-ai'
+        raise ValueError(f"Unsupported model: {model}")
+
+    def _available_backends(self, gemini_manager) -> List[str]:
+        available = []
+        if gemini_manager is not None and getattr(gemini_manager, 'is_configured', True):
+            available.append('gemini')
+        if self.local_ai_url:
+            available.append('local-ai')
+        return available
+
+    def model_available(self, model: str, gemini_manager=None) -> bool:
+        """Whether model, or with model routing enabled a backend to fail over to, can answer"""
+        available = self._available_backends(gemini_manager)
+        return self._backend_name(model) in available or (self.model_router is not None and bool(available))
+
+    def _probe_gemini(self, gemini_manager) -> bool:
+        healthy, _ = gemini_manager.test_generation()
+        return healthy
+
+    def _choose_backend(self, model: str, gemini_manager) -> str:
+        """The backend that answers a request for model: model itself unless the router fails it over"""
+        preferred = self._backend_name(model)
+        if self.model_router is None:
+            return preferred
+        if gemini_manager is not None and hasattr(gemini_manager, 'test_generation'):
+            self.model_router.set_probe('gemini', functools.partial(self._probe_gemini, gemini_manager))
+        backend, _ = self.model_router.choose(preferred, self._available_backends(gemini_manager))
+        return backend
+
+    def _timed(self, backend: str, generate):
+        """generate, reporting its latency and outcome to the model router"""
+        if self.model_router is None:
+            return generate
+
+        def timed():
+            start = time.perf_counter()
+            ok = False
+            try:
+                response = generate()
+                ok = "error" not in response
+                return response
+            finally:
+                self.model_router.record(backend, time.perf_counter() - start, ok)
+        return timed
+
+    def _prepare_response(self, message: str, model: str, personalized_prompt: Optional[str],
+                          gemini_manager=None):
         """
-        Generate a response using the specified model with RAG support
-        
-        Args:
-            message: The user's message
-            model: The model to use ('gemini' or 'local-ai')
-            gemini_manager: GeminiManager instance (required for 'gemini' model)
-            personalized_prompt: Optional personalized prompt to include in the context
-            **kwargs: Additional model-specific parameters
-            
+        Everything before the model call: a templated or cached answer if there
+        is one, otherwise the backend to ask and the prompt context with the
+        retrieved products.
+
         Returns:
-            Dict containing the response and metadata
+            tuple: (answer, None, None, None) for a routed or cached answer,
+                otherwise (None, backend, context, cache_key)
         """
-        # Check for simple greetings
-        greetings = [
-            'hi', 'hello', 'hey', 'hi there', 'hello there', 'hey there',
-            'good morning', 'good afternoon', 'good evening', 'greetings',
-            'hi!', 'hello!', 'hey!', 'hi there!', 'hello there!', 'hey there!'
-        ]
-        
-        # Clean the message for comparison
-        clean_message = message.lower().strip(" .,!?")
-        
-        # If it's just a greeting, return a friendly response
-        if clean_message in greetings:
-            return {
-                "reply": "Hello! I'm your Sephora beauty assistant. How can I help you with your beauty and skincare needs today?",
-                "model": model
-            }
-            
-        # Get relevant context using RAG
-        relevant_contexts = self._search_rag(message)
+        # Greetings, FAQs and browse commands have templated answers
+        routed = self._route_intent(message)
+        if routed is not None:
+            return {"reply": routed["reply"], "model": model, "intent": routed["intent"]}, None, None, None
+
+        # Get relevant context using RAG, restricted to products matching any
+        # budget, stock, category or skin type constraints in the message
+        filters = self.retrieval_engine.extract_filters(message)
+        if filters:
+            logger.debug(f"Search filters from message: {filters}")
+
+        # A paraphrase of a question answered before skips retrieval and the LLM call
+        cache_key = self._cached_response_key(message, model, filters, personalized_prompt)
+        if cache_key is not None:
+            cached = self.response_cache.get(*cache_key)
+            if cached is not None:
+                logger.debug(f"Semantic cache hit for: {message[:50]}...")
+                return dict(cached, cached=True), None, None, None
+
+        # Decided before packing: the token budget depends on the backend
+        backend = self._choose_backend(model, gemini_manager)
+        if backend != self._backend_name(model):
+            # The fallback model's answer is not cached as the requested model's
+            cache_key = None
+
+        relevant_contexts = self._search_rag(message, filters=filters)
+        # Keep the prompt within the model's context budget, most relevant fields first
+        relevant_contexts = self._pack_contexts(message, relevant_contexts, backend)
         
         # Prepare context for the prompt
         rag_context = ""
@@ -218,26 +359,231 @@ class AIService:
         
         # Add RAG context to the prompt
         context += rag_context
+        return None, backend, context, cache_key
+
+    def _cache_response(self, cache_key, response: Dict[str, Any], model: str):
+        # Error replies are not worth repeating to the next shopper
+        if cache_key is not None and "error" not in response and response.get("reply"):
+            self.response_cache.put(cache_key[0], {"reply": response["reply"], "model": response.get("model", model)},
+                                    cache_key[1])
+
+    def generate_response(self, 
+                        message: str, 
+                        model: str = 'gemini', 
+                        gemini_manager = None,
+                        personalized_prompt: Optional[str] = None,
+                        **kwargs) -> Dict[str, Any]:
+        """
+        Generate a response using the specified model with RAG support
+        
+        Args:
+            message: The user's message
+            model: The model to use ('gemini' or 'local-ai')
+            gemini_manager: GeminiManager instance (required for 'gemini' model)
+            personalized_prompt: Optional personalized prompt to include in the context
+            **kwargs: Additional model-specific parameters
+            
+        Returns:
+            Dict containing the response and metadata
+        """
+        answer, backend, context, cache_key = self._prepare_response(message, model, personalized_prompt,
+                                                                     gemini_manager)
+        if answer is not None:
+            return answer
         
         # Generate response based on the selected model
-        if model.lower() == 'gemini':
+        if backend == 'gemini':
             if not gemini_manager:
                 raise ValueError("Gemini manager is required for 'gemini' model")
-            return self._generate_gemini_response(
+            generate = functools.partial(
+                self._generate_gemini_response,
                 message=message, 
                 gemini_manager=gemini_manager, 
                 context=context,
                 **kwargs
             )
-        elif model.lower() in ['local', 'local-ai', 'local_ai']:
-            return self._generate_local_ai_response(
+        else:
+            generate = functools.partial(
+                self._generate_local_ai_response,
                 message=message,
                 context=context,
                 **kwargs
             )
+        generate = self._timed(backend, generate)
+
+        # Within the backend's concurrency limit and deadline, shared with
+        # concurrent requests for the same prompt
+        try:
+            if self.single_flight is None:
+                response = self.llm_gateway.call(backend, generate)
+            else:
+                response, shared = self.single_flight.do(
+                    self._prompt_key(backend, message, context, **kwargs), self.llm_gateway.call, backend, generate,
+                    wait_timeout=self.llm_gateway.timeout_for(backend))
+                if shared:
+                    logger.info(f"Reused in-flight {backend} answer for: {message[:50]}...")
+                    response = dict(response)
+        except FlightTimeout as e:
+            response = self._gateway_error_response(backend, GatewayTimeout(str(e)))
+        except GatewayError as e:
+            response = self._gateway_error_response(backend, e)
+
+        self._cache_response(cache_key, response, model)
+        if backend != self._backend_name(model):
+            # A new dict: coalesced requests share the leader's response
+            response = dict(response, routed_from=self._backend_name(model))
+        return response
+
+    def generate_response_stream(self,
+                                 message: str,
+                                 model: str = 'gemini',
+                                 gemini_manager = None,
+                                 personalized_prompt: Optional[str] = None,
+                                 **kwargs) -> Iterator[Dict[str, Any]]:
+        """
+        Like generate_response, but yields the reply while the model is still generating it
+        
+        Args:
+            message: The user's message
+            model: The model to use ('gemini' or 'local-ai')
+            gemini_manager: GeminiManager instance (required for 'gemini' model)
+            personalized_prompt: Optional personalized prompt to include in the context
+            **kwargs: Additional model-specific parameters
+            
+        Yields:
+            {"type": "chunk", "text": ...} for each piece of the reply, then one
+            {"type": "done", ...} with the same fields generate_response returns
+        """
+        answer, backend, context, cache_key = self._prepare_response(message, model, personalized_prompt,
+                                                                     gemini_manager)
+        if answer is not None:
+            yield {"type": "chunk", "text": answer["reply"]}
+            yield dict(answer, type="done")
+            return
+
+        if backend == 'gemini' and not gemini_manager:
+            raise ValueError("Gemini manager is required for 'gemini' model")
+        routed_from = self._backend_name(model) if backend != self._backend_name(model) else None
+
+        # The same prompt already being answered: send that answer in one piece when it is ready
+        flight = None
+        if self.single_flight is not None:
+            flight, leader = self.single_flight.join(self._prompt_key(backend, message, context, **kwargs))
+            if not leader:
+                shared = self._wait_for_flight(flight, backend)
+                if shared is not None:
+                    logger.info(f"Reused in-flight {backend} answer for: {message[:50]}...")
+                    if routed_from:
+                        shared["routed_from"] = routed_from
+                    yield {"type": "chunk", "text": shared["reply"]}
+                    yield dict(shared, type="done")
+                    return
+                flight = None  # its leader gave up; answer this request directly
+
+        if backend == 'gemini':
+            chunks = self.llm_gateway.stream('gemini', self._stream_gemini_response(
+                message=message, gemini_manager=gemini_manager, context=context, **kwargs))
         else:
-            raise ValueError(f"Unsupported model: {model}")
-    
+            chunks = self.llm_gateway.stream('local-ai', self._stream_local_ai_response(
+                message=message, context=context, **kwargs))
+
+        response = None
+        # A request the gateway turned away never reached the backend and says nothing about its health
+        reached_backend = True
+        parts = []
+        start = time.perf_counter()
+        first_chunk_seconds = None
+        try:
+            for text in chunks:
+                if first_chunk_seconds is None:
+                    first_chunk_seconds = time.perf_counter() - start
+                parts.append(text)
+                yield {"type": "chunk", "text": text}
+            response = {"reply": "".join(parts).strip(), "model": backend}
+        except GatewayError as e:
+            reached_backend = not isinstance(e, GatewayOverloaded)
+            response = self._gateway_error_response(backend, e)
+        except Exception as e:
+            logger.error(f"Error streaming {backend} response: {e}", exc_info=True)
+            response = (self._gemini_error_response(e) if backend == 'gemini'
+                        else self._local_ai_error_response(e))
+        finally:
+            # Also runs when the consumer stops early (client disconnect): ends the backend request
+            chunks.close()
+            if flight is not None:
+                if response is not None:
+                    self.single_flight.finish(flight, result=response)
+                else:
+                    self.single_flight.finish(flight, abandoned=True)
+        if first_chunk_seconds is not None:
+            logger.info(f"Streamed {backend} reply: first chunk after {first_chunk_seconds:.2f}s, "
+                        f"complete after {time.perf_counter() - start:.2f}s")
+        if self.model_router is not None and reached_backend:
+            self.model_router.record(backend, time.perf_counter() - start, "error" not in response)
+
+        self._cache_response(cache_key, response, model)
+        if routed_from:
+            response = dict(response, routed_from=routed_from)
+        yield dict(response, type="done")
+
+    def _prompt_key(self, backend: str, message: str, context: str, **kwargs) -> str:
+        """Single-flight key of the exact prompt the backend is sent"""
+        if backend == 'gemini':
+            prompt = self._gemini_prompt(message, kwargs.get('personalized_prompt'))
+        else:
+            # Streaming and the caller's session id do not change the answer
+            payload = self._local_ai_payload(message, context, stream=False, **kwargs)
+            prompt = json.dumps({k: v for k, v in payload.items() if k not in ('stream', 'session_id')},
+                                sort_keys=True)
+        return SingleFlight.key(backend, prompt)
+
+    def _wait_for_flight(self, flight, model: str) -> Optional[Dict[str, Any]]:
+        """The in-flight leader's response, or None if the leader gave up without one"""
+        try:
+            # No longer than the backend call itself may take: a streaming leader whose client stalls
+            # only finishes once that client reads the rest of the reply
+            return dict(self.single_flight.wait(flight, self.llm_gateway.timeout_for(model)))
+        except FlightAbandoned:
+            return None
+        except FlightTimeout as e:
+            return self._gateway_error_response(model, GatewayTimeout(str(e)))
+        except GatewayError as e:
+            return self._gateway_error_response(model, e)
+        except Exception as e:
+            return self._gemini_error_response(e) if model.lower() == 'gemini' else self._local_ai_error_response(e)
+
+    def _gateway_error_response(self, model: str, error: GatewayError) -> Dict[str, Any]:
+        """The user-facing reply for a call the LLM gateway rejected or timed out"""
+        logger.warning(f"LLM gateway did not complete the {model} call: {error}")
+        if isinstance(error, GatewayOverloaded):
+            reply = "I'm sorry, I'm helping a lot of shoppers right now. Please try again in a moment."
+        else:
+            reply = "I'm sorry, the AI service is taking too long to respond. Please try again later."
+        return {
+            "reply": reply,
+            "error": str(error),
+            "model": 'gemini' if model.lower() == 'gemini' else 'local-ai'
+        }
+
+    def _gemini_prompt(self, message: str, personalized_prompt: Optional[str] = None) -> str:
+        # Use personalized prompt if available, otherwise use default
+        if personalized_prompt:
+            return personalized_prompt
+        return (
+            "You are a helpful and knowledgeable shopping assistant for Sephora, a skincare and cosmetics brand. "
+            "Answer the user's question based on your knowledge. "
+            "Be friendly, helpful, and knowledgeable about beauty and skincare."
+            f"\n\nUser: {message}\n\nAssistant:"
+        )
+
+    def _gemini_error_response(self, error: Exception) -> Dict[str, Any]:
+        print(f"Error generating Gemini response: {error}")
+        return {
+            "reply": "I'm sorry, I encountered an error processing your request with Gemini.",
+            "error": str(error),
+            "model": "gemini"
+        }
+
     def _generate_gemini_response(self, 
                                 message: str, 
                                 gemini_manager,
@@ -249,30 +595,92 @@ class AIService:
             raise ValueError("Gemini manager is not properly configured")
             
         try:
-            # Use personalized prompt if available, otherwise use default
-            if personalized_prompt:
-                prompt = personalized_prompt
-            else:
-                prompt = (
-                    "You are a helpful and knowledgeable shopping assistant for Sephora, a skincare and cosmetics brand. "
-                    "Answer the user's question based on your knowledge. "
-                    "Be friendly, helpful, and knowledgeable about beauty and skincare."
-                    f"\n\nUser: {message}\n\nAssistant:"
-                )
-            
-            response = gemini_manager.generate_content(prompt)
+            response = gemini_manager.generate_content(self._gemini_prompt(message, personalized_prompt))
             return {
                 "reply": response,
                 "model": "gemini"
             }
             
         except Exception as e:
-            print(f"Error generating Gemini response: {e}")
+            return self._gemini_error_response(e)
+
+    def _stream_gemini_response(self,
+                                message: str,
+                                gemini_manager,
+                                context: str,
+                                personalized_prompt: Optional[str] = None,
+                                **kwargs) -> Iterator[str]:
+        """Stream the Gemini reply text as it is generated"""
+        if not gemini_manager or not hasattr(gemini_manager, 'generate_content'):
+            raise ValueError("Gemini manager is not properly configured")
+        prompt = self._gemini_prompt(message, personalized_prompt)
+        if not hasattr(gemini_manager, 'generate_content_stream'):
+            # Managers without streaming support answer in one piece
+            yield gemini_manager.generate_content(prompt)
+            return
+        yield from gemini_manager.generate_content_stream(prompt)
+
+    def _local_ai_payload(self, message: str, context: str, stream: bool, **kwargs) -> Dict[str, Any]:
+        # Construct the full prompt with context - requesting concise responses
+        full_prompt = f"""{context}
+            
+            User question: {message}
+            
+            Please provide a concise and helpful response (2-3 sentences maximum) based on the context above.
+            Be direct and to the point while still being helpful.
+            If the context doesn't contain the answer, use your general knowledge to help.
+            
+            Assistant (be brief):"""
+        
+        # Prepare the payload according to the Local AI API format
+        return {
+            "model": "openhermes-gpu:latest",  # Using the GPU boosted model from the API
+            "prompt": full_prompt.strip(),
+            "stream": stream,
+            "options": {
+                "temperature": 0.5,  # Slightly lower temperature for more focused responses
+                "top_p": 0.8,        # Slightly lower for less randomness
+                "top_k": 30,         # Reduced top_k for more focused responses
+                "repeat_penalty": 1.2, # Increased to reduce repetition
+                "num_predict": 200,   # Reduced max tokens for shorter responses
+                "stop": ["\nUser:", "\n### User:", "</s>"]
+            },
+            **kwargs
+        }
+
+    def _local_ai_error_response(self, error: Exception) -> Dict[str, Any]:
+        """The user-facing reply for a failed Local AI request"""
+        if isinstance(error, requests.exceptions.Timeout):
+            error_msg = "Local AI service request timed out. The service might be busy or unavailable."
+            logger.error(error_msg)
             return {
-                "reply": "I'm sorry, I encountered an error processing your request with Gemini.",
-                "error": str(e),
-                "model": "gemini"
+                "reply": "I'm sorry, the Local AI service is taking too long to respond. Please try again later.",
+                "error": "Request timeout",
+                "model": "local-ai"
+            }
+        if isinstance(error, requests.exceptions.HTTPError):
+            error_msg = f"HTTP error from Local AI service: {str(error)}"
+            logger.error(f"{error_msg}. Status code: {error.response.status_code if error.response is not None else 'N/A'}")
+            return {
+                "reply": "I'm sorry, there was an error processing your request with the Local AI service.",
+                "error": error_msg,
+                "model": "local-ai"
+            }
+        if isinstance(error, requests.exceptions.RequestException):
+            error_msg = f"Error connecting to Local AI service: {str(error)}"
+            logger.error(error_msg)
+            return {
+                "reply": "I'm sorry, I couldn't connect to the Local AI service. Please check if the service is running.",
+                "error": error_msg,
+                "model": "local-ai"
             }
+        error_msg = f"Unexpected error with Local AI service: {str(error)}"
+        logger.error(error_msg, exc_info=True)
+        return {
+            "reply": "I'm sorry, I encountered an unexpected error while processing your request with the Local AI.",
+            "error": error_msg,
+            "model": "local-ai"
+        }
     
     def _generate_local_ai_response(self, 
                                   message: str, 
@@ -298,41 +706,16 @@ class AIService:
             headers = {
                 "Content-Type": "application/json"
             }
-            
-            # Construct the full prompt with context - requesting concise responses
-            full_prompt = f"""{context}
-            
-            User question: {message}
-            
-            Please provide a concise and helpful response (2-3 sentences maximum) based on the context above.
-            Be direct and to the point while still being helpful.
-            If the context doesn't contain the answer, use your general knowledge to help.
-            
-            Assistant (be brief):"""
-            
-            # Prepare the payload according to the Local AI API format
-            payload = {
-                "model": "openhermes-gpu:latest",  # Using the GPU boosted model from the API
-                "prompt": full_prompt.strip(),
-                "stream": False,
-                "options": {
-                    "temperature": 0.5,  # Slightly lower temperature for more focused responses
-                    "top_p": 0.8,        # Slightly lower for less randomness
-                    "top_k": 30,         # Reduced top_k for more focused responses
-                    "repeat_penalty": 1.2, # Increased to reduce repetition
-                    "num_predict": 200,   # Reduced max tokens for shorter responses
-                    "stop": ["\nUser:", "\n### User:", "</s>"]
-                },
-                **kwargs
-            }
+            payload = self._local_ai_payload(message, context, stream=False, **kwargs)
             
             logger.debug(f"Sending request to Local AI: {payload}")
             
-            response = requests.post(
+            # Pooled keep-alive connection; (connect, read) timeouts from LOCAL_AI_*_TIMEOUT
+            response = get_local_ai_session().post(
                 self.local_ai_url,
                 headers=headers,
                 json=payload,
-                timeout=30  # 30 seconds timeout
+                timeout=timeouts()
             )
             
             logger.debug(f"Local AI response status: {response.status_code}")
@@ -357,35 +740,33 @@ class AIService:
                 "raw_response": response_data
             }
             
-        except requests.exceptions.Timeout:
-            error_msg = "Local AI service request timed out. The service might be busy or unavailable."
-            logger.error(error_msg)
-            return {
-                "reply": "I'm sorry, the Local AI service is taking too long to respond. Please try again later.",
-                "error": "Request timeout",
-                "model": "local-ai"
-            }
-        except requests.exceptions.HTTPError as e:
-            error_msg = f"HTTP error from Local AI service: {str(e)}"
-            logger.error(f"{error_msg}. Status code: {e.response.status_code if hasattr(e, 'response') else 'N/A'}")
-            return {
-                "reply": "I'm sorry, there was an error processing your request with the Local AI service.",
-                "error": error_msg,
-                "model": "local-ai"
-            }
-        except requests.exceptions.RequestException as e:
-            error_msg = f"Error connecting to Local AI service: {str(e)}"
-            logger.error(error_msg)
-            return {
-                "reply": "I'm sorry, I couldn't connect to the Local AI service. Please check if the service is running.",
-                "error": error_msg,
-                "model": "local-ai"
-            }
         except Exception as e:
-            error_msg = f"Unexpected error with Local AI service: {str(e)}"
-            logger.error(error_msg, exc_info=True)
-            return {
-                "reply": "I'm sorry, I encountered an unexpected error while processing your request with the Local AI.",
-                "error": error_msg,
-                "model": "local-ai"
-            }
+            return self._local_ai_error_response(e)
+
+    def _stream_local_ai_response(self, message: str, context: str = "", **kwargs) -> Iterator[str]:
+        """
+        Stream the local AI reply with "stream": true; the service answers with
+        one JSON object per line, each carrying the next piece of the response
+        """
+        if not self.local_ai_url:
+            error_msg = "Local AI URL is not configured. Please set LOCAL_AI_URL environment variable."
+            logger.error(error_msg)
+            raise ValueError(error_msg)
+
+        payload = self._local_ai_payload(message, context, stream=True, **kwargs)
+        logger.debug(f"Sending streaming request to Local AI: {payload}")
+        # Closing the response returns its connection to the pool
+        with get_local_ai_session().post(self.local_ai_url, headers={"Content-Type": "application/json"},
+                                         json=payload, timeout=timeouts(), stream=True) as response:
+            response.raise_for_status()
+            # chunk_size=None hands over each chunk as it arrives instead of waiting for 512 bytes
+            for line in response.iter_lines(chunk_size=None):
+                if not line:
+                    continue
+                data = json.loads(line)
+                if data.get("error"):
+                    raise RuntimeError(f"Local AI error: {data['error']}")
+                if data.get("response"):
+                    yield data["response"]
+                if data.get("done"):
+                    break
@@ -0,0 +1,250 @@
+"""
+Context Packer Module
+Fits the retrieved product contexts into a per-model token budget before
+they are added to the prompt. Contexts are split into their fields; product
+name, price and stock are always kept for every product that fits, and the
+remaining fields are added by relevance to the question (terms shared with
+it, rank of the product) until the budget is used up. Long comma-separated
+fields such as ingredient lists are truncated to the items that matter
+instead of being dropped whole.
+
+Tokens are counted with the query encoder's own tokenizer (a local
+WordPiece/BPE `tokenizers` model), or estimated from words and punctuation
+when it is not loaded.
+"""
+import os
+import re
+import sys
+import logging
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# Make the shared Vector_Store package importable
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from Vector_Store.lexical_index import tokenize
+
+logger = logging.getLogger(__name__)
+
+# Always kept (in this order of importance) for every product that is included
+ESSENTIAL_FIELDS = ('Product Name', 'Price', 'Stock')
+# Base relevance of the optional fields before matching against the question
+FIELD_WEIGHTS = {
+    'Category': 1.0,
+    'Skin Type Information': 1.0,
+    'Highlights': 0.8,
+    'Ingredients': 0.2,
+}
+DEFAULT_FIELD_WEIGHT = 0.5
+# Questions about formulation make the ingredient list worth its tokens
+FIELD_KEYWORDS = {
+    'Ingredients': {'ingredient', 'ingredients', 'contain', 'contains', 'free', 'formula', 'allergic',
+                    'allergy', 'vegan', 'made'},
+    'Skin Type Information': {'skin', 'dry', 'oily', 'combination', 'sensitive', 'normal'},
+}
+STOPWORDS = {
+    'a', 'an', 'and', 'any', 'are', 'best', 'can', 'do', 'does', 'for', 'good', 'have', 'i', 'in', 'is',
+    'it', 'me', 'my', 'of', 'on', 'or', 'recommend', 'something', 'that', 'the', 'this', 'to', 'what',
+    'which', 'with', 'you',
+}
+# "--- Context i ---" header and blank lines around every packed context
+CONTEXT_OVERHEAD_TOKENS = 8
+# Below this a truncated field is more noise than information
+MIN_TRUNCATED_TOKENS = 6
+TRUNCATION_MARK = '...'
+
+# AIService only packs for local AI: the Gemini prompt carries no product contexts yet
+DEFAULT_BUDGETS = {
+    'gemini': int(os.environ.get('CONTEXT_TOKEN_BUDGET_GEMINI', 1500)),
+    'local-ai': int(os.environ.get('CONTEXT_TOKEN_BUDGET_LOCAL', 600)),
+}
+
+_ESTIMATE_RE = re.compile(r"\w+|[^\w\s]")
+
+
+class TokenCounter:
+    """Counts tokens with a `tokenizers` tokenizer, or estimates them without one"""
+
+    def __init__(self, tokenizer=None):
+        self.tokenizer = None
+        if tokenizer is not None:
+            # SentenceTransformer exposes a transformers tokenizer, OnnxSentenceEncoder a
+            # tokenizers.Tokenizer; both wrap the same fast tokenizer. Use an unpadded,
+            # untruncated copy so long fields are counted in full.
+            backend = getattr(tokenizer, 'backend_tokenizer', tokenizer)
+            try:
+                from tokenizers import Tokenizer
+                self.tokenizer = Tokenizer.from_str(backend.to_str())
+                self.tokenizer.no_padding()
+                self.tokenizer.no_truncation()
+            except Exception as e:
+                logger.warning(f"Could not use the encoder tokenizer for token counting ({e}); estimating")
+
+    @classmethod
+    def from_encoder(cls, encoder) -> 'TokenCounter':
+        return cls(getattr(encoder, 'tokenizer', None))
+
+    @property
+    def exact(self) -> bool:
+        return self.tokenizer is not None
+
+    def count_many(self, texts: Sequence[str]) -> List[int]:
+        if not texts:
+            return []
+        if self.tokenizer is None:
+            return [len(_ESTIMATE_RE.findall(text)) for text in texts]
+        return [len(encoding.ids) for encoding in self.tokenizer.encode_batch(list(texts), add_special_tokens=False)]
+
+    def count(self, text: str) -> int:
+        return self.count_many([text])[0]
+
+
+def split_fields(context: str) -> Tuple[str, List[Tuple[Optional[str], str]]]:
+    """
+    Split an embedFunc context into (label, value) fields.
+
+    Returns:
+        tuple: (separator, fields) - embedFunc joins fields with a literal
+            backslash-n; real newlines are accepted too
+    """
+    separator = '\\n' if '\\n' in context else '\n'
+    fields = []
+    for line in context.split(separator):
+        label, found, value = line.partition(': ')
+        fields.append((label, value) if found else (None, line))
+    return separator, fields
+
+
+def _join_field(label: Optional[str], value: str) -> str:
+    return f"{label}: {value}" if label is not None else value
+
+
+class ContextPacker:
+    """Packs ranked product contexts into a token budget"""
+
+    def __init__(self, token_counter: Optional[TokenCounter] = None, budgets: Optional[Dict[str, int]] = None):
+        self.token_counter = token_counter or TokenCounter()
+        self.budgets = dict(DEFAULT_BUDGETS, **(budgets or {}))
+
+    def budget_for(self, model: str) -> int:
+        return self.budgets['gemini' if model.lower() == 'gemini' else 'local-ai']
+
+    def _relevance(self, label: Optional[str], value: str, question_terms: set, rank: int) -> float:
+        score = FIELD_WEIGHTS.get(label, DEFAULT_FIELD_WEIGHT)
+        field_terms = set(tokenize(value))
+        score += len(question_terms & field_terms)
+        if question_terms & FIELD_KEYWORDS.get(label, set()):
+            score += 1.0
+        # Earlier products are closer to the question
+        return score / (1 + 0.25 * rank)
+
+    def _truncate(self, label: Optional[str], value: str, question_terms: set, budget: int) -> Optional[str]:
+        """The field cut down to about budget tokens, keeping items that match the question"""
+        if ', ' in value:
+            items, joiner = value.split(', '), ', '
+            # Items mentioning the question first, then the rest in their original order
+            order = sorted(range(len(items)), key=lambda i: (not question_terms & set(tokenize(items[i])), i))
+        else:
+            items, joiner = value.split(' '), ' '
+            order = list(range(len(items)))
+        item_tokens = self.token_counter.count_many(items)
+        used = self.token_counter.count(_join_field(label, TRUNCATION_MARK))
+        kept = []
+        for i in order:
+            cost = item_tokens[i] + 1
+            if used + cost > budget:
+                if joiner == ' ':
+                    break  # prose is only cut at the end
+                continue
+            kept.append(i)
+            used += cost
+        if not kept:
+            return None
+        return f"{joiner.join(items[i] for i in sorted(kept))}{joiner.rstrip()} {TRUNCATION_MARK}"
+
+    def pack(self, question: str, contexts: Sequence[str], model: str = 'gemini',
+             budget: Optional[int] = None) -> Tuple[List[str], Dict[str, Any]]:
+        """
+        Fit contexts (best match first) into the token budget of model.
+
+        Returns:
+            tuple: (packed contexts in the same order and format, stats with
+                original_tokens, packed_tokens, saved_tokens, budget and the
+                number of dropped / truncated fields and products)
+        """
+        budget = budget if budget is not None else self.budget_for(model)
+        question_terms = set(tokenize(question)) - STOPWORDS
+
+        parsed = [split_fields(context) for context in contexts]
+        texts = [_join_field(label, value) for _, fields in parsed for label, value in fields]
+        counts = iter(self.token_counter.count_many(texts))
+        field_tokens = [[next(counts) + 1 for _ in fields] for _, fields in parsed]
+        original_tokens = sum(map(sum, field_tokens)) + CONTEXT_OVERHEAD_TOKENS * len(contexts)
+
+        # field values chosen per product: {field index: value}
+        chosen: List[Dict[int, str]] = []
+        used = 0
+        # Pass 1: products in rank order with their essential fields, while they fit
+        for (_, fields), tokens in zip(parsed, field_tokens):
+            essential = [i for i, (label, _) in enumerate(fields) if label in ESSENTIAL_FIELDS]
+            cost = CONTEXT_OVERHEAD_TOKENS + sum(tokens[i] for i in essential)
+            if used + cost > budget:
+                break
+            chosen.append({i: fields[i][1] for i in essential})
+            used += cost
+
+        # Pass 2: the other fields of the included products, most relevant first
+        candidates = []
+        for rank, selected in enumerate(chosen):
+            fields = parsed[rank][1]
+            for i, (label, value) in enumerate(fields):
+                if i not in selected and value:
+                    candidates.append((self._relevance(label, value, question_terms, rank), rank, i))
+        candidates.sort(key=lambda candidate: (-candidate[0], candidate[1], candidate[2]))
+
+        # Fields of each label still to place, so one truncated field leaves room for the others
+        pending = {}
+        for _, rank, i in candidates:
+            label = parsed[rank][1][i][0]
+            pending[label] = pending.get(label, 0) + 1
+
+        truncated = dropped = 0
+        for _, rank, i in candidates:
+            label, value = parsed[rank][1][i]
+            pending[label] -= 1
+            cost = field_tokens[rank][i]
+            if used + cost <= budget:
+                chosen[rank][i] = value
+                used += cost
+                continue
+            remaining = budget - used
+            share = max(remaining // (pending[label] + 1), MIN_TRUNCATED_TOKENS)
+            shortened = (self._truncate(label, value, question_terms, min(share, remaining))
+                         if remaining >= MIN_TRUNCATED_TOKENS else None)
+            # Items are counted one by one, so check the joined field really fits
+            cost = self.token_counter.count(_join_field(label, shortened)) + 1 if shortened else None
+            if cost is None or cost > remaining:
+                dropped += 1
+                continue
+            chosen[rank][i] = shortened
+            used += cost
+            truncated += 1
+
+        packed = []
+        for rank, selected in enumerate(chosen):
+            separator, fields = parsed[rank]
+            packed.append(separator.join(_join_field(fields[i][0], selected[i]) for i in sorted(selected)))
+
+        stats = {
+            "original_tokens": original_tokens,
+            "packed_tokens": used,
+            "saved_tokens": original_tokens - used,
+            "budget": budget,
+            "products": len(packed),
+            "dropped_products": len(contexts) - len(packed),
+            "dropped_fields": dropped + sum(len(fields) for _, fields in parsed[len(chosen):]),
+            "truncated_fields": truncated,
+            "exact_token_counts": self.token_counter.exact,
+        }
+        return packed, stats
@@ -85,6 +85,25 @@ class GeminiManager:
         except Exception as e:
             raise Exception(f"Error generating content: {e}")
     
+    def generate_content_stream(self, prompt):
+        """Generate content using the Gemini model, yielding the text as it is produced"""
+        if not self.is_configured or not self.model:
+            raise Exception("Gemini model not properly configured. Call setup() first.")
+        
+        try:
+            received = False
+            for chunk in self.model.generate_content(prompt, stream=True):
+                chunk_text = "".join(part.text for part in chunk.parts) if chunk.parts else ""
+                if chunk_text:
+                    received = True
+                    yield chunk_text
+            
+            if not received:
+                raise Exception("No response text received from Gemini")
+            
+        except Exception as e:
+            raise Exception(f"Error generating content: {e}")
+    
     def test_generation(self):
         """Test content generation with a simple prompt"""
         try:
@@ -0,0 +1,101 @@
+"""
+HTTP Client Module
+Shared, pooled requests.Session for calls to the local LLM backend. Every
+request through it reuses a kept-alive connection from the pool instead of
+opening a new TCP connection (and TLS handshake) per message.
+
+Idempotent requests (GET, HEAD, OPTIONS) are retried with exponential
+backoff on connection errors, read errors and 502/503/504 responses.
+Generation POSTs are only retried when the connection could not be
+established, i.e. when the request never reached the server.
+
+Configuration (environment):
+    LOCAL_AI_POOL_SIZE        connections kept per host (default 10)
+    LOCAL_AI_CONNECT_TIMEOUT  seconds to establish a connection (default 5)
+    LOCAL_AI_READ_TIMEOUT     seconds to wait for response data (default 30)
+    LOCAL_AI_RETRIES          retries of a failed request (default 3)
+    LOCAL_AI_RETRY_BACKOFF    backoff factor in seconds (default 0.3)
+"""
+import os
+import threading
+import logging
+from typing import Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENT_METHODS = frozenset({'GET', 'HEAD', 'OPTIONS'})
+RETRY_STATUSES = (502, 503, 504)
+# Per-host pools kept by the adapter; the local AI backend is normally a single host
+HOST_POOLS = 4
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def timeouts(read_timeout: Optional[float] = None) -> Tuple[float, float]:
+    """(connect, read) timeout tuple for requests; read_timeout overrides the configured one"""
+    connect = float(os.environ.get('LOCAL_AI_CONNECT_TIMEOUT', 5))
+    read = read_timeout if read_timeout is not None else float(os.environ.get('LOCAL_AI_READ_TIMEOUT', 30))
+    return connect, read
+
+
+def create_session(pool_size: Optional[int] = None, retries: Optional[int] = None,
+                   backoff_factor: Optional[float] = None) -> requests.Session:
+    """
+    A requests.Session with a keep-alive connection pool and retries.
+
+    Args:
+        pool_size: Connections kept open per host (LOCAL_AI_POOL_SIZE)
+        retries: Retries of a failed request (LOCAL_AI_RETRIES)
+        backoff_factor: Exponential backoff factor in seconds (LOCAL_AI_RETRY_BACKOFF)
+    """
+    pool_size = pool_size if pool_size is not None else int(os.environ.get('LOCAL_AI_POOL_SIZE', 10))
+    retries = retries if retries is not None else int(os.environ.get('LOCAL_AI_RETRIES', 3))
+    backoff_factor = (backoff_factor if backoff_factor is not None
+                      else float(os.environ.get('LOCAL_AI_RETRY_BACKOFF', 0.3)))
+    # Connection errors are retried for every method (nothing was sent); read
+    # errors and retry statuses only for idempotent methods
+    retry = Retry(
+        total=retries,
+        connect=retries,
+        read=retries,
+        status=retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=IDEMPOTENT_METHODS,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=HOST_POOLS, pool_maxsize=pool_size, max_retries=retry, pool_block=False)
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers.update({"Content-Type": "application/json", "Connection": "keep-alive"})
+    return session
+
+
+def get_local_ai_session() -> requests.Session:
+    """The process-wide pooled session for local AI calls, created on first use.
+
+    The session keeps no per-user state (no cookies or auth), and its
+    connection pool is thread-safe, so all request threads share it.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = create_session()
+                logger.info("Created pooled HTTP session for the local AI backend")
+    return _session
+
+
+def close_local_ai_session():
+    """Close the pooled connections; the next call creates a new session"""
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
@@ -0,0 +1,272 @@
+"""
+Intent Router Module
+Answers messages that do not need retrieval or an LLM - greetings, thanks,
+store FAQs, "show me serums" - before the expensive path runs. Three stages,
+cheapest first:
+
+1. exact lookup of the normalized message among the intent examples
+2. compiled browse-command pattern ("show me ...", "do you have ...")
+3. nearest centroid: cosine similarity of the MiniLM query embedding (the
+   one retrieval computes anyway, cached by the engine) to the mean
+   embedding of each intent's examples, with a threshold and a margin over
+   the runner-up
+
+FAQ intents return a fixed answer; the browse intent lists matching products
+straight from the retrieval results without an LLM call. Anything not
+matched confidently goes down the normal RAG + LLM path.
+"""
+import os
+import re
+import sys
+import time
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+# Make the shared Vector_Store package importable
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from Vector_Store.query_cache import normalize_query
+
+logger = logging.getLogger(__name__)
+
+BROWSE_INTENT = 'browse_products'
+# "show me serums", "do you have any vitamin c serum", "list your lipsticks"
+BROWSE_PATTERN = re.compile(
+    r"^(?:can you |could you |please )?(?:show(?: me)?|list|browse|see|find(?: me)?|do you (?:have|sell|carry)"
+    r"|what (?:\w+ )?do you (?:have|sell|carry))"
+    r"(?: me)?(?: (?:all|any|your|some|the|a few))?(?: of)?(?: (?:your|the))? (?P<item>[\w' -]{3,40}?)"
+    r"(?: please)?$"
+)
+# Words that make the tail of a browse command a question rather than a product
+# or category ("show me how to apply retinol", "do you have anything for acne",
+# "list the ingredients of the vitamin c serum"); those go to RAG + LLM
+BROWSE_ITEM_STOPWORDS = frozenset({
+    'how', 'why', 'what', 'when', 'where', 'which', 'who', 'whether', 'if',
+    'anything', 'something', 'everything', 'difference', 'differences', 'ingredient', 'ingredients',
+    'for', 'to', 'of', 'between', 'with', 'without', 'about', 'on', 'in', 'like', 'vs', 'versus', 'than',
+    'that', 'is', 'are', 'does', 'do', 'can', 'should', 'would', 'will', 'help', 'helps', 'work', 'works',
+    'use', 'apply', 'good', 'best', 'better',
+})
+BROWSE_RESULTS = 5
+
+
+def is_browse_item(item: str) -> bool:
+    """Whether the tail of a browse command names products or a category"""
+    return not any(word in BROWSE_ITEM_STOPWORDS for word in item.split())
+
+
+class Intent:
+    """A routable intent: example phrasings plus a fixed answer (or None for browse)"""
+
+    def __init__(self, name: str, examples: Sequence[str], answer: Optional[str] = None,
+                 threshold: float = 0.8):
+        self.name = name
+        self.examples = list(examples)
+        self.answer = answer
+        self.threshold = threshold
+
+
+DEFAULT_INTENTS = [
+    Intent('greeting', [
+        'hi', 'hello', 'hey', 'hi there', 'hello there', 'hey there', 'good morning', 'good afternoon',
+        'good evening', 'greetings', 'hiya', 'howdy',
+    ], "Hello! I'm your Sephora beauty assistant. How can I help you with your beauty and skincare needs today?",
+        threshold=0.85),
+    Intent('thanks', [
+        'thanks', 'thank you', 'thank you so much', 'thanks a lot', 'thx', 'ty', 'much appreciated',
+        'that was helpful', 'great thanks',
+    ], "You're welcome! Let me know if there's anything else I can help you find. 💖", threshold=0.85),
+    Intent('goodbye', [
+        'bye', 'goodbye', 'see you', 'see you later', 'bye bye', 'have a nice day', "that's all", 'talk later',
+    ], "Thanks for chatting! Come back any time you need beauty advice. ✨", threshold=0.85),
+    Intent('capabilities', [
+        'what can you do', 'help', 'how does this work', 'what are you', 'who are you',
+        'how can you help me', 'what do you do',
+    ], "I can recommend products for your skin type and budget, compare products, explain ingredients "
+       "and help you build a skincare routine. Try asking \"show me serums\" or \"what's good for dry skin "
+       "under $30?\"", threshold=0.8),
+    Intent('human_agent', [
+        'talk to a human', 'speak to an agent', 'can i talk to a real person', 'customer service',
+        'i want to speak to someone', 'connect me to an agent', 'live agent', 'human please',
+    ], "I can connect you with one of our beauty experts. Use the \"Talk to an agent\" option in the chat "
+       "(or /agent on Telegram) and someone will join you shortly.", threshold=0.8),
+    Intent('store_hours', [
+        'what are your store hours', 'when are you open', 'what time do you open', 'what time do you close',
+        'opening hours', 'are you open today', 'store hours',
+    ], "You can shop online any time, 24/7. Opening hours differ from store to store, so please check the "
+       "store locator for your nearest Sephora, or ask a beauty expert via the agent option.", threshold=0.8),
+    Intent('shipping_returns', [
+        'how long does shipping take', 'do you ship internationally', 'what is your return policy',
+        'how do i return a product', 'can i get a refund', 'shipping cost', 'where is my order',
+        'track my order',
+    ], "Delivery options, shipping times and our returns policy are on the Shipping & Returns page. "
+       "For a specific order, a beauty expert can help - use the agent option in the chat.", threshold=0.8),
+    Intent(BROWSE_INTENT, [
+        'show me serums', 'show me your moisturizers', 'list your lipsticks', 'what cleansers do you have',
+        'do you sell sunscreen', 'browse fragrances',
+    ], None, threshold=0.85),
+]
+_GREETING = next(intent for intent in DEFAULT_INTENTS if intent.name == 'greeting')
+_GREETINGS = {normalize_query(example) for example in _GREETING.examples}
+
+
+def greeting_reply(message: str) -> Optional[str]:
+    """The greeting answer if message is only a greeting; used when the router is disabled"""
+    if normalize_query(message) in _GREETINGS:
+        return _GREETING.answer
+    return None
+
+
+class IntentRouter:
+    """Routes messages to precomputed answers; thread-safe, with per-intent hit counters"""
+
+    def __init__(self, intents: Optional[List[Intent]] = None,
+                 encode: Optional[Callable[[List[str]], np.ndarray]] = None,
+                 search: Optional[Callable[..., List[str]]] = None, margin: float = 0.05):
+        """
+        Args:
+            intents: Intents to route (DEFAULT_INTENTS when None)
+            encode: texts -> (n, dim) embeddings with the query encoder, used to
+                build the centroids; without it only the exact and pattern stages run
+            search: search(query, top_k=...) -> product contexts, for browse answers
+            margin: Similarity the best centroid needs over the runner-up
+        """
+        self.intents = {intent.name: intent for intent in (intents or DEFAULT_INTENTS)}
+        self.encode = encode
+        self.search = search
+        self.margin = margin
+        self._exact = {normalize_query(example): intent.name
+                       for intent in self.intents.values() for example in intent.examples}
+        self._centroid_names: List[str] = []
+        self._centroids = None
+        self._centroid_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.messages = 0
+        self.routed_by_method = {"exact": 0, "pattern": 0, "centroid": 0}
+        self.hits = {name: 0 for name in self.intents}
+        self.classify_seconds = 0.0
+
+    def _build_centroids(self):
+        """Mean normalized example embedding per intent, computed once on first use"""
+        with self._centroid_lock:
+            if self._centroids is not None or self.encode is None:
+                return
+            names = list(self.intents)
+            examples = [example for name in names for example in self.intents[name].examples]
+            embeddings = np.asarray(self.encode(examples), dtype='float32')
+            embeddings /= np.clip(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12, None)
+            centroids, start = [], 0
+            for name in names:
+                count = len(self.intents[name].examples)
+                centroid = embeddings[start:start + count].mean(axis=0)
+                centroids.append(centroid / max(np.linalg.norm(centroid), 1e-12))
+                start += count
+            self._centroid_names = names
+            self._centroids = np.stack(centroids)
+            logger.info(f"Intent router centroids built for {len(names)} intents")
+
+    def classify(self, message: str, embedding: Optional[np.ndarray] = None) -> Optional[Dict[str, Any]]:
+        """
+        Args:
+            message: The user message
+            embedding: Its query embedding; the centroid stage only runs with one
+
+        Returns:
+            dict: intent, score and method ('exact', 'pattern' or 'centroid'),
+                or None if no intent matches confidently
+        """
+        normalized = normalize_query(message)
+        name = self._exact.get(normalized)
+        if name is not None:
+            return {"intent": name, "score": 1.0, "method": "exact"}
+        if BROWSE_INTENT in self.intents:
+            browse = BROWSE_PATTERN.match(normalized)
+            if browse and is_browse_item(browse.group('item')):
+                return {"intent": BROWSE_INTENT, "score": 1.0, "method": "pattern"}
+
+        if embedding is None or self.encode is None:
+            return None
+        self._build_centroids()
+        query = np.asarray(embedding, dtype='float32').reshape(-1)
+        query = query / max(np.linalg.norm(query), 1e-12)
+        similarities = self._centroids @ query
+        order = np.argsort(-similarities)
+        best = float(similarities[order[0]])
+        runner_up = float(similarities[order[1]]) if len(order) > 1 else -1.0
+        name = self._centroid_names[order[0]]
+        if name == BROWSE_INTENT and not is_browse_item(normalized):
+            return None
+        if best >= self.intents[name].threshold and best - runner_up >= self.margin:
+            return {"intent": name, "score": round(best, 4), "method": "centroid"}
+        return None
+
+    def _browse_answer(self, message: str) -> Optional[str]:
+        """Product list from the retrieval results, without an LLM call"""
+        if self.search is None:
+            return None
+        contexts = self.search(message, top_k=BROWSE_RESULTS)
+        lines = []
+        for context in contexts:
+            fields = dict(
+                line.split(': ', 1) for line in context.replace('\\n', '\n').split('\n') if ': ' in line
+            )
+            if 'Product Name' not in fields:
+                continue
+            details = ", ".join(value for value in (fields.get('Price'), fields.get('Stock')) if value)
+            lines.append(f"• {fields['Product Name']}" + (f" - {details}" if details else ""))
+        if not lines:
+            return None
+        return "Here are some products you might like:\n" + "\n".join(lines) + \
+            "\n\nAsk me about any of them for details, or tell me your skin type for a recommendation!"
+
+    def route(self, message: str, embedding: Optional[np.ndarray] = None) -> Optional[Dict[str, Any]]:
+        """
+        Answer message from its intent, if it has a confident one.
+
+        Args:
+            message: The user message
+            embedding: Its query embedding, if the encoder is ready
+
+        Returns:
+            dict: intent, reply, score and method - or None to take the normal path
+        """
+        start = time.perf_counter()
+        try:
+            match = self.classify(message, embedding)
+        except Exception as e:
+            logger.error(f"Intent classification failed: {e}", exc_info=True)
+            match = None
+        reply = None
+        if match is not None:
+            intent = self.intents[match["intent"]]
+            reply = intent.answer if intent.answer is not None else self._browse_answer(message)
+        with self._stats_lock:
+            self.messages += 1
+            self.classify_seconds += time.perf_counter() - start
+            if reply is not None:
+                self.routed_by_method[match["method"]] += 1
+                self.hits[match["intent"]] += 1
+        if reply is None:
+            return None
+        logger.debug(f"Routed to intent {match['intent']} ({match['method']}, score {match['score']})")
+        return dict(match, reply=reply)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            messages = self.messages
+            routed = sum(self.routed_by_method.values())
+            return {
+                "messages": messages,
+                "routed": routed,
+                "routed_rate": round(routed / messages, 4) if messages else 0.0,
+                "by_method": dict(self.routed_by_method),
+                "intent_hits": dict(self.hits),
+                "intent_hit_rates": {name: round(hits / messages, 4) if messages else 0.0
+                                     for name, hits in self.hits.items()},
+                "avg_route_microseconds": round(1e6 * self.classify_seconds / messages, 1) if messages else None,
+            }
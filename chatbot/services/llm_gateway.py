@@ -0,0 +1,291 @@
+"""
+LLM Gateway Module
+Sits between the chat front ends (Flask, Telegram) and the LLM backends
+(Gemini, the local Ollama service) and decides when a call may run:
+
+- a semaphore per backend caps how many calls run against it at once
+- a bounded wait queue per backend; when it is full, calls are rejected at
+  once with GatewayOverloaded instead of piling up
+- a deadline per call, covering the wait and the call itself, after which
+  the caller gets GatewayTimeout
+- cancellation: a caller that goes away (client disconnect, cancelled
+  Telegram task) leaves the queue, or stops a streamed reply
+
+The gateway runs its own asyncio event loop on a daemon thread. The blocking
+backend clients (the Gemini SDK, requests) run in a thread pool under it. A
+backend slot is only released when the worker thread finishes, so the limit
+also holds for calls whose caller has already timed out.
+
+Entry points:
+    call(backend, func, ...)    from threads (Flask threading-mode handlers)
+    acall(backend, func, ...)   from other event loops (python-telegram-bot handlers)
+    stream(backend, chunks)     a blocking iterator of reply chunks, holding a slot while it runs
+
+Configuration (environment), per backend with the name upper-cased and
+dashes as underscores, e.g. LLM_GATEWAY_LOCAL_AI_CONCURRENCY:
+    LLM_GATEWAY_<BACKEND>_CONCURRENCY  calls running at once
+    LLM_GATEWAY_<BACKEND>_QUEUE        calls allowed to wait for a slot
+    LLM_GATEWAY_<BACKEND>_TIMEOUT      seconds per call, waiting included
+"""
+import os
+import time
+import asyncio
+import logging
+import threading
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+# backend: (concurrency, queue, timeout seconds); Ollama usually serves one GPU
+DEFAULT_LIMITS = {
+    'gemini': (8, 32, 30.0),
+    'local-ai': (2, 16, 60.0),
+}
+FALLBACK_LIMITS = (4, 16, 30.0)
+
+
+class GatewayError(Exception):
+    """A call the gateway did not run to completion"""
+
+
+class GatewayOverloaded(GatewayError):
+    """The backend's wait queue is full"""
+
+
+class GatewayTimeout(GatewayError):
+    """The call's deadline passed while waiting for a slot or running"""
+
+
+class BackendLimits:
+    """Concurrency, queue and deadline limits of one backend"""
+
+    def __init__(self, max_concurrency: int, max_queue: int, timeout: float):
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.max_queue = max(0, int(max_queue))
+        self.timeout = float(timeout)
+
+    @classmethod
+    def from_env(cls, backend: str) -> 'BackendLimits':
+        concurrency, queue, timeout = DEFAULT_LIMITS.get(backend, FALLBACK_LIMITS)
+        prefix = f"LLM_GATEWAY_{backend.upper().replace('-', '_')}_"
+        return cls(
+            int(os.environ.get(prefix + 'CONCURRENCY', concurrency)),
+            int(os.environ.get(prefix + 'QUEUE', queue)),
+            float(os.environ.get(prefix + 'TIMEOUT', timeout)),
+        )
+
+
+class _Backend:
+    """Slots and counters of one backend; only touched from the gateway loop"""
+
+    def __init__(self, limits: BackendLimits):
+        self.limits = limits
+        self.semaphore = asyncio.Semaphore(limits.max_concurrency)
+        self.waiting = 0
+        self.active = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.cancelled = 0
+        self.wait_seconds = 0.0
+
+    def release(self):
+        self.active -= 1
+        self.semaphore.release()
+
+
+class LLMGateway:
+    """Admission control for LLM backend calls; thread-safe, one per process"""
+
+    def __init__(self, limits: Optional[Dict[str, BackendLimits]] = None):
+        self._limits = dict(limits or {})
+        self._backends: Dict[str, _Backend] = {}
+        self._loop = None
+        self._executor = None
+        self._start_lock = threading.Lock()
+
+    def _ensure_started(self) -> asyncio.AbstractEventLoop:
+        if self._loop is None:
+            with self._start_lock:
+                if self._loop is None:
+                    loop = asyncio.new_event_loop()
+                    self._executor = ThreadPoolExecutor(thread_name_prefix='llm-call')
+                    loop.set_default_executor(self._executor)
+                    threading.Thread(target=loop.run_forever, name='llm-gateway', daemon=True).start()
+                    self._loop = loop
+        return self._loop
+
+    def _limits_for(self, name: str) -> BackendLimits:
+        limits = self._limits.get(name)
+        if limits is None:
+            limits = self._limits.setdefault(name, BackendLimits.from_env(name))
+        return limits
+
+    def _deadline_for(self, name: str, timeout: Optional[float]) -> float:
+        return time.monotonic() + (timeout if timeout is not None else self.timeout_for(name))
+
+    def timeout_for(self, backend: str) -> float:
+        """Seconds a call to backend may take, waiting for a slot included"""
+        return self._limits_for(backend).timeout
+
+    def _backend(self, name: str) -> _Backend:
+        backend = self._backends.get(name)
+        if backend is None:
+            backend = _Backend(self._limits_for(name))
+            self._backends[name] = backend
+        return backend
+
+    async def _acquire(self, name: str, deadline: float) -> _Backend:
+        """Wait for a slot of backend name until deadline, if the queue has room"""
+        backend = self._backend(name)
+        if backend.semaphore.locked() and backend.waiting >= backend.limits.max_queue:
+            backend.rejected += 1
+            raise GatewayOverloaded(f"{name} is busy: {backend.active} running, {backend.waiting} waiting")
+        backend.waiting += 1
+        start = time.monotonic()
+        try:
+            await asyncio.wait_for(backend.semaphore.acquire(), max(deadline - time.monotonic(), 0))
+        except asyncio.TimeoutError:
+            backend.timeouts += 1
+            raise GatewayTimeout(f"No {name} slot free within the deadline") from None
+        except asyncio.CancelledError:
+            backend.cancelled += 1
+            raise
+        finally:
+            backend.waiting -= 1
+            backend.wait_seconds += time.monotonic() - start
+        backend.active += 1
+        return backend
+
+    async def _run(self, name: str, func: Callable, deadline: float):
+        backend = await self._acquire(name, deadline)
+        future = asyncio.get_running_loop().run_in_executor(None, func)
+
+        def finished(done):
+            backend.release()
+            if done.cancelled() or done.exception() is not None:
+                backend.failed += 1
+            else:
+                backend.completed += 1
+
+        # The slot stays taken until the blocking call returns, even if its caller gave up
+        future.add_done_callback(finished)
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), max(deadline - time.monotonic(), 0))
+        except asyncio.TimeoutError:
+            backend.timeouts += 1
+            raise GatewayTimeout(f"{name} call exceeded its deadline") from None
+        except asyncio.CancelledError:
+            backend.cancelled += 1
+            raise
+
+    def _submit(self, backend: str, func: Callable, args, kwargs, timeout: Optional[float]):
+        loop = self._ensure_started()
+        deadline = self._deadline_for(backend, timeout)
+        return asyncio.run_coroutine_threadsafe(
+            self._run(backend, functools.partial(func, *args, **kwargs), deadline), loop)
+
+    def call(self, backend: str, func: Callable, *args, timeout: Optional[float] = None, **kwargs) -> Any:
+        """
+        Run func(*args, **kwargs) against backend and wait for its result.
+
+        Args:
+            backend: Backend name ('gemini', 'local-ai')
+            func: The blocking backend call
+            timeout: Seconds for waiting plus running (the backend's timeout when None)
+
+        Raises:
+            GatewayOverloaded, GatewayTimeout, or whatever func raised
+        """
+        future = self._submit(backend, func, args, kwargs, timeout)
+        try:
+            return future.result()
+        except BaseException:
+            future.cancel()
+            raise
+
+    async def acall(self, backend: str, func: Callable, *args, timeout: Optional[float] = None, **kwargs) -> Any:
+        """call() for coroutines on another event loop; cancelling the awaiting task cancels the call"""
+        return await asyncio.wrap_future(self._submit(backend, func, args, kwargs, timeout))
+
+    def stream(self, backend: str, chunks: Iterable, timeout: Optional[float] = None) -> Iterator:
+        """
+        Iterate chunks (a blocking reply stream) while holding a slot of backend.
+
+        The deadline is checked between chunks. Closing the returned iterator
+        (e.g. a disconnected SSE client) closes chunks, which stops the
+        backend request, and frees the slot.
+        """
+        loop = self._ensure_started()
+        deadline = self._deadline_for(backend, timeout)
+        acquire = asyncio.run_coroutine_threadsafe(self._acquire(backend, deadline), loop)
+        try:
+            state = acquire.result()
+        except BaseException:
+            acquire.cancel()
+            raise
+        outcome = 'cancelled'
+        try:
+            for chunk in chunks:
+                if time.monotonic() > deadline:
+                    outcome = 'timeout'
+                    raise GatewayTimeout(f"{backend} stream exceeded its deadline")
+                yield chunk
+            outcome = 'completed'
+        except GatewayTimeout:
+            raise
+        except Exception:
+            outcome = 'failed'
+            raise
+        finally:
+            close = getattr(chunks, 'close', None)
+            if close is not None:
+                close()
+            loop.call_soon_threadsafe(self._finish_stream, state, outcome)
+
+    def _finish_stream(self, backend: _Backend, outcome: str):
+        backend.release()
+        if outcome == 'completed':
+            backend.completed += 1
+        elif outcome == 'timeout':
+            backend.timeouts += 1
+        elif outcome == 'cancelled':
+            backend.cancelled += 1
+        else:
+            backend.failed += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = {}
+        for name, backend in list(self._backends.items()):
+            finished = backend.completed + backend.failed
+            stats[name] = {
+                "max_concurrency": backend.limits.max_concurrency,
+                "max_queue": backend.limits.max_queue,
+                "timeout_seconds": backend.limits.timeout,
+                "active": backend.active,
+                "waiting": backend.waiting,
+                "completed": backend.completed,
+                "failed": backend.failed,
+                "rejected": backend.rejected,
+                "timeouts": backend.timeouts,
+                "cancelled": backend.cancelled,
+                "avg_wait_ms": round(1000 * backend.wait_seconds / finished, 2) if finished else None,
+            }
+        return stats
+
+
+_gateway = None
+_gateway_lock = threading.Lock()
+
+
+def get_llm_gateway() -> LLMGateway:
+    """The process-wide gateway shared by every caller"""
+    global _gateway
+    if _gateway is None:
+        with _gateway_lock:
+            if _gateway is None:
+                _gateway = LLMGateway()
+    return _gateway
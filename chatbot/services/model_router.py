@@ -0,0 +1,290 @@
+"""
+Model Router Module
+Picks the LLM backend (Gemini or the local Ollama service) that answers a
+chat message. The client names a preferred model; the router keeps track of
+how each backend has been doing and moves traffic off one that is failing:
+
+- a rolling window of recent call latencies and outcomes per backend
+- a circuit breaker per backend: after repeated failures in a row the
+  circuit opens and requests fail over to the other backend instead of
+  waiting for the broken one to time out
+- after a cooldown, a background probe checks the backend (half-open); it
+  closes the circuit on success and keeps it open on failure. Backends
+  without a probe get a single live trial request instead
+- optionally (MODEL_ROUTER_ENFORCE_SLO), the client's preference is only
+  honoured while that backend meets its latency and error-rate SLO
+
+Every routing decision is counted and reported by get_stats().
+
+Configuration (environment), per backend with the name upper-cased and
+dashes as underscores, e.g. MODEL_ROUTER_LOCAL_AI_SLO_MS:
+    MODEL_ROUTER_<BACKEND>_SLO_MS     p95 latency objective in milliseconds
+    MODEL_ROUTER_MAX_ERROR_RATE       error-rate objective (default 0.25)
+    MODEL_ROUTER_FAILURE_THRESHOLD    failures in a row that open the circuit (default 5)
+    MODEL_ROUTER_OPEN_SECONDS         seconds before an open circuit is probed (default 30)
+    MODEL_ROUTER_WINDOW               recent calls kept per backend (default 50)
+    MODEL_ROUTER_WINDOW_SECONDS       age after which a call no longer counts (default 300)
+    MODEL_ROUTER_ENFORCE_SLO          route around a backend missing its SLO (default false)
+"""
+import os
+import time
+import logging
+import threading
+from collections import Counter, deque
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+# p95 latency objectives; the local model generates more slowly
+DEFAULT_SLO_MS = {
+    'gemini': 8000.0,
+    'local-ai': 15000.0,
+}
+FALLBACK_SLO_MS = 10000.0
+# Fewer recent calls than this say nothing about a backend's SLO
+MIN_SLO_SAMPLES = 5
+
+
+class BackendHealth:
+    """Rolling latency/error window and circuit breaker state of one backend"""
+
+    def __init__(self, slo_ms: float, window: int):
+        self.slo_ms = slo_ms
+        self.calls = deque(maxlen=window)  # (finished at, latency ms, ok)
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self.probes = 0
+        self.probe_failures = 0
+        self.probe = None
+
+    def recent(self, window_seconds: float):
+        cutoff = time.monotonic() - window_seconds
+        return [call for call in self.calls if call[0] >= cutoff]
+
+    def summary(self, window_seconds: float, max_error_rate: float) -> Dict[str, Any]:
+        calls = self.recent(window_seconds)
+        latencies = sorted(latency for _, latency, _ in calls)
+        errors = sum(1 for _, _, ok in calls if not ok)
+        error_rate = errors / len(calls) if calls else 0.0
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] if latencies else None
+        meets_slo = len(calls) < MIN_SLO_SAMPLES or (p95 <= self.slo_ms and error_rate <= max_error_rate)
+        return {
+            "samples": len(calls),
+            "latency_ms_p50": round(latencies[len(latencies) // 2], 1) if latencies else None,
+            "latency_ms_p95": round(p95, 1) if p95 is not None else None,
+            "error_rate": round(error_rate, 4),
+            "slo_ms": self.slo_ms,
+            "meets_slo": meets_slo,
+        }
+
+
+class ModelRouter:
+    """Chooses a backend per request from the client's preference and backend health; thread-safe"""
+
+    def __init__(self,
+                 slo_ms: Optional[Dict[str, float]] = None,
+                 max_error_rate: float = 0.25,
+                 failure_threshold: int = 5,
+                 open_seconds: float = 30.0,
+                 window: int = 50,
+                 window_seconds: float = 300.0,
+                 enforce_slo: bool = False,
+                 probe_interval: float = 1.0):
+        self.slo_ms = dict(DEFAULT_SLO_MS, **(slo_ms or {}))
+        self.max_error_rate = max_error_rate
+        self.failure_threshold = max(1, failure_threshold)
+        self.open_seconds = open_seconds
+        self.window = window
+        self.window_seconds = window_seconds
+        self.enforce_slo = enforce_slo
+        self.probe_interval = probe_interval
+        self._backends: Dict[str, BackendHealth] = {}
+        self._decisions = Counter()
+        self._lock = threading.Lock()
+        self._probe_thread = None
+
+    @classmethod
+    def from_env(cls) -> 'ModelRouter':
+        slo_ms = {}
+        for backend in DEFAULT_SLO_MS:
+            value = os.environ.get(f"MODEL_ROUTER_{backend.upper().replace('-', '_')}_SLO_MS")
+            if value:
+                slo_ms[backend] = float(value)
+        return cls(
+            slo_ms=slo_ms,
+            max_error_rate=float(os.environ.get('MODEL_ROUTER_MAX_ERROR_RATE', 0.25)),
+            failure_threshold=int(os.environ.get('MODEL_ROUTER_FAILURE_THRESHOLD', 5)),
+            open_seconds=float(os.environ.get('MODEL_ROUTER_OPEN_SECONDS', 30)),
+            window=int(os.environ.get('MODEL_ROUTER_WINDOW', 50)),
+            window_seconds=float(os.environ.get('MODEL_ROUTER_WINDOW_SECONDS', 300)),
+            enforce_slo=os.environ.get('MODEL_ROUTER_ENFORCE_SLO', 'false').lower() in ('1', 'true', 'yes'),
+        )
+
+    def _backend(self, name: str) -> BackendHealth:
+        backend = self._backends.get(name)
+        if backend is None:
+            backend = BackendHealth(self.slo_ms.get(name, FALLBACK_SLO_MS), self.window)
+            self._backends[name] = backend
+        return backend
+
+    def set_probe(self, name: str, probe: Callable[[], bool]):
+        """Health check run in the background while name's circuit is open; returns True if healthy"""
+        with self._lock:
+            self._backend(name).probe = probe
+
+    def _admits(self, name: str, backend: BackendHealth) -> bool:
+        """Whether a request may go to backend now; claims the trial request of a half-open circuit"""
+        if backend.state == CLOSED:
+            return True
+        # A trial that never reported back (e.g. its client went away) is replaced after another cooldown
+        if (backend.state in (OPEN, HALF_OPEN) and backend.probe is None
+                and time.monotonic() - backend.opened_at >= self.open_seconds):
+            backend.state = HALF_OPEN
+            backend.opened_at = time.monotonic()
+            logger.info(f"Circuit for {name} half-open: sending one trial request")
+            return True
+        return False
+
+    def _meets_slo(self, backend: BackendHealth) -> bool:
+        return backend.summary(self.window_seconds, self.max_error_rate)["meets_slo"]
+
+    def choose(self, preferred: str, available: Iterable[str]) -> Tuple[str, str]:
+        """
+        The backend to send a request to.
+
+        Args:
+            preferred: The backend the client asked for
+            available: Backends configured for this request
+
+        Returns:
+            tuple: (backend, reason); reason is 'preferred' unless the request
+                fails over ('preferred_unavailable', 'preferred_circuit_open',
+                'preferred_slo_breach') or nothing healthy is left ('no_healthy_backend')
+        """
+        available = list(available)
+        with self._lock:
+            others = [name for name in available if name != preferred]
+            if preferred not in available:
+                reason = 'preferred_unavailable'
+            else:
+                backend = self._backend(preferred)
+                if not self._admits(preferred, backend):
+                    reason = 'preferred_circuit_open'
+                elif (self.enforce_slo and backend.state == CLOSED and not self._meets_slo(backend)
+                      and any(self._backend(name).state == CLOSED and self._meets_slo(self._backend(name))
+                              for name in others)):
+                    reason = 'preferred_slo_breach'
+                else:
+                    reason = 'preferred'
+            chosen = preferred
+            if reason != 'preferred':
+                for name in others:
+                    candidate = self._backend(name)
+                    if reason == 'preferred_slo_breach':
+                        usable = candidate.state == CLOSED and self._meets_slo(candidate)
+                    else:
+                        usable = self._admits(name, candidate)
+                    if usable:
+                        chosen = name
+                        break
+                else:
+                    # Nothing better to fail over to: try the client's choice anyway
+                    reason = 'no_healthy_backend'
+            self._decisions[(preferred, chosen, reason)] += 1
+        if chosen != preferred:
+            logger.info(f"Routing {preferred} request to {chosen} ({reason})")
+        return chosen, reason
+
+    def record(self, name: str, latency_seconds: float, ok: bool):
+        """Outcome of a call to backend name; opens or closes its circuit"""
+        opened = False
+        with self._lock:
+            backend = self._backend(name)
+            backend.calls.append((time.monotonic(), latency_seconds * 1000, ok))
+            if ok:
+                backend.consecutive_failures = 0
+                if backend.state == HALF_OPEN:
+                    backend.state = CLOSED
+                    logger.info(f"Circuit for {name} closed after a successful trial request")
+            else:
+                backend.consecutive_failures += 1
+                if backend.state == HALF_OPEN:
+                    self._open(name, backend, "the trial request failed")
+                    opened = True
+                elif backend.state == CLOSED and backend.consecutive_failures >= self.failure_threshold:
+                    self._open(name, backend, f"{backend.consecutive_failures} failures in a row")
+                    opened = True
+        if opened:
+            self._start_probing()
+
+    def _open(self, name: str, backend: BackendHealth, cause: str):
+        backend.state = OPEN
+        backend.opened_at = time.monotonic()
+        backend.times_opened += 1
+        logger.warning(f"Circuit for {name} opened ({cause}); failing over for {self.open_seconds:.0f}s")
+
+    def _start_probing(self):
+        with self._lock:
+            if self._probe_thread is None:
+                self._probe_thread = threading.Thread(target=self._probe_loop, name='model-router-probe', daemon=True)
+                self._probe_thread.start()
+
+    def _probe_loop(self):
+        while True:
+            time.sleep(self.probe_interval)
+            self.probe_due()
+
+    def probe_due(self):
+        """Probe every backend whose circuit has been open for open_seconds"""
+        with self._lock:
+            due = []
+            for name, backend in self._backends.items():
+                if (backend.state == OPEN and backend.probe is not None
+                        and time.monotonic() - backend.opened_at >= self.open_seconds):
+                    backend.state = HALF_OPEN
+                    backend.probes += 1
+                    due.append((name, backend))
+        for name, backend in due:
+            try:
+                healthy = bool(backend.probe())
+            except Exception as e:
+                logger.warning(f"Health probe of {name} failed: {e}")
+                healthy = False
+            with self._lock:
+                if healthy:
+                    backend.state = CLOSED
+                    backend.consecutive_failures = 0
+                    logger.info(f"Circuit for {name} closed: health probe succeeded")
+                else:
+                    backend.probe_failures += 1
+                    self._open(name, backend, "health probe failed")
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            backends = {
+                name: dict(backend.summary(self.window_seconds, self.max_error_rate),
+                           circuit=backend.state,
+                           consecutive_failures=backend.consecutive_failures,
+                           times_opened=backend.times_opened,
+                           probes=backend.probes,
+                           probe_failures=backend.probe_failures)
+                for name, backend in self._backends.items()
+            }
+            decisions = {f"{preferred}->{chosen}:{reason}": count
+                         for (preferred, chosen, reason), count in self._decisions.items()}
+            routed = sum(self._decisions.values())
+            failovers = sum(count for (preferred, chosen, _), count in self._decisions.items() if chosen != preferred)
+        return {
+            "enforce_slo": self.enforce_slo,
+            "routed": routed,
+            "failovers": failovers,
+            "failover_rate": round(failovers / routed, 4) if routed else 0.0,
+            "decisions": decisions,
+            "backends": backends,
+        }
@@ -0,0 +1,166 @@
+"""
+Single-Flight Module
+Coalesces identical in-flight LLM requests. When many shoppers send the same
+question within seconds (e.g. right after a promo goes out), the first one
+runs the backend call and the others wait for it and share its result, so
+the model is asked once instead of once per shopper.
+
+Requests are keyed on a hash of the backend name and the final prompt, so
+only requests the backend would answer identically are coalesced. Unlike the
+semantic response cache, nothing is kept once the call finishes.
+
+Followers wait at most as long as the call itself may take: a streaming
+leader reads the backend only as fast as its own client consumes the reply,
+so a stalled client must not hold up the requests sharing its answer.
+"""
+import hashlib
+import logging
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class FlightAbandoned(Exception):
+    """The leader stopped before producing a result (e.g. its client disconnected)"""
+
+
+class FlightTimeout(Exception):
+    """The leader had no result within the time a follower was willing to wait"""
+
+
+class Flight:
+    """One in-flight backend call and the outcome its followers wait for"""
+
+    def __init__(self, key: str):
+        self.key = key
+        self.followers = 0
+        self.result = None
+        self.error = None
+        self.abandoned = False
+        self._done = threading.Event()
+
+    @property
+    def done(self) -> bool:
+        return self._done.is_set()
+
+
+class SingleFlight:
+    """Thread-safe registry of in-flight calls, at most one per key"""
+
+    def __init__(self):
+        self._flights: Dict[str, Flight] = {}
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.coalesced = 0
+        self.abandoned = 0
+        self.failed = 0
+        self.timed_out = 0
+
+    @staticmethod
+    def key(model: str, prompt: str) -> str:
+        """Key of a request: a hash of the model and the exact prompt it is sent"""
+        return hashlib.sha256(f"{model}\x00{prompt}".encode('utf-8')).hexdigest()
+
+    def join(self, key: str) -> Tuple[Flight, bool]:
+        """
+        Join the flight for key, starting one if none is in progress.
+
+        Returns:
+            tuple: (flight, is_leader); the leader must call finish() on it
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                flight.followers += 1
+                return flight, False
+            flight = Flight(key)
+            self._flights[key] = flight
+            self.leaders += 1
+            return flight, True
+
+    def finish(self, flight: Flight, result: Any = None, error: Optional[BaseException] = None,
+               abandoned: bool = False):
+        """Publish the leader's outcome to the followers; later calls for the same flight are ignored"""
+        with self._lock:
+            if flight.done:
+                return
+            if self._flights.get(flight.key) is flight:
+                del self._flights[flight.key]
+            flight.result, flight.error, flight.abandoned = result, error, abandoned
+            if abandoned:
+                self.abandoned += 1
+            elif error is not None:
+                self.failed += 1
+            elif flight.followers:
+                self.coalesced += flight.followers
+        flight._done.set()
+
+    def wait(self, flight: Flight, timeout: Optional[float] = None) -> Any:
+        """
+        The leader's result, once it has one.
+
+        Args:
+            timeout: Seconds to wait at most (no limit when None)
+
+        Raises:
+            FlightAbandoned if the leader gave up, FlightTimeout if it has no
+            result within timeout, or the exception the leader's call raised
+        """
+        if not flight._done.wait(timeout):
+            with self._lock:
+                # Still in flight: stop following it; otherwise finish() is about to publish the outcome
+                if self._flights.get(flight.key) is flight:
+                    flight.followers -= 1
+                    self.timed_out += 1
+                    raise FlightTimeout(f"Flight {flight.key[:12]} had no result after {timeout:.1f}s")
+            flight._done.wait()
+        if flight.abandoned:
+            raise FlightAbandoned(f"Flight {flight.key[:12]} was abandoned by its leader")
+        if flight.error is not None:
+            raise flight.error
+        return flight.result
+
+    def do(self, key: str, func: Callable, *args, wait_timeout: Optional[float] = None,
+           **kwargs) -> Tuple[Any, bool]:
+        """
+        Run func(*args, **kwargs) unless an identical call is in flight, in
+        which case wait for that one and return its result.
+
+        Args:
+            wait_timeout: Seconds to wait at most for an identical call in flight
+
+        Returns:
+            tuple: (result, shared); shared is True if another caller's result was reused
+        """
+        while True:
+            flight, leader = self.join(key)
+            if not leader:
+                try:
+                    return self.wait(flight, wait_timeout), True
+                except FlightAbandoned:
+                    continue  # start (or join) a new flight
+            try:
+                result = func(*args, **kwargs)
+            except BaseException as e:
+                # Callers that were waiting get the same error instead of repeating the call
+                self.finish(flight, error=e)
+                raise
+            self.finish(flight, result=result)
+            return result, False
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            in_flight = len(self._flights)
+            waiting = sum(flight.followers for flight in self._flights.values())
+        requests = self.leaders + self.coalesced
+        return {
+            "backend_calls": self.leaders,
+            "saved_backend_calls": self.coalesced,
+            "saved_rate": round(self.coalesced / requests, 4) if requests else 0.0,
+            "failed": self.failed,
+            "abandoned": self.abandoned,
+            "timed_out": self.timed_out,
+            "in_flight": in_flight,
+            "waiting": waiting,
+        }
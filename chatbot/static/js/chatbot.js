@@ -92,6 +92,13 @@ document.addEventListener('DOMContentLoaded', function() {
         }
 
         showTypingIndicator();
+        try {
+            // Stream the reply as it is generated; fall back to the JSON endpoint
+            // only if streaming is unsupported or the stream request is refused
+            if (await streamReply(message, selectedModel)) return;
+        } catch (error) {
+            console.warn('Streaming failed, falling back to /chat:', error);
+        }
         try {
             const response = await fetch(`${baseUrl}/chat`, {
                 method: 'POST',
@@ -119,6 +126,76 @@ document.addEventListener('DOMContentLoaded', function() {
         }
     }
 
+    // Reads the Server-Sent Events of /chat/stream into a growing bot message.
+    // Returns false if the stream could not be opened, so the caller can retry
+    // with /chat; once it is open the model is already answering, so failures
+    // are shown in the chat instead of asking again.
+    async function streamReply(message, selectedModel) {
+        if (!window.ReadableStream || !window.TextDecoder) return false;
+        const response = await fetch(`${baseUrl}/chat/stream`, {
+            method: 'POST',
+            headers: { 
+                'Content-Type': 'application/json',
+                'Accept': 'text/event-stream'
+            },
+            mode: 'cors',
+            body: JSON.stringify({ 
+                message: message,
+                model: selectedModel
+            })
+        });
+        if (!response.ok || !response.body) return false;
+
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        let reply = '';
+        let messageText = null;
+        const showText = text => {
+            if (!messageText) {
+                removeTypingIndicator();
+                messageText = addMessage('', 'bot');
+            }
+            messageText.textContent = text;
+            scrollToBottom();
+        };
+
+        try {
+            while (true) {
+                const { value, done } = await reader.read();
+                if (done) break;
+                buffer += decoder.decode(value, { stream: true });
+                let boundary;
+                while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+                    const rawEvent = buffer.slice(0, boundary);
+                    buffer = buffer.slice(boundary + 2);
+                    let eventName = 'message';
+                    let data = '';
+                    rawEvent.split('\n').forEach(line => {
+                        if (line.startsWith('event: ')) eventName = line.slice(7);
+                        else if (line.startsWith('data: ')) data += line.slice(6);
+                    });
+                    if (!data) continue;
+                    const payload = JSON.parse(data);
+                    if (eventName === 'chunk') {
+                        reply += payload.text;
+                        showText(reply);
+                    } else if (eventName === 'done') {
+                        showText(payload.reply || 'Sorry, I encountered an error.');
+                    } else if (eventName === 'error') {
+                        console.error('Chat stream error:', payload.error);
+                        showText(payload.reply || 'Sorry, I encountered an error.');
+                    }
+                }
+            }
+        } catch (error) {
+            // Keep the partial reply rather than asking again
+            console.error('Chat stream interrupted:', error);
+        }
+        if (!messageText) showText('Sorry, I encountered an error.');
+        return true;
+    }
+
     sendButton.addEventListener('click', sendMessage);
     chatbotInput.addEventListener('keypress', e => e.key === 'Enter' && sendMessage());
 
@@ -282,6 +359,7 @@ document.addEventListener('DOMContentLoaded', function() {
         messageDiv.appendChild(content);
         chatbotMessages.appendChild(messageDiv);
         scrollToBottom();
+        return messageText;
     }
 
     function showTypingIndicator() {
@@ -0,0 +1,134 @@
+"""
+Product Matcher Module
+Finds the products a Telegram message mentions, so the bot can attach their
+images. Product names from the catalog and the showcase keyword aliases are
+compiled into one Aho–Corasick automaton, which scans a message once whatever
+the number of keywords. Matches are on whole words (a trailing plural "s" or
+"es" is allowed), and the longest match wins where keywords overlap, so
+"face oil" beats "oil" and "Vitamin C Serum" beats "serum".
+"""
+import re
+import logging
+from collections import deque
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_NON_WORD = re.compile(r"[^\w]+")
+
+
+def normalize_text(text: str) -> str:
+    """Lower-case, punctuation to single spaces, padded so every word has a space on both sides"""
+    return f" {_NON_WORD.sub(' ', text.lower()).strip()} "
+
+
+def catalog_product_names(contexts: Iterable[str]) -> List[str]:
+    """Product names from the embedFunc contexts ('Product Name: ...' is the first field)"""
+    names = []
+    for context in contexts:
+        # embedFunc separates the context fields with a literal backslash-n
+        first_line = context.split('\\n', 1)[0].split('\n', 1)[0]
+        if first_line.startswith('Product Name: '):
+            names.append(first_line[len('Product Name: '):].strip())
+    return names
+
+
+class AhoCorasick:
+    """Multi-pattern automaton over normalized text, returning whole-word leftmost-longest matches"""
+
+    def __init__(self, patterns: Dict[str, Any]):
+        """
+        Args:
+            patterns: keyword -> value; keywords are normalized with normalize_text
+        """
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # (keyword length, value) of every keyword ending at a state, including via fail links
+        self._output: List[List[Tuple[int, Any]]] = [[]]
+        for keyword, value in patterns.items():
+            keyword = normalize_text(keyword).strip()
+            if keyword:
+                self._add(keyword, value)
+        self._build_fail_links()
+
+    def __len__(self) -> int:
+        return len(self._goto)
+
+    def _add(self, keyword: str, value: Any):
+        state = 0
+        for char in keyword:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            state = next_state
+        # A later duplicate keyword replaces the earlier value
+        self._output[state] = [(len(keyword), value)]
+
+    def _build_fail_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(char, 0)
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+    def _scan(self, text: str):
+        """All (start, end, value) whole-word matches in normalized text"""
+        state = 0
+        for position, char in enumerate(text):
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            for length, value in self._output[state]:
+                start, end = position + 1 - length, position + 1
+                if text[start - 1] != ' ':
+                    continue
+                # Whole word, allowing plurals: "serums", "glosses"
+                for suffix in ('', 's', 'es'):
+                    if text.startswith(suffix + ' ', end):
+                        yield start, end + len(suffix), value
+                        break
+
+    def find(self, text: str) -> List[Tuple[int, int, Any]]:
+        """Non-overlapping matches in normalized text, leftmost first and longest where they overlap"""
+        matches = sorted(self._scan(text), key=lambda match: (match[0], -(match[1] - match[0])))
+        selected, covered_to = [], 0
+        for start, end, value in matches:
+            if start >= covered_to:
+                selected.append((start, end, value))
+                covered_to = end
+        return selected
+
+
+class ProductMatcher:
+    """Product names mentioned in a message, built for one catalog version"""
+
+    def __init__(self, aliases: Dict[str, str], product_names: Iterable[str] = (),
+                 version: Optional[str] = None):
+        """
+        Args:
+            aliases: keyword -> product name (showcase keywords such as 'face oil')
+            product_names: Catalog product names, each matched by its full name
+            version: Catalog version the matcher was built for
+        """
+        patterns = dict(aliases)
+        patterns.update((name, name) for name in product_names)
+        self.version = version
+        self.keywords = len(patterns)
+        self.automaton = AhoCorasick(patterns)
+
+    def match(self, message: str) -> List[str]:
+        """Product names mentioned in message, in order of appearance, without duplicates"""
+        names = []
+        for _, _, name in self.automaton.find(normalize_text(message)):
+            if name not in names:
+                names.append(name)
+        return names
@@ -7,6 +7,7 @@ import os
 import sys
 import time
 import uuid
+import threading
 from telegram import Update
 from telegram.ext import Application, CommandHandler, MessageHandler, filters, ContextTypes
 from telegram.error import Conflict, TimedOut, NetworkError
@@ -19,14 +20,19 @@ chatbot_services_path = os.path.join(parent_dir, 'chatbot', 'services')
 if chatbot_services_path not in sys.path:
     sys.path.insert(0, chatbot_services_path)
 
+# The shared retrieval engine lives in the project root's Vector_Store package
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
 from gemini_service import GeminiManager
+from intent_router import IntentRouter
+from llm_gateway import get_llm_gateway
+from services.product_matcher import ProductMatcher, catalog_product_names
 from services.telegram_email_service import TelegramEmailService
+from Vector_Store.retrieval_engine import get_retrieval_engine
 
 import pandas as pd
 import numpy as np
-import faiss
-import pickle
-from sentence_transformers import SentenceTransformer
 
 # Set up logging
 logging.basicConfig(
@@ -35,6 +41,9 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Product images attached to a single reply
+MAX_PRODUCT_IMAGES = int(os.environ.get('TELEGRAM_MAX_PRODUCT_IMAGES', 3))
+
 class TelegramBotService:
     def __init__(self, token: str):
         """
@@ -60,10 +69,19 @@ class TelegramBotService:
             logger.warning("GeminiManager not available, using fallback responses")
             self.gemini_manager = None
             
-        self.model = SentenceTransformer('all-MiniLM-L6-v2')
+        self.retrieval_engine = get_retrieval_engine()
+
+        # Shared with the web app: Gemini calls from both count against one limit
+        self.llm_gateway = get_llm_gateway()
         
         # Load RAG components
         self.load_rag_components()
+
+        # Greetings, FAQs and "show me ..." commands answered without a Gemini call
+        self.intent_router = IntentRouter(
+            encode=lambda texts: self.retrieval_engine.encode(texts),
+            search=self.search_similar_products,
+        )
         
         # Product image mapping for automatic image sending
         self.product_images = {
@@ -90,6 +108,12 @@ class TelegramBotService:
         
         # Set up images directory path
         self.images_dir = os.path.join(parent_dir, 'chatbot', 'static', 'images')
+
+        # Keyword automaton over catalog product names and the aliases above
+        self.product_matcher = None
+        self.product_image_files = {}  # product name -> image file in images_dir
+        self._product_matcher_lock = threading.Lock()
+        self._current_product_matcher()
         
         # Add handlers
         self.setup_handlers()
@@ -102,35 +126,14 @@ class TelegramBotService:
         self.setup_sio_handlers()
         
     def load_rag_components(self):
-        """Load FAISS index and product contexts for RAG"""
+        """Load FAISS index and product contexts for RAG through the shared retrieval engine"""
         try:
-            # Get the parent directory path
-            parent_dir = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
-            cache_dir = os.path.join(parent_dir, 'cache')
-            
-            # Load FAISS index
-            faiss_path = os.path.join(cache_dir, 'faiss_index.idx')
-            if os.path.exists(faiss_path):
-                self.index = faiss.read_index(faiss_path)
-                logger.info("FAISS index loaded successfully")
+            if self.retrieval_engine.load():
+                logger.info(f"RAG components loaded successfully: {self.retrieval_engine.get_stats()}")
             else:
-                logger.warning(f"FAISS index not found at {faiss_path}")
-                self.index = None
-            
-            # Load product contexts
-            contexts_path = os.path.join(cache_dir, 'product_contexts.pkl')
-            if os.path.exists(contexts_path):
-                with open(contexts_path, 'rb') as f:
-                    self.product_contexts = pickle.load(f)
-                logger.info("Product contexts loaded successfully")
-            else:
-                logger.warning(f"Product contexts not found at {contexts_path}")
-                self.product_contexts = []
-                
+                logger.warning("RAG components not available. Product search will be skipped.")
         except Exception as e:
             logger.error(f"Error loading RAG components: {e}")
-            self.index = None
-            self.product_contexts = []
     
     def setup_handlers(self):
         """Set up command and message handlers"""
@@ -369,6 +372,47 @@ class TelegramBotService:
             parse_mode='Markdown'
         )
     
+    def _current_product_matcher(self) -> ProductMatcher:
+        """The product matcher for the loaded catalog, rebuilt when the catalog version changes"""
+        version = self.retrieval_engine.index_version
+        matcher = self.product_matcher
+        if matcher is not None and matcher.version == version:
+            return matcher
+        with self._product_matcher_lock:
+            if self.product_matcher is None or self.product_matcher.version != version:
+                start = time.perf_counter()
+                aliases = {keyword: os.path.splitext(image_file)[0]
+                           for keyword, image_file in self.product_images.items()}
+                product_names = catalog_product_names(self.retrieval_engine.product_contexts or [])
+                image_files = {os.path.splitext(f)[0]: f for f in self.product_images.values()}
+                try:
+                    image_files.update((os.path.splitext(f)[0], f) for f in os.listdir(self.images_dir))
+                except OSError:
+                    pass
+                self.product_image_files = image_files
+                self.product_matcher = ProductMatcher(aliases, product_names, version)
+                logger.info(f"Product matcher built for catalog {version}: {self.product_matcher.keywords} keywords, "
+                            f"{len(self.product_matcher.automaton)} states in {time.perf_counter() - start:.2f}s")
+            return self.product_matcher
+
+    def detect_products_from_message(self, message: str):
+        """
+        Detect the products the user is asking about from product names and keywords
+        
+        Args:
+            message (str): User's message
+            
+        Returns:
+            list: Image filenames of the mentioned products that have an image, in message order
+        """
+        detected = []
+        for product_name in self._current_product_matcher().match(message):
+            image_file = self.product_image_files.get(product_name)
+            if image_file and image_file not in detected:
+                logger.info(f"Detected product '{product_name}' -> {image_file}")
+                detected.append(image_file)
+        return detected
+
     def detect_product_from_message(self, message: str):
         """
         Detect which product the user is asking about based on keywords
@@ -377,18 +421,16 @@ class TelegramBotService:
             message (str): User's message
             
         Returns:
-            str or None: Image filename if product detected, None otherwise
+            str or None: Image filename of the first product detected, None otherwise
         """
-        message_lower = message.lower()
-        
-        # Check for product keywords
-        for keyword, image_file in self.product_images.items():
-            if keyword in message_lower:
-                logger.info(f"Detected product keyword '{keyword}' -> {image_file}")
-                return image_file
-        
-        return None
+        detected = self.detect_products_from_message(message)
+        return detected[0] if detected else None
     
+    async def send_product_images(self, update: Update, context: ContextTypes.DEFAULT_TYPE, image_filenames):
+        """Send the images of the products mentioned in a message, up to MAX_PRODUCT_IMAGES"""
+        for image_filename in image_filenames[:MAX_PRODUCT_IMAGES]:
+            await self.send_product_image(update, context, image_filename)
+
     async def send_product_image(self, update: Update, context: ContextTypes.DEFAULT_TYPE, image_filename: str):
         """
         Send product image to the user
@@ -444,45 +486,53 @@ class TelegramBotService:
         # --- Standard AI Chatbot Logic ---
         logger.info(f"Received message from {update.message.from_user.first_name}: {message_text}")
 
-        image_filename = self.detect_product_from_message(message_text)
+        image_filenames = self.detect_products_from_message(message_text)
+
+        routed = self.route_intent(message_text)
+        if routed:
+            await update.message.reply_text(routed["reply"])
+            await self.send_product_images(update, context, image_filenames)
+            return
         
         if self.gemini_manager:
             try:
                 similar_products = self.search_similar_products(message_text)
-                response = self.gemini_manager.generate_response(message_text, context=similar_products)
+                # Runs on the gateway's worker threads, so the bot's event loop stays free
+                response = await self.llm_gateway.acall(
+                    'gemini', self.gemini_manager.generate_response, message_text, context=similar_products)
                 await update.message.reply_text(response)
-                if image_filename:
-                    await self.send_product_image(update, context, image_filename)
+                await self.send_product_images(update, context, image_filenames)
             except Exception as e:
                 logger.error(f"Error with Gemini, using fallback: {e}")
                 fallback_response = self.get_fallback_response(message_text)
                 await update.message.reply_text(fallback_response)
-                if image_filename:
-                    await self.send_product_image(update, context, image_filename)
+                await self.send_product_images(update, context, image_filenames)
         else:
             fallback_response = self.get_fallback_response(message_text)
             await update.message.reply_text(fallback_response)
-            if image_filename:
-                await self.send_product_image(update, context, image_filename)
+            await self.send_product_images(update, context, image_filenames)
+
+    def route_intent(self, message: str):
+        """Templated answer for the message if the intent router is confident about it"""
+        embedding = None
+        if self.retrieval_engine.is_ready:
+            try:
+                embedding = self.retrieval_engine.embed_query(message)
+            except Exception as e:
+                logger.warning(f"Could not embed message for intent routing: {e}")
+        routed = self.intent_router.route(message, embedding)
+        if routed:
+            logger.info(f"Answered from intent '{routed['intent']}' ({routed['method']})")
+        return routed
 
     def search_similar_products(self, query: str, top_k: int = 3):
         """Search for similar products using RAG"""
         try:
-            if self.index is None or not self.product_contexts:
+            if not self.retrieval_engine.is_ready:
                 logger.warning("RAG components not loaded. Skipping search.")
                 return []
 
-            # Generate embedding for the query
-            query_embedding = self.model.encode([query])
-
-            # Search in FAISS index
-            distances, indices = self.index.search(query_embedding.astype('float32'), top_k)
-
-            # Get relevant contexts
-            relevant_contexts = []
-            for idx in indices[0]:
-                if idx < len(self.product_contexts):
-                    relevant_contexts.append(self.product_contexts[idx])
+            relevant_contexts = self.retrieval_engine.search(query, top_k=top_k)
 
             logger.info(f"Found {len(relevant_contexts)} relevant contexts for query: '{query}'")
             return relevant_contexts
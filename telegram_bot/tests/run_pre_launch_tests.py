@@ -66,8 +66,7 @@ def run_system_health_check():
         'chatbot/app.py',
         'chatbot/services/gemini_service.py',
         'chatbot/services/telegram_service.py',
-        'cache/faiss_index.idx',
-        'cache/product_contexts.pkl'
+        'Vector_Store/cache/manifest.json'
     ]
     
     for file_path in critical_files:
@@ -0,0 +1,80 @@
+import os
+import sys
+import tempfile
+
+# Add parent directory to import paths
+parent_dir = os.path.dirname(os.path.dirname(__file__))
+sys.path.append(parent_dir)
+
+from Vector_Store.artifact_store import (
+    prepare_version_dir, publish_version, read_manifest, resolve_artifact_dir, verify_manifest, version_path,
+)
+
+
+def _write_version(root, version, payload):
+    directory = prepare_version_dir(root, version)
+    with open(os.path.join(directory, "faiss_index.idx"), 'wb') as f:
+        f.write(payload)
+    return directory
+
+
+def test_legacy_cache_resolves_to_itself():
+    with tempfile.TemporaryDirectory() as root:
+        assert resolve_artifact_dir(root) == (root, None)
+
+
+def test_publish_and_resolve():
+    with tempfile.TemporaryDirectory() as root:
+        _write_version(root, 1, b"first")
+        publish_version(root, 1, "all-MiniLM-L6-v2", 10, keep=3)
+        directory = _write_version(root, 2, b"second")
+        manifest = publish_version(root, 2, "all-MiniLM-L6-v2", 12, extra={"index_type": "flat"}, keep=3)
+
+        assert read_manifest(root) == manifest
+        assert resolve_artifact_dir(root) == (directory, manifest)
+        assert manifest["version"] == 2 and manifest["num_rows"] == 12
+        assert manifest["index_type"] == "flat"
+        assert manifest["files"]["faiss_index.idx"]["bytes"] == len(b"second")
+        verify_manifest(root, manifest)
+        assert not os.path.exists(os.path.join(root, "manifest.json.tmp"))
+
+
+def test_verify_detects_altered_files():
+    with tempfile.TemporaryDirectory() as root:
+        directory = _write_version(root, 1, b"original")
+        manifest = publish_version(root, 1, "all-MiniLM-L6-v2", 1)
+        with open(os.path.join(directory, "faiss_index.idx"), 'wb') as f:
+            f.write(b"tampered")
+
+        # Same size, so only the checksum catches it
+        verify_manifest(root, manifest, checksums=False)
+        try:
+            verify_manifest(root, manifest)
+            assert False, "expected ValueError"
+        except ValueError:
+            pass
+
+        os.remove(os.path.join(directory, "faiss_index.idx"))
+        try:
+            verify_manifest(root, manifest, checksums=False)
+            assert False, "expected ValueError"
+        except ValueError:
+            pass
+
+
+def test_old_versions_are_pruned():
+    with tempfile.TemporaryDirectory() as root:
+        for version in range(1, 5):
+            _write_version(root, version, b"v%d" % version)
+            publish_version(root, version, "all-MiniLM-L6-v2", 1, keep=2)
+
+        assert sorted(os.listdir(os.path.join(root, "versions"))) == ["v000003", "v000004"]
+        assert resolve_artifact_dir(root)[0] == version_path(root, 4)
+
+
+if __name__ == "__main__":
+    test_legacy_cache_resolves_to_itself()
+    test_publish_and_resolve()
+    test_verify_detects_altered_files()
+    test_old_versions_are_pruned()
+    print("[SUCCESS] Artifact store tests passed!")
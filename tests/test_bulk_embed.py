@@ -0,0 +1,74 @@
+import os
+import sys
+import tempfile
+
+# Add parent directory to import paths
+parent_dir = os.path.dirname(os.path.dirname(__file__))
+sys.path.append(parent_dir)
+
+from Vector_Store import bulk_embed
+from test_incremental_index import StubEncoder, _artifacts, _assert_same_artifacts, _build, _catalog
+
+
+def _init_stub_worker(model_name, threads_per_worker):
+    bulk_embed._worker_model = StubEncoder()
+
+
+def _run(cache_dir, catalog, **kwargs):
+    init_worker = bulk_embed._init_worker
+    bulk_embed._init_worker = _init_stub_worker
+    try:
+        return bulk_embed.run_bulk_embedding(workers=2, shard_size=5, cache_dir=cache_dir,
+                                             product_df=catalog, **kwargs)
+    finally:
+        bulk_embed._init_worker = init_worker
+
+
+def _shard_times(cache_dir):
+    checkpoint_dir = os.path.join(cache_dir, 'shards')
+    return {name: os.stat(os.path.join(checkpoint_dir, name)).st_mtime_ns
+            for name in sorted(os.listdir(checkpoint_dir)) if name.endswith('.npy')}
+
+
+def test_bulk_embedding_matches_a_single_process_build():
+    with tempfile.TemporaryDirectory() as bulk_dir, tempfile.TemporaryDirectory() as rebuilt_dir:
+        assert _run(bulk_dir, _catalog(), rerank=True, index_type='fp16') == 12
+        assert list(_shard_times(bulk_dir)) == ["shard_00000.npy", "shard_00001.npy", "shard_00002.npy"]
+
+        _build(rebuilt_dir, _catalog(), StubEncoder(), index_type='fp16', rerank=True)
+        _assert_same_artifacts(_artifacts(bulk_dir), _artifacts(rebuilt_dir))
+
+
+def test_rerun_resumes_from_matching_checkpoints():
+    with tempfile.TemporaryDirectory() as cache_dir:
+        _run(cache_dir, _catalog())
+        first_run = _shard_times(cache_dir)
+
+        # An interrupted run: one shard never got written
+        os.remove(os.path.join(cache_dir, 'shards', "shard_00001.npy"))
+        _run(cache_dir, _catalog())
+        resumed = _shard_times(cache_dir)
+        assert resumed["shard_00000.npy"] == first_run["shard_00000.npy"]
+        assert resumed["shard_00002.npy"] == first_run["shard_00002.npy"]
+        assert "shard_00001.npy" in resumed
+
+        # Nothing missing: no shard is embedded again
+        _run(cache_dir, _catalog())
+        assert _shard_times(cache_dir) == resumed
+
+        # The checkpoint fingerprint no longer matches a changed catalog: every shard is redone
+        changed = _catalog()
+        changed.loc[2, "highlights"] = "Reformulated with niacinamide"
+        _run(cache_dir, changed)
+        assert all(_shard_times(cache_dir)[name] != resumed[name] for name in resumed)
+
+        # So does restart=True for an unchanged one
+        before_restart = _shard_times(cache_dir)
+        _run(cache_dir, changed, restart=True)
+        assert all(_shard_times(cache_dir)[name] != before_restart[name] for name in before_restart)
+
+
+if __name__ == "__main__":
+    test_bulk_embedding_matches_a_single_process_build()
+    test_rerun_resumes_from_matching_checkpoints()
+    print("[SUCCESS] All bulk embedding tests passed!")
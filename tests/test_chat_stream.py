@@ -0,0 +1,173 @@
+import os
+import sys
+import json
+import time
+
+# Add parent directory to import paths
+parent_dir = os.path.dirname(os.path.dirname(__file__))
+sys.path.append(parent_dir)
+
+from chatbot.services.ai_service import AIService
+from chatbot.services.llm_gateway import BackendLimits, LLMGateway
+
+QUESTION = "Which serum helps with dark spots?"
+
+
+class FakeGemini:
+    """A configured GeminiManager whose reply stream is the given chunks"""
+
+    is_configured = True
+
+    def __init__(self, chunks, error=None):
+        self.chunks = chunks
+        self.error = error
+        self.closed = False
+
+    def generate_content(self, prompt):
+        return "".join(self.chunks)
+
+    def generate_content_stream(self, prompt):
+        try:
+            for chunk in self.chunks:
+                yield chunk
+            if self.error is not None:
+                raise self.error
+        finally:
+            self.closed = True
+
+    def test_generation(self):
+        return True, "ok"
+
+
+def _service(timeout=30.0):
+    service = AIService(lazy=True)
+    service.llm_gateway = LLMGateway({'gemini': BackendLimits(8, 32, timeout)})
+    service.response_cache = None
+    service.intent_router = None
+    return service
+
+
+def _wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not reached"
+        time.sleep(0.005)
+
+
+def _assert_released(service, gemini):
+    """The backend stream was closed and neither a flight nor a gateway slot is left behind"""
+    assert gemini.closed
+    assert service.single_flight.get_stats()["in_flight"] == 0
+    _wait_for(lambda: service.llm_gateway.get_stats()['gemini']['active'] == 0)
+
+
+def _chat_stream(service, gemini, **kwargs):
+    """POST a question to /chat/stream of the Flask app, answered by service and gemini"""
+    sys.path.insert(0, os.path.join(parent_dir, 'chatbot'))
+    import app as chatbot_app
+    chatbot_app.ai_service = service
+    chatbot_app.gemini_manager = gemini
+    return chatbot_app.app.test_client().post('/chat/stream', json={"message": QUESTION, "model": "gemini"},
+                                              **kwargs)
+
+
+def _sse_events(body):
+    events = []
+    for raw_event in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in raw_event.split("\n"))
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+def test_chunks_arrive_in_order_then_done():
+    service = _service()
+    gemini = FakeGemini(["Try our ", "Vitamin C ", "serum."])
+    events = list(service.generate_response_stream(QUESTION, 'gemini', gemini))
+    assert [event["text"] for event in events[:-1]] == ["Try our ", "Vitamin C ", "serum."]
+    assert events[-1]["type"] == "done" and events[-1]["reply"] == "Try our Vitamin C serum."
+    _assert_released(service, gemini)
+
+    # A backend that fails partway ends with the error instead of a reply
+    gemini = FakeGemini(["Try our "], error=RuntimeError("quota exceeded"))
+    events = list(service.generate_response_stream(QUESTION, 'gemini', gemini))
+    assert events[-1]["type"] == "done" and events[-1]["error"] == "quota exceeded"
+    _assert_released(service, gemini)
+
+
+def test_closing_the_stream_releases_the_flight_and_gateway_slot():
+    service = _service()
+    gemini = FakeGemini([f"chunk {i} " for i in range(100)])
+    events = service.generate_response_stream(QUESTION, 'gemini', gemini)
+    assert next(events) == {"type": "chunk", "text": "chunk 0 "}
+    assert service.llm_gateway.get_stats()['gemini']['active'] == 1
+
+    # Like a client disconnecting
+    events.close()
+    _assert_released(service, gemini)
+    assert service.single_flight.get_stats()["abandoned"] == 1
+    _wait_for(lambda: service.llm_gateway.get_stats()['gemini']['cancelled'] == 1)
+
+
+def test_requests_sharing_a_stalled_stream_time_out():
+    service = _service(timeout=0.2)
+    gemini = FakeGemini([f"chunk {i} " for i in range(100)])
+    # The leader's client reads one chunk and then stops reading
+    stalled = service.generate_response_stream(QUESTION, 'gemini', gemini)
+    next(stalled)
+
+    for follow in (lambda: list(service.generate_response_stream(QUESTION, 'gemini', gemini))[-1],
+                   lambda: service.generate_response(QUESTION, 'gemini', gemini)):
+        start = time.monotonic()
+        response = follow()
+        assert time.monotonic() - start < 1.0
+        assert "error" in response and "taking too long" in response["reply"]
+    assert service.single_flight.get_stats()["timed_out"] == 2
+
+    stalled.close()
+    _assert_released(service, gemini)
+
+
+def test_chat_stream_sends_chunks_then_done():
+    service = _service()
+    gemini = FakeGemini(["Try our ", "Vitamin C ", "serum."])
+    response = _chat_stream(service, gemini)
+    assert response.status_code == 200 and response.mimetype == 'text/event-stream'
+    events = _sse_events(response.get_data(as_text=True))
+    assert events[:3] == [("chunk", {"text": "Try our "}), ("chunk", {"text": "Vitamin C "}),
+                          ("chunk", {"text": "serum."})]
+    assert len(events) == 4
+    name, done = events[3]
+    assert name == "done" and done["reply"] == "Try our Vitamin C serum." and done["model"] == 'gemini'
+    _assert_released(service, gemini)
+
+
+def test_chat_stream_sends_an_error_event_when_the_backend_fails():
+    service = _service()
+    gemini = FakeGemini([], error=RuntimeError("quota exceeded"))
+    events = _sse_events(_chat_stream(service, gemini).get_data(as_text=True))
+    assert len(events) == 1
+    name, error = events[0]
+    assert name == "error" and error["error"] == "quota exceeded" and error["reply"]
+    _assert_released(service, gemini)
+
+
+def test_chat_stream_disconnect_releases_the_flight_and_gateway_slot():
+    service = _service()
+    gemini = FakeGemini([f"chunk {i} " for i in range(100)])
+    response = _chat_stream(service, gemini, buffered=False)
+    body = iter(response.response)
+    assert next(body).startswith(b"event: chunk")
+
+    response.close()
+    _assert_released(service, gemini)
+    assert service.single_flight.get_stats()["abandoned"] == 1
+
+
+if __name__ == "__main__":
+    test_chunks_arrive_in_order_then_done()
+    test_closing_the_stream_releases_the_flight_and_gateway_slot()
+    test_requests_sharing_a_stalled_stream_time_out()
+    test_chat_stream_sends_chunks_then_done()
+    test_chat_stream_sends_an_error_event_when_the_backend_fails()
+    test_chat_stream_disconnect_releases_the_flight_and_gateway_slot()
+    print("[SUCCESS] All chat streaming tests passed!")
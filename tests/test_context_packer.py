@@ -0,0 +1,65 @@
+import os
+import sys
+
+# Add parent directory to import paths
+parent_dir = os.path.dirname(os.path.dirname(__file__))
+sys.path.append(parent_dir)
+
+from chatbot.services.context_packer import ContextPacker, TokenCounter, split_fields
+
+INGREDIENTS = ", ".join(f"Botanical Extract {i}" for i in range(80)) + ", Niacinamide"
+
+
+def _context(i, ingredients=INGREDIENTS):
+    # embedFunc joins the fields with a literal backslash-n
+    return "\\n".join([
+        f"Product Name: Serum {i}", "Category: Skincare", "Skin Type Information: Dry Skin",
+        f"Price: USD 4{i}.00", "Stock: In Stock", "Highlights: Vegan, Hydrating", f"Ingredients: {ingredients}",
+    ])
+
+
+def test_contexts_within_budget_are_unchanged():
+    contexts = [_context(i, "Water, Glycerin") for i in range(3)]
+    packed, stats = ContextPacker().pack("serum for dry skin", contexts, budget=2000)
+    assert packed == contexts
+    assert stats["saved_tokens"] == 0 and stats["dropped_fields"] == 0
+
+
+def test_budget_is_respected_and_essentials_kept():
+    contexts = [_context(i) for i in range(3)]
+    packed, stats = ContextPacker().pack("hydrating serum for dry skin", contexts, budget=150)
+    assert stats["packed_tokens"] <= 150
+    assert stats["saved_tokens"] == stats["original_tokens"] - stats["packed_tokens"] > 0
+    assert len(packed) == 3
+    for i, context in enumerate(packed):
+        separator, fields = split_fields(context)
+        assert separator == "\\n"
+        labels = [label for label, _ in fields]
+        assert labels[:1] == ["Product Name"] and "Price" in labels and "Stock" in labels
+        # Field order is preserved
+        assert labels == sorted(labels, key=["Product Name", "Category", "Skin Type Information", "Price",
+                                             "Stock", "Highlights", "Ingredients"].index)
+
+
+def test_ingredients_truncated_to_what_the_question_asks_about():
+    packed, stats = ContextPacker().pack("does it contain niacinamide?", [_context(0)], budget=90)
+    ingredients = dict(split_fields(packed[0])[1])["Ingredients"]
+    assert "Niacinamide" in ingredients and ingredients.endswith("...")
+    assert stats["truncated_fields"] == 1
+
+
+def test_budget_per_model_and_token_counter():
+    packer = ContextPacker(budgets={"gemini": 1000, "local-ai": 300})
+    assert packer.budget_for("gemini") == 1000
+    assert packer.budget_for("local-ai") == packer.budget_for("local") == 300
+    counter = TokenCounter()
+    assert not counter.exact
+    assert counter.count("Water, Glycerin") == 3
+
+
+if __name__ == "__main__":
+    test_contexts_within_budget_are_unchanged()
+    test_budget_is_respected_and_essentials_kept()
+    test_ingredients_truncated_to_what_the_question_asks_about()
+    test_budget_per_model_and_token_counter()
+    print("[SUCCESS] Context packer tests passed!")
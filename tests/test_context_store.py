@@ -0,0 +1,56 @@
+import os
+import sys
+import tempfile
+
+# Add parent directory to import paths
+parent_dir = os.path.dirname(os.path.dirname(__file__))
+sys.path.append(parent_dir)
+
+from Vector_Store.context_store import ContextStore, ContextStoreWriter, write_context_store
+
+CONTEXTS = [
+    "Product Name: Hydra-Essence Serum\nPrice: USD 48.00",
+    "",
+    "Product Name: Crème Éclat ✨\nStock: In Stock",
+]
+
+
+def test_round_trip():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "product_contexts.bin")
+        assert write_context_store(path, CONTEXTS) == len(CONTEXTS)
+
+        store = ContextStore(path)
+        try:
+            assert len(store) == len(CONTEXTS)
+            assert list(store) == CONTEXTS
+            assert store[2] == CONTEXTS[2]
+            assert store[-1] == CONTEXTS[-1]
+            assert store[0:2] == CONTEXTS[0:2]
+            assert bytes(store.get_bytes(0)) == CONTEXTS[0].encode('utf-8')
+            assert store.blob_bytes == sum(len(c.encode('utf-8')) for c in CONTEXTS)
+            try:
+                store[len(CONTEXTS)]
+                assert False, "expected IndexError"
+            except IndexError:
+                pass
+        finally:
+            store.close()
+
+
+def test_failed_write_leaves_no_file():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "product_contexts.bin")
+        try:
+            with ContextStoreWriter(path) as writer:
+                writer.add("partial")
+                raise RuntimeError("build interrupted")
+        except RuntimeError:
+            pass
+        assert os.listdir(tmp_dir) == []
+
+
+if __name__ == "__main__":
+    test_round_trip()
+    test_failed_write_leaves_no_file()
+    print("[SUCCESS] Context store tests passed!")
@@ -0,0 +1,79 @@
+import os
+import sys
+import threading
+
+# Add parent directory to import paths
+parent_dir = os.path.dirname(os.path.dirname(__file__))
+sys.path.append(parent_dir)
+
+from Vector_Store.embedding_batcher import EmbeddingBatcher
+
+
+def fake_encode(calls):
+    """Encode function that records each batch and returns one 'vector' per text"""
+    def encode(texts):
+        calls.append(list(texts))
+        return [[len(text)] for text in texts]
+    return encode
+
+
+def test_each_caller_gets_its_own_vector():
+    calls = []
+    batcher = EmbeddingBatcher(fake_encode(calls), max_batch_size=8, max_wait_ms=50)
+    try:
+        futures = [batcher.submit("x" * n) for n in range(1, 6)]
+        assert [f.result(timeout=5) for f in futures] == [[1], [2], [3], [4], [5]]
+        # All five were queued inside one wait window, so they share a forward pass
+        assert len(calls) == 1
+    finally:
+        batcher.stop()
+
+
+def test_batches_are_capped_at_max_batch_size():
+    calls = []
+    gate = threading.Event()
+
+    def slow_encode(texts):
+        gate.wait(timeout=5)
+        return fake_encode(calls)(texts)
+
+    batcher = EmbeddingBatcher(slow_encode, max_batch_size=3, max_wait_ms=20)
+    try:
+        futures = [batcher.submit(str(i)) for i in range(7)]
+        gate.set()
+        for future in futures:
+            future.result(timeout=5)
+        assert all(len(batch) <= 3 for batch in calls)
+        assert sum(len(batch) for batch in calls) == 7
+
+        metrics = batcher.get_metrics()
+        assert metrics["requests"] == 7
+        assert metrics["batches"] == len(calls)
+        assert "latency_ms_p95" in metrics
+    finally:
+        batcher.stop()
+
+
+def test_encode_errors_reach_every_caller():
+    def failing_encode(texts):
+        raise RuntimeError("model unavailable")
+
+    batcher = EmbeddingBatcher(failing_encode, max_wait_ms=20)
+    try:
+        futures = [batcher.submit("a"), batcher.submit("b")]
+        for future in futures:
+            try:
+                future.result(timeout=5)
+                assert False, "expected the encode error to propagate"
+            except RuntimeError as e:
+                assert "model unavailable" in str(e)
+        assert batcher.get_metrics()["errors"] == 2
+    finally:
+        batcher.stop()
+
+
+if __name__ == "__main__":
+    test_each_caller_gets_its_own_vector()
+    test_batches_are_capped_at_max_batch_size()
+    test_encode_errors_reach_every_caller()
+    print("[SUCCESS] Embedding batcher tests passed!")
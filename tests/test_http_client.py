@@ -0,0 +1,89 @@
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Add parent directory to import paths
+parent_dir = os.path.dirname(os.path.dirname(__file__))
+sys.path.append(parent_dir)
+
+from chatbot.services.http_client import create_session, get_local_ai_session, close_local_ai_session
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        self.server.connections += 1
+
+    def _reply(self):
+        self.server.requests += 1
+        # /flaky fails with 503 the first two times
+        status = 503 if self.path == '/flaky' and self.server.requests <= 2 else 200
+        body = b'{"response": "ok", "done": true}'
+        self.send_response(status)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self._reply()
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        self._reply()
+
+    def log_message(self, *args):
+        pass
+
+
+def _start_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+    server.daemon_threads = True
+    server.connections = server.requests = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+def test_connections_are_reused():
+    server, url = _start_server()
+    try:
+        session = create_session(pool_size=2, retries=0)
+        for _ in range(5):
+            assert session.post(f"{url}/api/generate", json={"prompt": "hi"}, timeout=(5, 5)).json()["done"]
+        assert server.requests == 5
+        assert server.connections == 1
+        session.close()
+    finally:
+        server.shutdown()
+
+
+def test_idempotent_requests_are_retried_but_posts_are_not():
+    server, url = _start_server()
+    try:
+        session = create_session(retries=3, backoff_factor=0)
+        assert session.get(f"{url}/flaky", timeout=(5, 5)).status_code == 200
+        assert server.requests == 3
+
+        server.requests = 0
+        # A generation request may have reached the model, so it is not repeated
+        assert session.post(f"{url}/flaky", json={}, timeout=(5, 5)).status_code == 503
+        assert server.requests == 1
+        session.close()
+    finally:
+        server.shutdown()
+
+
+def test_shared_session_is_created_once():
+    close_local_ai_session()
+    assert get_local_ai_session() is get_local_ai_session()
+    close_local_ai_session()
+
+
+if __name__ == "__main__":
+    test_connections_are_reused()
+    test_idempotent_requests_are_retried_but_posts_are_not()
+    test_shared_session_is_created_once()
+    print("[SUCCESS] All HTTP client tests passed!")
@@ -0,0 +1,145 @@
+import os
+import sys
+import hashlib
+import tempfile
+
+import numpy as np
+import pandas as pd
+import faiss
+
+# Add parent directory to import paths
+parent_dir = os.path.dirname(os.path.dirname(__file__))
+sys.path.append(parent_dir)
+
+from Vector_Store import embedFunc
+from Vector_Store.artifact_store import resolve_artifact_dir
+from Vector_Store.context_store import CONTEXT_STORE_FILE, ContextStore
+from Vector_Store.index_factory import RERANK_VECTORS_FILE, load_index_params
+from Vector_Store.lexical_index import BM25_INDEX_FILE, BM25Index
+from Vector_Store.product_metadata import METADATA_FILE, ProductMetadata
+
+
+class StubEncoder:
+    """Stands in for the SentenceTransformer: a fixed pseudo-random vector per text"""
+
+    dimension = 16
+
+    def __init__(self):
+        self.encoded = []
+
+    def encode(self, texts, **kwargs):
+        self.encoded.extend(texts)
+        vectors = [np.random.RandomState(int.from_bytes(hashlib.md5(text.encode('utf-8')).digest()[:4], 'little'))
+                   .standard_normal(self.dimension) for text in texts]
+        return np.asarray(vectors, dtype='float32').reshape(len(texts), self.dimension)
+
+
+def _catalog(rows=12):
+    return pd.DataFrame({
+        "product_id": [f"P{i:03d}" for i in range(rows)],
+        "product_name": [f"Product {i}" for i in range(rows)],
+        "highlights": ["Hydrating" if i % 2 else "Oil-free, good for oily skin" for i in range(rows)],
+        "ingredients": [f"Ingredient {i % 5}" for i in range(rows)],
+        "primary_category": ["Skincare" if i % 3 else "Makeup" for i in range(rows)],
+        "skin_type": ["dry;normal" if i % 2 else "" for i in range(rows)],
+        "price_usd": [10.0 + i for i in range(rows)],
+        "out_of_stock": [i % 4 == 0 for i in range(rows)],
+    })
+
+
+def _changed_catalog():
+    """The catalog after a refresh: one product changed, one repriced, two deleted, two added"""
+    catalog = _catalog()
+    catalog.loc[2, "highlights"] = "Reformulated with niacinamide"
+    # Price is only in the context, not the search text: no new embedding, but a new context
+    catalog.loc[3, "price_usd"] = 99.0
+    catalog = catalog.drop(index=[5, 7])
+    added = _catalog(14).iloc[12:].copy()
+    added["product_name"] = ["Brand New Serum", "Brand New Toner"]
+    return pd.concat([catalog, added], ignore_index=True)
+
+
+def _build(cache_dir, catalog, encoder, **kwargs):
+    load_sentence_model = embedFunc.load_sentence_model
+    embedFunc.load_sentence_model = lambda: encoder
+    try:
+        embedFunc.generate_embeddings_and_cache(cache_dir=cache_dir, product_df=catalog, **kwargs)
+    finally:
+        embedFunc.load_sentence_model = load_sentence_model
+
+
+def _artifacts(cache_dir):
+    """Everything a build published, with the index as a {product id: vector} mapping"""
+    directory = resolve_artifact_dir(cache_dir)[0]
+    index = faiss.read_index(os.path.join(directory, embedFunc.FAISS_INDEX_FILE))
+    index_ids = faiss.vector_to_array(index.id_map)
+    vectors = faiss.downcast_index(index.index).reconstruct_n(0, index.ntotal)
+    contexts = ContextStore(os.path.join(directory, CONTEXT_STORE_FILE))
+    artifacts = {
+        "params": load_index_params(directory),
+        "ntotal": index.ntotal,
+        "vectors": dict(zip(index_ids.tolist(), vectors)),
+        "product_ids": np.load(os.path.join(directory, embedFunc.PRODUCT_IDS_FILE)),
+        "contexts": list(contexts),
+        "metadata": ProductMetadata.load(os.path.join(directory, METADATA_FILE)),
+        "bm25": BM25Index.load(os.path.join(directory, BM25_INDEX_FILE)),
+        "rerank_vectors": None,
+    }
+    contexts.close()
+    if os.path.exists(os.path.join(directory, RERANK_VECTORS_FILE)):
+        artifacts["rerank_vectors"] = np.fromfile(os.path.join(directory, RERANK_VECTORS_FILE), dtype='float32')
+    return artifacts
+
+
+def _assert_same_artifacts(updated, rebuilt):
+    assert updated["params"]["index_type"] == rebuilt["params"]["index_type"]
+    # No stale or duplicate vectors: exactly one per current product, with its current embedding
+    assert updated["ntotal"] == rebuilt["ntotal"] == len(rebuilt["product_ids"])
+    assert sorted(updated["vectors"]) == sorted(rebuilt["vectors"]) == sorted(rebuilt["product_ids"].tolist())
+    for product_id, vector in rebuilt["vectors"].items():
+        assert np.array_equal(updated["vectors"][product_id], vector)
+    assert np.array_equal(updated["product_ids"], rebuilt["product_ids"])
+    assert updated["contexts"] == rebuilt["contexts"]
+    for column in ("price", "in_stock", "category_codes", "categories", "skin_types"):
+        assert np.array_equal(getattr(updated["metadata"], column), getattr(rebuilt["metadata"], column))
+    for field in ("vocabulary", "indptr", "rows", "impacts", "num_docs"):
+        assert np.array_equal(getattr(updated["bm25"], field), getattr(rebuilt["bm25"], field))
+    if rebuilt["rerank_vectors"] is None:
+        assert updated["rerank_vectors"] is None
+    else:
+        assert np.array_equal(updated["rerank_vectors"], rebuilt["rerank_vectors"])
+
+
+def test_incremental_update_matches_a_full_build():
+    for index_type, params in (('flat', {}), ('fp16', {"rerank": True})):
+        with tempfile.TemporaryDirectory() as updated_dir, tempfile.TemporaryDirectory() as rebuilt_dir:
+            _build(updated_dir, _catalog(), StubEncoder(), index_type=index_type, **params)
+            encoder = StubEncoder()
+            _build(updated_dir, _changed_catalog(), encoder, index_type=index_type, incremental=True, **params)
+            # Only the changed and the added products were embedded again
+            assert sorted(text.split('.')[0] for text in encoder.encoded) == [
+                "Product Name: Brand New Serum", "Product Name: Brand New Toner", "Product Name: Product 2"]
+
+            _build(rebuilt_dir, _changed_catalog(), StubEncoder(), index_type=index_type, **params)
+            updated, rebuilt = _artifacts(updated_dir), _artifacts(rebuilt_dir)
+            assert updated["params"]["catalog_version"] == 2
+            assert "Price: USD 99.00" in updated["contexts"][3]
+            _assert_same_artifacts(updated, rebuilt)
+
+
+def test_hnsw_falls_back_to_a_full_build():
+    with tempfile.TemporaryDirectory() as updated_dir, tempfile.TemporaryDirectory() as rebuilt_dir:
+        _build(updated_dir, _catalog(), StubEncoder(), index_type='hnsw')
+        encoder = StubEncoder()
+        _build(updated_dir, _changed_catalog(), encoder, index_type='hnsw', incremental=True)
+        # HNSW cannot remove vectors, so every product was embedded again
+        assert len(encoder.encoded) == len(_changed_catalog())
+
+        _build(rebuilt_dir, _changed_catalog(), StubEncoder(), index_type='hnsw')
+        _assert_same_artifacts(_artifacts(updated_dir), _artifacts(rebuilt_dir))
+
+
+if __name__ == "__main__":
+    test_incremental_update_matches_a_full_build()
+    test_hnsw_falls_back_to_a_full_build()
+    print("[SUCCESS] All incremental index tests passed!")
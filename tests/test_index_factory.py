@@ -0,0 +1,124 @@
+import os
+import sys
+import tempfile
+
+import numpy as np
+import faiss
+
+# Add parent directory to import paths
+parent_dir = os.path.dirname(os.path.dirname(__file__))
+sys.path.append(parent_dir)
+
+from Vector_Store.artifact_store import prepare_version_dir, publish_version, resolve_artifact_dir
+from Vector_Store.index_factory import (
+    RERANK_VECTORS_FILE, apply_search_params, build_index, load_index_params, load_rerank_vectors,
+    rerank_candidates, resolve_index_params, save_index_params,
+)
+
+
+def _vectors(count, dimension=16, seed=0):
+    return np.random.RandomState(seed).standard_normal((count, dimension)).astype('float32')
+
+
+def test_small_catalogs_fall_back_to_trainable_modes():
+    # Too few vectors per IVF list: exact search instead
+    assert resolve_index_params('ivf_flat', 70, 384)["index_type"] == 'flat'
+    assert resolve_index_params('ivf_flat', 1000, 384, nlist=100)["index_type"] == 'flat'
+    assert resolve_index_params('ivf_pq', 40, 384)["index_type"] == 'flat'
+    # Enough for IVF lists, too few for 8-bit PQ codebooks
+    params = resolve_index_params('ivf_pq', 200, 384)
+    assert params["index_type"] == 'ivf_flat' and params["nlist"] == 5 and "pq_m" not in params
+    assert resolve_index_params('pq', 100, 384)["index_type"] == 'sq8'
+
+    params = resolve_index_params('ivf_pq', 10000, 384)
+    assert params["index_type"] == 'ivf_pq'
+    assert params["nlist"] == 256 and params["nprobe"] == 16
+    # pq_m defaults to the largest divisor of the dimension up to 48
+    assert params["pq_m"] == 48 and params["pq_nbits"] == 8
+    assert resolve_index_params('pq', 1000, 100)["pq_m"] == 25
+
+    for bad in (lambda: resolve_index_params('pq', 1000, 384, pq_m=7),
+                lambda: resolve_index_params('annoy', 1000, 384)):
+        try:
+            bad()
+            assert False, "expected ValueError"
+        except ValueError:
+            pass
+
+    # The fallback is what actually gets built
+    index, params = build_index(_vectors(60), 'ivf_pq', ids=np.arange(60))
+    assert params["index_type"] == 'flat' and index.ntotal == 60
+
+
+def test_search_params_reach_the_index_behind_the_id_map():
+    vectors, ids = _vectors(2000), np.arange(2000) + 1000
+    index, params = build_index(vectors, 'ivf_flat', ids=ids, nlist=32, nprobe=3)
+    assert isinstance(index, faiss.IndexIDMap)
+    assert faiss.downcast_index(index.index).nprobe == 3
+    apply_search_params(index, params, nprobe=7)
+    assert faiss.downcast_index(index.index).nprobe == 7
+
+    index, params = build_index(vectors, 'hnsw', ids=ids, ef_search=48)
+    assert faiss.downcast_index(index.index).hnsw.efSearch == 48
+    # Knobs of other index types are ignored
+    apply_search_params(index, params, nprobe=5, ef_search=96)
+    assert faiss.downcast_index(index.index).hnsw.efSearch == 96
+
+    # Search results come back as product ids
+    _, found = index.search(vectors[:1], 1)
+    assert found[0][0] == 1000
+
+
+def test_saved_params_round_trip_through_the_manifest():
+    with tempfile.TemporaryDirectory() as root:
+        index, params = build_index(_vectors(1000), 'ivf_flat', ids=np.arange(1000), nlist=16, nprobe=4)
+        version_dir = prepare_version_dir(root, 1)
+        faiss.write_index(index, os.path.join(version_dir, "faiss_index.idx"))
+        save_index_params(version_dir, params)
+        publish_version(root, 1, 'test-model', index.ntotal, extra={"index_type": params["index_type"]})
+
+        directory, manifest = resolve_artifact_dir(root)
+        assert directory == version_dir and manifest["index_type"] == 'ivf_flat'
+        loaded_params = load_index_params(directory)
+        assert loaded_params == params
+
+        loaded = faiss.read_index(os.path.join(directory, "faiss_index.idx"))
+        faiss.downcast_index(loaded.index).nprobe = 1
+        apply_search_params(loaded, loaded_params)
+        assert faiss.downcast_index(loaded.index).nprobe == 4
+
+        # Caches from before index_params.json existed are flat
+        assert load_index_params(root) == {"index_type": "flat"}
+
+
+def test_rerank_restores_the_exact_order_of_quantized_results():
+    vectors = _vectors(2000)
+    query = _vectors(1, seed=1)
+    flat, _ = build_index(vectors, 'flat')
+    _, exact = flat.search(query, 10)
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        vectors.tofile(os.path.join(cache_dir, RERANK_VECTORS_FILE))
+        for index_type, overrides in (('pq', {"pq_m": 4}), ('sq8', {})):
+            index, params = build_index(vectors, index_type, rerank=True, **overrides)
+            assert params["index_type"] == index_type and params["rerank"]
+            # The compressed distances get the top 10 wrong...
+            _, candidates = index.search(query, 40)
+            assert not np.array_equal(candidates[0][:10], exact[0])
+
+            # ...re-ranking a longer short list against the float32 vectors on disk fixes it
+            rerank_vectors = load_rerank_vectors(cache_dir, params, len(vectors))
+            assert isinstance(rerank_vectors, np.memmap)
+            assert np.array_equal(rerank_candidates(query, candidates[0], rerank_vectors, 10), exact[0])
+
+        # Vectors that do not match the index are not used
+        assert load_rerank_vectors(cache_dir, params, len(vectors) + 1) is None
+        assert load_rerank_vectors(cache_dir, dict(params, rerank=False), len(vectors)) is None
+
+
+if __name__ == "__main__":
+    test_small_catalogs_fall_back_to_trainable_modes()
+    test_search_params_reach_the_index_behind_the_id_map()
+    test_saved_params_round_trip_through_the_manifest()
+    test_rerank_restores_the_exact_order_of_quantized_results()
+    print("[SUCCESS] All index factory tests passed!")
@@ -0,0 +1,111 @@
+import os
+import sys
+
+import numpy as np
+
+# Add parent directory to import paths
+parent_dir = os.path.dirname(os.path.dirname(__file__))
+sys.path.append(parent_dir)
+
+from chatbot.services.intent_router import Intent, IntentRouter, greeting_reply
+
+VOCABULARY = ['store', 'hours', 'open', 'return', 'refund', 'policy', 'serum', 'dry', 'skin']
+
+
+def _encode(texts):
+    """Bag-of-words stand-in for the sentence encoder"""
+    vectors = np.zeros((len(texts), len(VOCABULARY)), dtype='float32')
+    for row, text in enumerate(texts):
+        for word in text.lower().replace('?', '').split():
+            if word in VOCABULARY:
+                vectors[row, VOCABULARY.index(word)] += 1
+    return vectors
+
+
+INTENTS = [
+    Intent('store_hours', ['what are your store hours', 'when is the store open'], "Open 24/7 online."),
+    Intent('returns', ['what is your return policy', 'can i get a refund'], "See Shipping & Returns."),
+    Intent('browse_products', ['show me serums'], None),
+]
+
+
+def test_exact_and_pattern_matches():
+    contexts = [
+        "Product Name: Hydra Serum\\nCategory: Serum\\nPrice: 30.00 USD\\nStock: In Stock",
+        "Product Name: Glow Serum\\nPrice: 45.00 USD\\nStock: Out of Stock",
+    ]
+    router = IntentRouter(INTENTS, search=lambda query, top_k: contexts)
+
+    routed = router.route("What are your STORE hours?")
+    assert routed["intent"] == "store_hours" and routed["method"] == "exact"
+    assert routed["reply"] == "Open 24/7 online."
+
+    routed = router.route("do you have any vitamin c serums")
+    assert routed["intent"] == "browse_products" and routed["method"] == "pattern"
+    assert "• Hydra Serum - 30.00 USD, In Stock" in routed["reply"]
+    assert "• Glow Serum - 45.00 USD, Out of Stock" in routed["reply"]
+
+
+def test_nearest_centroid_with_threshold_and_margin():
+    router = IntentRouter(INTENTS, encode=_encode)
+
+    routed = router.route("store open hours", _encode(["store open hours"]))
+    assert routed["intent"] == "store_hours" and routed["method"] == "centroid"
+
+    # A product question is far from every FAQ centroid
+    assert router.route("serum for dry skin", _encode(["serum for dry skin"])) is None
+    # Halfway between two intents: no margin over the runner-up
+    assert router.route("store refund", _encode(["store refund"])) is None
+    # Without an embedding only the cheap stages run
+    assert router.route("store open hours") is None
+
+
+def test_questions_phrased_like_browse_commands_fall_through():
+    searched = []
+    router = IntentRouter(INTENTS, search=lambda query, top_k: searched.append(query) or ["Product Name: X"])
+    for message in [
+        "show me how to apply retinol",
+        "list the ingredients of the vitamin c serum",
+        "show me the difference between serum and essence",
+        "do you have anything for acne prone skin",
+        "what do you have for dark circles",
+    ]:
+        assert router.route(message) is None, message
+    assert searched == []
+    assert router.route("show me your vitamin c serums")["intent"] == "browse_products"
+
+
+def test_greetings_without_the_router():
+    assert greeting_reply("Hello!").startswith("Hello! I'm your Sephora beauty assistant")
+    assert greeting_reply("hello, which serum is best?") is None
+
+
+def test_browse_without_results_falls_through():
+    router = IntentRouter(INTENTS, search=lambda query, top_k: [])
+    assert router.route("show me serums") is None
+
+
+def test_stats_report_per_intent_hit_rates():
+    router = IntentRouter(INTENTS)
+    router.route("can I get a refund")
+    router.route("can i get a refund!")
+    router.route("which serum is best for dry skin?")
+    router.route("when is the store open")
+
+    stats = router.get_stats()
+    assert stats["messages"] == 4 and stats["routed"] == 3
+    assert stats["routed_rate"] == 0.75
+    assert stats["by_method"]["exact"] == 3
+    assert stats["intent_hits"] == {"store_hours": 1, "returns": 2, "browse_products": 0}
+    assert stats["intent_hit_rates"]["returns"] == 0.5
+    assert stats["avg_route_microseconds"] is not None
+
+
+if __name__ == "__main__":
+    test_exact_and_pattern_matches()
+    test_nearest_centroid_with_threshold_and_margin()
+    test_questions_phrased_like_browse_commands_fall_through()
+    test_greetings_without_the_router()
+    test_browse_without_results_falls_through()
+    test_stats_report_per_intent_hit_rates()
+    print("[SUCCESS] All intent router tests passed!")
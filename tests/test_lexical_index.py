@@ -0,0 +1,75 @@
+import os
+import sys
+import tempfile
+
+# Add parent directory to import paths
+parent_dir = os.path.dirname(os.path.dirname(__file__))
+sys.path.append(parent_dir)
+
+from Vector_Store.lexical_index import (
+    BM25Index, build_bm25_index, reciprocal_rank_fusion, tokenize,
+)
+
+TEXTS = [
+    "Product Name: Hydrating Serum. Category: Skincare. Ingredients: Water, Niacinamide, Glycerin.",
+    "Product Name: 19-69 Kasbah Eau de Parfum. Category: Fragrance. Ingredients: Not specified.",
+    "Product Name: Matte Lipstick. Category: Makeup. Ingredients: Not specified.",
+    "Product Name: Night Cream. Category: Skincare. Ingredients: Water, Squalane.",
+]
+
+
+def test_tokenize():
+    assert tokenize("19-69 Kasbah, Crème!") == ["19", "69", "kasbah", "crème"]
+
+
+def test_exact_terms_rank_first():
+    index = build_bm25_index(TEXTS)
+    rows, scores = index.search("niacinamide serum", top_k=2)
+    assert rows[0] == 0
+    assert scores[0] > 0
+
+    rows, _ = index.search("19-69 kasbah", top_k=3)
+    assert rows.tolist() == [1]
+
+    rows, _ = index.search("no such words", top_k=3)
+    assert len(rows) == 0
+
+
+def test_labels_in_every_text_are_dropped():
+    index = build_bm25_index(TEXTS)
+    rows, _ = index.search("product name category", top_k=3)
+    assert len(rows) == 0
+
+
+def test_posting_budget_keeps_rarest_terms():
+    index = build_bm25_index(TEXTS)
+    # "water" has two postings and "kasbah" one; a budget of one keeps only kasbah
+    rows, _ = index.search("water kasbah", top_k=3, max_postings=1)
+    assert rows.tolist() == [1]
+
+
+def test_save_and_load_round_trip():
+    index = build_bm25_index(TEXTS)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "bm25_index.npz")
+        index.save(path)
+        loaded = BM25Index.load(path)
+    assert len(loaded) == len(TEXTS)
+    assert loaded.search("squalane", top_k=1)[0].tolist() == [3]
+
+
+def test_reciprocal_rank_fusion():
+    dense = [2, 0, 3]
+    lexical = [0, 1]
+    # Row 0 is ranked by both lists and wins; -1 (missing FAISS hit) is ignored
+    assert reciprocal_rank_fusion([dense, lexical, [-1]], top_k=3) == [0, 2, 1]
+
+
+if __name__ == "__main__":
+    test_tokenize()
+    test_exact_terms_rank_first()
+    test_labels_in_every_text_are_dropped()
+    test_posting_budget_keeps_rarest_terms()
+    test_save_and_load_round_trip()
+    test_reciprocal_rank_fusion()
+    print("[SUCCESS] Lexical index tests passed!")
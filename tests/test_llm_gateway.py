@@ -0,0 +1,157 @@
+import os
+import sys
+import time
+import asyncio
+import threading
+
+# Add parent directory to import paths
+parent_dir = os.path.dirname(os.path.dirname(__file__))
+sys.path.append(parent_dir)
+
+from chatbot.services.llm_gateway import BackendLimits, GatewayOverloaded, GatewayTimeout, LLMGateway
+
+
+def _gateway(concurrency=1, queue=1, timeout=5.0):
+    return LLMGateway({'test': BackendLimits(concurrency, queue, timeout)})
+
+
+def _wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not reached"
+        time.sleep(0.005)
+
+
+def _record_error(errors, func, *args, **kwargs):
+    try:
+        func(*args, **kwargs)
+    except Exception as e:
+        errors.append(e)
+
+
+def test_concurrency_is_capped():
+    gateway = _gateway(concurrency=2, queue=10)
+    running, peak, lock = [0], [0], threading.Lock()
+
+    def work(i):
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(0.02)
+        with lock:
+            running[0] -= 1
+        return i * 2
+
+    results = [None] * 6
+    threads = [threading.Thread(target=lambda i=i: results.__setitem__(i, gateway.call('test', work, i)))
+               for i in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == [0, 2, 4, 6, 8, 10]
+    assert peak[0] == 2
+    assert gateway.get_stats()['test']['completed'] == 6
+
+
+def test_full_queue_rejects_and_deadline_times_out():
+    gateway = _gateway(concurrency=1, queue=1)
+    release = threading.Event()
+    holder = threading.Thread(target=gateway.call, args=('test', release.wait))
+    holder.start()
+    _wait_for(lambda: gateway.get_stats().get('test', {}).get('active') == 1)
+
+    # One caller may wait; it gives up when its deadline passes
+    waiter_error = []
+    waiter = threading.Thread(target=lambda: _record_error(
+        waiter_error, gateway.call, 'test', lambda: None, timeout=0.3))
+    waiter.start()
+    _wait_for(lambda: gateway.get_stats()['test']['waiting'] == 1)
+
+    try:
+        gateway.call('test', lambda: None)
+        assert False, "expected GatewayOverloaded"
+    except GatewayOverloaded:
+        pass
+
+    waiter.join()
+    assert isinstance(waiter_error[0], GatewayTimeout)
+    release.set()
+    holder.join()
+    stats = gateway.get_stats()['test']
+    assert stats['rejected'] == 1 and stats['timeouts'] == 1
+    assert stats['active'] == 0 and stats['waiting'] == 0
+
+    # A call that runs past its deadline times out, but keeps its slot until it returns
+    try:
+        gateway.call('test', time.sleep, 0.2, timeout=0.05)
+        assert False, "expected GatewayTimeout"
+    except GatewayTimeout:
+        pass
+    assert gateway.get_stats()['test']['active'] == 1
+    _wait_for(lambda: gateway.get_stats()['test']['active'] == 0)
+
+
+def test_acall_from_another_loop_and_cancellation():
+    gateway = _gateway(concurrency=1, queue=5)
+    release = threading.Event()
+
+    async def scenario():
+        assert await gateway.acall('test', lambda x: x + 1, 1) == 2
+
+        holder = asyncio.ensure_future(gateway.acall('test', release.wait))
+        waiter = asyncio.ensure_future(gateway.acall('test', lambda: 'never'))
+        await asyncio.sleep(0.05)
+        assert gateway.get_stats()['test']['waiting'] == 1
+        # A cancelled Telegram task leaves the queue
+        waiter.cancel()
+        try:
+            await waiter
+            assert False, "expected CancelledError"
+        except asyncio.CancelledError:
+            pass
+        release.set()
+        await holder
+
+    asyncio.run(scenario())
+    _wait_for(lambda: gateway.get_stats()['test']['waiting'] == 0)
+    stats = gateway.get_stats()['test']
+    assert stats['cancelled'] == 1 and stats['active'] == 0
+
+
+def test_closing_a_stream_releases_its_slot():
+    gateway = _gateway(concurrency=1, queue=0)
+    closed = []
+
+    def chunks():
+        try:
+            for i in range(100):
+                yield f"chunk {i}"
+        finally:
+            closed.append(True)
+
+    stream = gateway.stream('test', chunks())
+    assert next(stream) == "chunk 0"
+    assert gateway.get_stats()['test']['active'] == 1
+    try:
+        gateway.call('test', lambda: None)
+        assert False, "expected GatewayOverloaded"
+    except GatewayOverloaded:
+        pass
+
+    # Like an SSE client disconnecting
+    stream.close()
+    assert closed == [True]
+    _wait_for(lambda: gateway.get_stats()['test']['active'] == 0)
+    assert gateway.get_stats()['test']['cancelled'] == 1
+
+    assert list(gateway.stream('test', iter(["a", "b"]))) == ["a", "b"]
+    _wait_for(lambda: gateway.get_stats()['test']['completed'] == 1)
+
+
+if __name__ == "__main__":
+    test_concurrency_is_capped()
+    test_full_queue_rejects_and_deadline_times_out()
+    test_acall_from_another_loop_and_cancellation()
+    test_closing_a_stream_releases_its_slot()
+    print("[SUCCESS] All LLM gateway tests passed!")
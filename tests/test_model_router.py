@@ -0,0 +1,95 @@
+import os
+import sys
+import time
+
+# Add parent directory to import paths
+parent_dir = os.path.dirname(os.path.dirname(__file__))
+sys.path.append(parent_dir)
+
+from chatbot.services.model_router import ModelRouter
+
+BOTH = ['gemini', 'local-ai']
+
+
+def test_circuit_opens_after_repeated_failures_and_fails_over():
+    router = ModelRouter(failure_threshold=3, open_seconds=60)
+    assert router.choose('gemini', BOTH) == ('gemini', 'preferred')
+
+    for _ in range(2):
+        router.record('gemini', 30.0, ok=False)
+    # Failures must be in a row
+    router.record('gemini', 1.0, ok=True)
+    for _ in range(3):
+        router.record('gemini', 30.0, ok=False)
+
+    assert router.choose('gemini', BOTH) == ('local-ai', 'preferred_circuit_open')
+    # The model the client did not ask for is still used as its own preference
+    assert router.choose('local-ai', BOTH) == ('local-ai', 'preferred')
+    # Nothing healthy to fail over to: the client's choice is tried anyway
+    assert router.choose('gemini', ['gemini']) == ('gemini', 'no_healthy_backend')
+    # A model that is not configured is routed around
+    assert router.choose('gemini', ['local-ai']) == ('local-ai', 'preferred_unavailable')
+
+    stats = router.get_stats()
+    assert stats["backends"]["gemini"]["circuit"] == 'open'
+    assert stats["backends"]["gemini"]["times_opened"] == 1
+    assert stats["failovers"] == 2
+    assert stats["decisions"]["gemini->local-ai:preferred_circuit_open"] == 1
+
+
+def test_background_probe_closes_or_reopens_the_circuit():
+    router = ModelRouter(failure_threshold=1, open_seconds=0.05)
+    healthy = [False]
+    router.set_probe('gemini', lambda: healthy[0])
+    router.record('gemini', 5.0, ok=False)
+    assert router.choose('gemini', BOTH)[0] == 'local-ai'
+
+    time.sleep(0.06)
+    router.probe_due()
+    stats = router.get_stats()["backends"]["gemini"]
+    assert stats["circuit"] == 'open' and stats["probe_failures"] == 1
+
+    healthy[0] = True
+    time.sleep(0.06)
+    router.probe_due()
+    assert router.get_stats()["backends"]["gemini"]["circuit"] == 'closed'
+    assert router.choose('gemini', BOTH) == ('gemini', 'preferred')
+
+
+def test_half_open_trial_request_without_probe():
+    router = ModelRouter(failure_threshold=1, open_seconds=0.05)
+    router.record('local-ai', 5.0, ok=False)
+    assert router.choose('local-ai', BOTH)[0] == 'gemini'
+
+    time.sleep(0.06)
+    # One trial request goes through; the next ones keep failing over until it reports back
+    assert router.choose('local-ai', BOTH) == ('local-ai', 'preferred')
+    assert router.choose('local-ai', BOTH)[0] == 'gemini'
+    router.record('local-ai', 0.5, ok=True)
+    assert router.get_stats()["backends"]["local-ai"]["circuit"] == 'closed'
+
+
+def test_slo_is_enforced_only_when_enabled():
+    for enforce_slo, expected in [(False, 'gemini'), (True, 'local-ai')]:
+        router = ModelRouter(slo_ms={'gemini': 1000, 'local-ai': 5000}, enforce_slo=enforce_slo)
+        for _ in range(10):
+            router.record('gemini', 2.5, ok=True)   # slow but answering
+            router.record('local-ai', 1.0, ok=True)
+        assert router.choose('gemini', BOTH)[0] == expected
+        stats = router.get_stats()["backends"]["gemini"]
+        assert stats["meets_slo"] is False and stats["latency_ms_p95"] == 2500.0
+
+    # Both missing their SLO: the preference stands
+    router = ModelRouter(slo_ms={'gemini': 1000, 'local-ai': 500}, enforce_slo=True)
+    for _ in range(10):
+        router.record('gemini', 2.5, ok=True)
+        router.record('local-ai', 1.0, ok=True)
+    assert router.choose('gemini', BOTH) == ('gemini', 'preferred')
+
+
+if __name__ == "__main__":
+    test_circuit_opens_after_repeated_failures_and_fails_over()
+    test_background_probe_closes_or_reopens_the_circuit()
+    test_half_open_trial_request_without_probe()
+    test_slo_is_enforced_only_when_enabled()
+    print("[SUCCESS] All model router tests passed!")
@@ -0,0 +1,72 @@
+import os
+import sys
+
+import numpy as np
+
+# Add parent directory to import paths
+parent_dir = os.path.dirname(os.path.dirname(__file__))
+sys.path.append(parent_dir)
+
+from Vector_Store.onnx_encoder import (
+    ENCODER_CONFIG_FILE, ONNX_INT8_MODEL_FILE, ONNX_MODEL_FILE, OnnxSentenceEncoder, check_parity,
+    default_onnx_model_dir,
+)
+
+MODEL_NAME = 'all-MiniLM-L6-v2'
+
+
+def _skip(reason):
+    """Report a skip to pytest, or just print it when the file is run directly"""
+    if 'pytest' in sys.modules:
+        import pytest
+        pytest.skip(reason)
+    print(f"[SKIPPED] {reason}")
+
+
+class FixedEncoder:
+    """Returns the reference vectors plus a fixed offset"""
+
+    def __init__(self, vectors, offset, quantized=False):
+        self.vectors = vectors
+        self.offset = offset
+        self.quantized = quantized
+
+    def encode(self, texts, **kwargs):
+        return self.vectors[:len(texts)] + self.offset
+
+
+def test_check_parity_tolerances():
+    reference = FixedEncoder(np.random.RandomState(0).standard_normal((6, 8)).astype('float32'), 0.0)
+    small, large = np.float32(5e-5), np.float32(0.05)
+    assert check_parity(FixedEncoder(reference.vectors, small), reference)["ok"]
+    # fp32 has to reproduce torch almost exactly...
+    assert not check_parity(FixedEncoder(reference.vectors, large), reference)["ok"]
+    # ...int8 only has to keep the direction of every vector
+    assert check_parity(FixedEncoder(reference.vectors, large, quantized=True), reference)["ok"]
+    assert not check_parity(FixedEncoder(-reference.vectors, 0.0, quantized=True), reference)["ok"]
+
+
+def test_exported_models_match_the_torch_encoder():
+    try:
+        import onnxruntime  # noqa: F401
+        from sentence_transformers import SentenceTransformer
+    except ImportError as e:
+        return _skip(f"ONNX parity needs onnxruntime and sentence-transformers: {e}")
+
+    model_dir = os.environ.get('RAG_ONNX_MODEL_DIR') or default_onnx_model_dir(MODEL_NAME)
+    missing = [name for name in (ENCODER_CONFIG_FILE, ONNX_MODEL_FILE, ONNX_INT8_MODEL_FILE)
+               if not os.path.exists(os.path.join(model_dir, name))]
+    if missing:
+        return _skip(f"No exported model in {model_dir} ({', '.join(missing)} missing); "
+                     f"run python Vector_Store/onnx_encoder.py --quantize")
+
+    reference = SentenceTransformer(MODEL_NAME, device='cpu')
+    for quantized in (False, True):
+        parity = check_parity(OnnxSentenceEncoder(model_dir, quantized=quantized), reference)
+        assert parity["ok"], f"{'int8' if quantized else 'fp32'} export out of tolerance: {parity}"
+
+
+if __name__ == "__main__":
+    test_check_parity_tolerances()
+    test_exported_models_match_the_torch_encoder()
+    print("[SUCCESS] All ONNX encoder tests passed!")
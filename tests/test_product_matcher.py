@@ -0,0 +1,53 @@
+import os
+import sys
+
+# Add parent directory to import paths; the telegram services are imported
+# directly so the test does not need the telegram library
+parent_dir = os.path.dirname(os.path.dirname(__file__))
+sys.path.append(os.path.join(parent_dir, 'telegram_bot', 'services'))
+
+from product_matcher import AhoCorasick, ProductMatcher, catalog_product_names, normalize_text
+
+ALIASES = {
+    'serum': 'Hydra-Essence Serum',
+    'oil': 'Botanical Face Oil',
+    'face oil': 'Botanical Face Oil',
+    'eye': 'Radiance Eye Cream',
+    'wash': 'Gentle Cleansing Foam',
+}
+
+
+def test_automaton_finds_leftmost_longest_whole_words():
+    automaton = AhoCorasick({'he': 'he', 'she': 'she', 'hers': 'hers', 'his': 'his'})
+    text = normalize_text("She, hers... ushers his")
+    assert [value for _, _, value in automaton.find(text)] == ['she', 'hers', 'his']
+
+    automaton = AhoCorasick({'oil': 'short', 'face oil': 'long'})
+    assert [value for _, _, value in automaton.find(normalize_text("a face oil"))] == ['long']
+
+
+def test_longest_match_and_multiple_products():
+    matcher = ProductMatcher(ALIASES, ['Vitamin C Serum', 'Hydra-Essence Serum'], version='v1:2')
+    assert matcher.match("Is the vitamin C serum good?") == ['Vitamin C Serum']
+    assert matcher.match("hydra essence serum or a face oil?") == ['Hydra-Essence Serum', 'Botanical Face Oil']
+    assert matcher.match("Serums, oils and a face wash") == [
+        'Hydra-Essence Serum', 'Botanical Face Oil', 'Gentle Cleansing Foam']
+    # Keywords only match whole words
+    assert matcher.match("new eyeliner and a washcloth") == []
+    assert matcher.version == 'v1:2'
+
+
+def test_catalog_product_names_from_contexts():
+    contexts = [
+        "Product Name: Glow Serum\\nCategory: Skincare\\nPrice: 30.00 USD",
+        "Product Name: Lip Oil\nPrice: 18.00 USD",
+        "Category: Skincare",
+    ]
+    assert catalog_product_names(contexts) == ['Glow Serum', 'Lip Oil']
+
+
+if __name__ == "__main__":
+    test_automaton_finds_leftmost_longest_whole_words()
+    test_longest_match_and_multiple_products()
+    test_catalog_product_names_from_contexts()
+    print("[SUCCESS] All product matcher tests passed!")
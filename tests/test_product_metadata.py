@@ -0,0 +1,89 @@
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+# Add parent directory to import paths
+parent_dir = os.path.dirname(os.path.dirname(__file__))
+sys.path.append(parent_dir)
+
+from Vector_Store.product_metadata import (
+    ProductMetadata, extract_filters, filters_key, skin_type_bits, SKIN_TYPE_BITS,
+)
+
+CATEGORIES = ["Fragrance", "Makeup", "Skincare", "Bath & Body"]
+
+
+def sample_metadata():
+    return ProductMetadata.from_columns(
+        price=[12.0, 45.0, 28.5, np.nan],
+        out_of_stock=[0, 0, 1, 0],
+        category=["Skincare", "Skincare", "Makeup", "Fragrance"],
+        skin_types=["Dry Skin; Oily", "All Skin Types", "Sensitive", "Not specified"],
+    )
+
+
+def test_skin_type_bits():
+    bits = skin_type_bits(["Dry Skin; Oily", "All Skin Types", "Not specified"])
+    assert bits[0] == SKIN_TYPE_BITS["dry"] | SKIN_TYPE_BITS["oily"]
+    assert bits[1] == sum(SKIN_TYPE_BITS.values())
+    assert bits[2] == 0
+
+
+def test_extract_filters():
+    assert extract_filters("moisturizer for dry skin under $30 in stock", CATEGORIES) == {
+        "max_price": 30.0, "in_stock": True, "skin_types": ["dry"],
+    }
+    assert extract_filters("makeup between 20 and 40", CATEGORIES) == {
+        "min_price": 20.0, "max_price": 40.0, "category": "Makeup",
+    }
+    assert extract_filters("Bath & Body gift over $50", CATEGORIES) == {
+        "min_price": 50.0, "category": "Bath & Body",
+    }
+    # Product names with numbers are not mistaken for prices
+    assert extract_filters("Tell me about 19-69 Kasbah", CATEGORIES) == {}
+
+
+def test_matching_rows():
+    metadata = sample_metadata()
+    assert metadata.matching_rows({}).tolist() == [True, True, True, True]
+    assert metadata.matching_rows({"max_price": 30}).tolist() == [True, False, True, False]
+    assert metadata.matching_rows({"in_stock": True, "category": "skincare"}).tolist() == [True, True, False, False]
+    # "All Skin Types" products match any skin type; unspecified ones do not
+    assert metadata.matching_rows({"skin_types": ["dry"]}).tolist() == [True, True, False, False]
+    assert not metadata.matching_rows({"category": "Hair"}).any()
+
+
+def test_concatenate_merges_categories():
+    first = ProductMetadata.from_columns([1.0], [0], ["Makeup"], ["Dry"])
+    second = ProductMetadata.from_columns([2.0, 3.0], [1, 0], ["Skincare", "Hair"], ["Oily", "Normal"])
+    merged = ProductMetadata.concatenate([first, second])
+    assert merged.categories.tolist() == ["Hair", "Makeup", "Skincare"]
+    assert merged.matching_rows({"category": "Skincare"}).tolist() == [False, True, False]
+    assert merged.matching_rows({"in_stock": True}).tolist() == [True, False, True]
+
+
+def test_save_and_load_round_trip():
+    metadata = sample_metadata()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "product_metadata.npz")
+        metadata.save(path)
+        loaded = ProductMetadata.load(path)
+    filters = {"max_price": 40, "skin_types": ["sensitive"]}
+    assert loaded.matching_rows(filters).tolist() == metadata.matching_rows(filters).tolist()
+
+
+def test_filters_key_is_order_independent():
+    assert filters_key({"in_stock": True, "skin_types": ["dry"]}) == filters_key({"skin_types": ["dry"], "in_stock": True})
+    assert filters_key(None) == filters_key({}) == ()
+
+
+if __name__ == "__main__":
+    test_skin_type_bits()
+    test_extract_filters()
+    test_matching_rows()
+    test_concatenate_merges_categories()
+    test_save_and_load_round_trip()
+    test_filters_key_is_order_independent()
+    print("[SUCCESS] Product metadata tests passed!")
@@ -0,0 +1,57 @@
+import os
+import sys
+import time
+
+# Add parent directory to import paths
+parent_dir = os.path.dirname(os.path.dirname(__file__))
+sys.path.append(parent_dir)
+
+from Vector_Store.query_cache import LRUCache, normalize_query
+
+
+def test_normalize_query():
+    assert normalize_query("  Best   Moisturizer for DRY skin?! ") == "best moisturizer for dry skin"
+    assert normalize_query("Is this fragrance free") == normalize_query("is this fragrance free?")
+
+
+def test_lru_eviction_and_counters():
+    cache = LRUCache(max_size=2, ttl_seconds=None)
+    cache.put(("a", 3), 1)
+    cache.put(("b", 3), 2)
+    assert cache.get(("a", 3)) == 1   # 'a' is now most recently used
+    cache.put(("c", 3), 3)            # evicts 'b'
+    assert cache.get(("b", 3)) is None
+    assert cache.get(("c", 3)) == 3
+
+    stats = cache.get_stats()
+    assert stats["hits"] == 2
+    assert stats["misses"] == 1
+    assert stats["evictions"] == 1
+    assert stats["size"] == 2
+
+
+def test_ttl_expiry():
+    cache = LRUCache(max_size=4, ttl_seconds=0.01)
+    cache.put("serum", "contexts")
+    time.sleep(0.02)
+    assert cache.get("serum") is None
+    assert cache.get_stats()["expirations"] == 1
+
+
+def test_version_change_invalidates():
+    cache = LRUCache(max_size=4, ttl_seconds=None)
+    cache.ensure_version("v1")
+    cache.put("serum", "old contexts")
+    cache.ensure_version("v1")
+    assert cache.get("serum") == "old contexts"
+    cache.ensure_version("v2")
+    assert cache.get("serum") is None
+    assert cache.get_stats()["invalidations"] == 1
+
+
+if __name__ == "__main__":
+    test_normalize_query()
+    test_lru_eviction_and_counters()
+    test_ttl_expiry()
+    test_version_change_invalidates()
+    print("[SUCCESS] Query cache tests passed!")
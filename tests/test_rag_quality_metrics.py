@@ -0,0 +1,73 @@
+import os
+import sys
+import copy
+
+# Add parent directory to import paths
+parent_dir = os.path.dirname(os.path.dirname(__file__))
+sys.path.append(parent_dir)
+
+from benchmarks.rag_quality.metrics import check_baseline, compare_to_baseline, recall_at_k, reciprocal_rank
+
+# A small baseline in the format --write-baseline records
+BASELINE = {
+    "config": {"catalog": {"products": 100, "generated": 100}, "queries": 40, "seed": 0, "k": [1, 3],
+               "index_type": "flat", "rerank": False, "warm_cache": False,
+               "model_name": "all-MiniLM-L6-v2", "encoder_backend": "torch"},
+    "quality": {
+        "all": {"queries": 40, "recall@1": 0.8, "recall@3": 0.9, "mrr": 0.85},
+        "name": {"queries": 10, "recall@1": 1.0, "recall@3": 1.0, "mrr": 1.0},
+    },
+    "latency": {"p50_ms": 4.0, "p95_ms": 8.0, "p99_ms": 10.0, "mean_ms": 5.0},
+    "memory": {"index_bytes": 1000000, "contexts_bytes": 500000, "engine_rss_delta_bytes": None},
+    "build_seconds": 12.0,
+}
+
+
+def test_retrieval_metrics():
+    assert recall_at_k(['a', 'b', 'c'], ['b', 'x'], 1) == 0.0
+    assert recall_at_k(['a', 'b', 'c'], ['b', 'x'], 3) == 0.5
+    assert recall_at_k(['a'], [], 1) == 0.0
+    assert reciprocal_rank(['a', 'b', 'c'], ['c']) == 1 / 3
+    assert reciprocal_rank(['a'], ['z']) == 0.0
+
+
+def test_unchanged_run_has_no_regressions():
+    results = copy.deepcopy(BASELINE)
+    # Within tolerance: small quality dip, latency +20%, memory +5%, build time is not gated
+    results["quality"]["all"]["recall@3"] = 0.895
+    results["latency"]["p95_ms"] = 9.6
+    results["memory"]["index_bytes"] = 1050000
+    results["build_seconds"] = 60.0
+    assert check_baseline(results, BASELINE) == []
+
+
+def test_regressions_are_reported():
+    results = copy.deepcopy(BASELINE)
+    results["quality"]["name"]["recall@1"] = 0.9
+    results["quality"]["all"]["mrr"] = 0.8
+    results["latency"]["p99_ms"] = 20.0
+    results["memory"]["contexts_bytes"] = 600000
+    assert check_baseline(results, BASELINE) == [
+        "latency.p99_ms: 10.000 ms -> 20.000 ms",
+        "memory.contexts_bytes: 0.5 MB -> 0.6 MB",
+        "quality.all.mrr: 0.8500 -> 0.8000",
+        "quality.name.recall@1: 1.0000 -> 0.9000",
+    ]
+    # Tolerances are configurable
+    assert compare_to_baseline(results, BASELINE, quality_tolerance=0.2, latency_tolerance=1.5,
+                               memory_tolerance=0.5) == []
+
+
+def test_different_configuration_is_not_compared():
+    results = copy.deepcopy(BASELINE)
+    results["config"]["index_type"] = "sq8"
+    results["quality"]["all"]["recall@1"] = 0.1
+    assert check_baseline(results, BASELINE) is None
+
+
+if __name__ == "__main__":
+    test_retrieval_metrics()
+    test_unchanged_run_has_no_regressions()
+    test_regressions_are_reported()
+    test_different_configuration_is_not_compared()
+    print("[SUCCESS] All RAG quality metric tests passed!")
@@ -0,0 +1,159 @@
+import os
+import sys
+import time
+import hashlib
+import tempfile
+import threading
+
+import numpy as np
+import pandas as pd
+
+# Add parent directory to import paths
+parent_dir = os.path.dirname(os.path.dirname(__file__))
+sys.path.append(parent_dir)
+
+from Vector_Store import embedFunc
+from Vector_Store.retrieval_engine import RetrievalEngine
+from chatbot.services.ai_service import AIService
+
+
+class StubEncoder:
+    """Stands in for the SentenceTransformer: a fixed pseudo-random vector per text"""
+
+    def encode(self, texts, **kwargs):
+        vectors = [np.random.RandomState(int.from_bytes(hashlib.md5(text.encode('utf-8')).digest()[:4], 'little'))
+                   .standard_normal(16) for text in texts]
+        return np.asarray(vectors, dtype='float32').reshape(len(texts), 16)
+
+
+class GatedEngine(RetrievalEngine):
+    """Loads a stub query encoder, but only once release is set, then the artifacts in cache_dir"""
+
+    def __init__(self, cache_dir):
+        super().__init__(cache_dirs=[cache_dir])
+        self.reload_interval = 0
+        self.release = threading.Event()
+
+    def _load_model(self):
+        self.release.wait(5)
+        self.sentence_model = StubEncoder()
+
+
+def _build_cache(cache_dir):
+    catalog = pd.DataFrame({
+        "product_id": ["P1", "P2", "P3"],
+        "product_name": ["Vitamin C Serum", "Hydrating Toner", "Matte Lipstick"],
+        "highlights": ["Brightening", "Good for dry skin", "Long-wearing"],
+        "ingredients": ["Ascorbic acid", "Hyaluronic acid", ""],
+        "primary_category": ["Skincare", "Skincare", "Makeup"],
+        "skin_type": ["", "dry", ""],
+        "price_usd": [48.0, 22.0, 19.0],
+        "out_of_stock": [0, 0, 1],
+    })
+    load_sentence_model = embedFunc.load_sentence_model
+    embedFunc.load_sentence_model = StubEncoder
+    try:
+        embedFunc.generate_embeddings_and_cache(cache_dir=cache_dir, product_df=catalog)
+    finally:
+        embedFunc.load_sentence_model = load_sentence_model
+
+
+def _service(engine):
+    service = AIService(lazy=True)
+    service.retrieval_engine = engine
+    service.local_ai_url = None
+    return service
+
+
+def test_load_states():
+    with tempfile.TemporaryDirectory() as cache_dir:
+        _build_cache(cache_dir)
+        engine = GatedEngine(cache_dir)
+        assert engine.load_state == 'cold'
+        # Nothing is loading: no reason to wait
+        assert engine.wait_until_ready(5) is False
+
+        engine.start_background_load()
+        assert engine.load_state == 'loading'
+        assert engine.wait_until_ready(0.05) is False
+
+        engine.release.set()
+        assert engine.wait_until_ready(5) is True
+        assert engine.load_state == 'ready'
+
+    with tempfile.TemporaryDirectory() as empty_dir:
+        engine = GatedEngine(empty_dir)
+        engine.release.set()
+        assert engine.load() is False
+        assert engine.load_state == 'failed'
+
+
+def test_search_rag_does_not_block_on_a_loading_engine():
+    with tempfile.TemporaryDirectory() as cache_dir:
+        _build_cache(cache_dir)
+        engine = GatedEngine(cache_dir)
+        service = _service(engine)
+        service.warmup_wait_seconds = 0.1
+        engine.start_background_load()
+
+        start = time.monotonic()
+        assert service._search_rag("vitamin c serum") == []
+        assert time.monotonic() - start < 1.0
+
+        engine.release.set()
+        assert engine.wait_until_ready(5)
+        contexts = service._search_rag("vitamin c serum")
+        assert len(contexts) == 3 and contexts[0].startswith("Product Name: Vitamin C Serum")
+
+
+def _get_ready(engine, service):
+    """GET /health/ready of the Flask app, served by engine and service"""
+    sys.path.insert(0, os.path.join(parent_dir, 'chatbot'))
+    import app as chatbot_app
+    chatbot_app.retrieval_engine = engine
+    chatbot_app.ai_service = service
+    response = chatbot_app.app.test_client().get('/health/ready')
+    return response.status_code, response.get_json()
+
+
+def test_ready_endpoint_reports_warm_up():
+    with tempfile.TemporaryDirectory() as cache_dir:
+        _build_cache(cache_dir)
+        engine = GatedEngine(cache_dir)
+        service = _service(engine)
+        assert engine.load_state == 'cold'
+
+        # The first request starts the warm-up of a cold engine and is not ready yet
+        status, body = _get_ready(engine, service)
+        assert status == 503 and body["status"] == 'loading'
+        components = body["components"]
+        assert components["retrieval_engine"]["state"] == 'loading'
+        assert components["sentence_model"]["ready"] is False
+        assert components["faiss_index"]["ready"] is False
+
+        engine.release.set()
+        assert engine.wait_until_ready(5)
+        status, body = _get_ready(engine, service)
+        assert status == 200 and body["status"] == 'ready'
+        components = body["components"]
+        assert components["retrieval_engine"]["state"] == 'ready'
+        assert components["sentence_model"]["ready"] is True
+        assert components["faiss_index"]["ready"] is True and components["faiss_index"]["vectors"] == 3
+
+
+def test_ready_endpoint_reports_a_failed_load():
+    with tempfile.TemporaryDirectory() as empty_dir:
+        engine = GatedEngine(empty_dir)
+        engine.release.set()
+        engine.load()
+        status, body = _get_ready(engine, _service(engine))
+        assert status == 503 and body["status"] == 'failed'
+        assert body["components"]["retrieval_engine"]["state"] == 'failed'
+
+
+if __name__ == "__main__":
+    test_load_states()
+    test_search_rag_does_not_block_on_a_loading_engine()
+    test_ready_endpoint_reports_warm_up()
+    test_ready_endpoint_reports_a_failed_load()
+    print("[SUCCESS] All readiness tests passed!")
@@ -0,0 +1,69 @@
+import os
+import sys
+import time
+
+import numpy as np
+
+# Add parent directory to import paths
+parent_dir = os.path.dirname(os.path.dirname(__file__))
+sys.path.append(parent_dir)
+
+from Vector_Store.semantic_cache import SemanticResponseCache
+
+
+def _vector(*values, dimension=8):
+    vector = np.zeros(dimension, dtype='float32')
+    vector[:len(values)] = values
+    return vector
+
+
+ANSWER = {"reply": "Try the hydrating serum.", "model": "gemini"}
+
+
+def test_paraphrase_hits_and_unrelated_misses():
+    cache = SemanticResponseCache(threshold=0.9, ttl_seconds=None)
+    cache.put(_vector(1.0, 0.1), ANSWER, namespace=("gemini", ()))
+
+    # Scale does not matter, only direction
+    assert cache.get(_vector(3.0, 0.35), namespace=("gemini", ())) == ANSWER
+    assert cache.get(_vector(0.1, 1.0), namespace=("gemini", ())) is None
+
+    stats = cache.get_stats()
+    assert stats["hits"] == 1 and stats["misses"] == 1
+    assert stats["hit_rate"] == 0.5
+    assert stats["mean_hit_similarity"] > 0.9
+
+
+def test_namespaces_are_separate():
+    cache = SemanticResponseCache(threshold=0.9, ttl_seconds=None)
+    cache.put(_vector(1.0), ANSWER, namespace=("gemini", (("max_price", 30),)))
+    assert cache.get(_vector(1.0), namespace=("gemini", (("max_price", 50),))) is None
+    assert cache.get(_vector(1.0), namespace=("local-ai", (("max_price", 30),))) is None
+    assert cache.get(_vector(1.0), namespace=("gemini", (("max_price", 30),))) == ANSWER
+
+
+def test_eviction_ttl_and_version():
+    cache = SemanticResponseCache(threshold=0.99, max_size=2, ttl_seconds=None)
+    cache.put(_vector(1.0), "a")
+    cache.put(_vector(0.0, 1.0), "b")
+    assert cache.get(_vector(1.0)) == "a"       # 'a' is now most recently used
+    cache.put(_vector(0.0, 0.0, 1.0), "c")      # evicts 'b'
+    assert cache.get(_vector(0.0, 1.0)) is None
+    assert len(cache) == 2 and cache.get_stats()["evictions"] == 1
+
+    cache.ensure_version("v2:100")
+    assert len(cache) == 0 and cache.get(_vector(1.0)) is None
+    assert cache.get_stats()["invalidations"] == 1
+
+    short_lived = SemanticResponseCache(threshold=0.9, ttl_seconds=0.01)
+    short_lived.put(_vector(1.0), "a")
+    time.sleep(0.02)
+    assert short_lived.get(_vector(1.0)) is None
+    assert short_lived.get_stats()["expirations"] == 1 and len(short_lived) == 0
+
+
+if __name__ == "__main__":
+    test_paraphrase_hits_and_unrelated_misses()
+    test_namespaces_are_separate()
+    test_eviction_ttl_and_version()
+    print("[SUCCESS] Semantic cache tests passed!")
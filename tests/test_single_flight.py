@@ -0,0 +1,116 @@
+import os
+import sys
+import time
+import threading
+
+# Add parent directory to import paths
+parent_dir = os.path.dirname(os.path.dirname(__file__))
+sys.path.append(parent_dir)
+
+from chatbot.services.single_flight import FlightAbandoned, FlightTimeout, SingleFlight
+
+
+def _run_concurrently(target, count):
+    results = [None] * count
+    threads = [threading.Thread(target=lambda i=i: results.__setitem__(i, target())) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_identical_requests_share_one_call():
+    flights = SingleFlight()
+    calls = []
+
+    def generate(prompt):
+        calls.append(prompt)
+        time.sleep(0.1)
+        return {"reply": f"answer to {prompt}"}
+
+    key = SingleFlight.key('gemini', "Is the serum on sale?")
+    results = _run_concurrently(lambda: flights.do(key, generate, "Is the serum on sale?"), 8)
+    assert calls == ["Is the serum on sale?"]
+    assert all(result == {"reply": "answer to Is the serum on sale?"} for result, _ in results)
+    assert sum(1 for _, shared in results if not shared) == 1
+
+    stats = flights.get_stats()
+    assert stats["backend_calls"] == 1 and stats["saved_backend_calls"] == 7
+    assert stats["in_flight"] == 0
+
+    # Once finished, nothing is kept: the next request calls the backend again
+    flights.do(key, generate, "Is the serum on sale?")
+    assert len(calls) == 2
+
+
+def test_keys_separate_models_and_prompts():
+    assert SingleFlight.key('gemini', "hi") == SingleFlight.key('gemini', "hi")
+    assert SingleFlight.key('gemini', "hi") != SingleFlight.key('local-ai', "hi")
+    assert SingleFlight.key('gemini', "hi") != SingleFlight.key('gemini', "hi!")
+
+
+def test_errors_are_shared_and_abandoned_flights_are_retried():
+    flights = SingleFlight()
+
+    def failing():
+        time.sleep(0.1)
+        raise TimeoutError("backend timed out")
+
+    errors = []
+
+    def request():
+        try:
+            flights.do('key', failing)
+        except TimeoutError as e:
+            errors.append(e)
+
+    _run_concurrently(request, 4)
+    assert len(errors) == 4
+    assert flights.get_stats()["failed"] == 1
+
+    # A leader that gives up (disconnected stream) hands the call to a follower
+    flight, leader = flights.join('other')
+    assert leader
+    follower = []
+    thread = threading.Thread(target=lambda: follower.append(flights.do('other', lambda: "own answer")))
+    thread.start()
+    time.sleep(0.05)
+    flights.finish(flight, abandoned=True)
+    thread.join()
+    assert follower == [("own answer", False)]
+    try:
+        flights.wait(flight)
+        assert False, "expected FlightAbandoned"
+    except FlightAbandoned:
+        pass
+    assert flights.get_stats()["abandoned"] == 1
+
+
+def test_followers_stop_waiting_for_a_stalled_leader():
+    flights = SingleFlight()
+    flight, leader = flights.join('key')
+    assert leader
+
+    start = time.monotonic()
+    try:
+        flights.do('key', lambda: "own answer", wait_timeout=0.1)
+        assert False, "expected FlightTimeout"
+    except FlightTimeout:
+        pass
+    assert time.monotonic() - start < 1.0
+    stats = flights.get_stats()
+    assert stats["timed_out"] == 1 and stats["waiting"] == 0 and stats["in_flight"] == 1
+
+    # The leader finishing later shares its result with nobody
+    flights.finish(flight, result="late answer")
+    assert flights.get_stats()["saved_backend_calls"] == 0
+    assert flights.wait(flight, timeout=0.1) == "late answer"
+
+
+if __name__ == "__main__":
+    test_identical_requests_share_one_call()
+    test_keys_separate_models_and_prompts()
+    test_errors_are_shared_and_abandoned_flights_are_retried()
+    test_followers_stop_waiting_for_a_stalled_leader()
+    print("[SUCCESS] All single-flight tests passed!")
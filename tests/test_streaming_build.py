@@ -0,0 +1,54 @@
+import os
+import sys
+import tempfile
+
+import pandas as pd
+
+# Add parent directory to import paths
+parent_dir = os.path.dirname(os.path.dirname(__file__))
+sys.path.append(parent_dir)
+
+from Vector_Store import embedFunc
+from test_incremental_index import StubEncoder, _artifacts, _assert_same_artifacts, _build, _catalog
+
+
+def _write_catalog_csv(path):
+    """A CSV whose chunks differ: duplicate product ids across chunks, a category only in the last one"""
+    catalog = _catalog(23)
+    catalog.loc[9, "product_id"] = "P001"
+    catalog.loc[21, "primary_category"] = "Fragrance"
+    catalog.loc[14, "skin_type"] = None
+    # Missing columns are filled in the same way by both builds
+    catalog.drop(columns=["ingredients"]).to_csv(path, index=False)
+
+
+def _stream(cache_dir, data_path, encoder, chunk_size, **kwargs):
+    load_sentence_model = embedFunc.load_sentence_model
+    embedFunc.load_sentence_model = lambda: encoder
+    try:
+        embedFunc.generate_embeddings_streaming(chunk_size=chunk_size, cache_dir=cache_dir,
+                                                data_path=data_path, **kwargs)
+    finally:
+        embedFunc.load_sentence_model = load_sentence_model
+
+
+def test_streaming_build_matches_the_in_memory_build():
+    for index_type, params in (('flat', {}), ('fp16', {"rerank": True})):
+        with tempfile.TemporaryDirectory() as streamed_dir, tempfile.TemporaryDirectory() as in_memory_dir:
+            data_path = os.path.join(streamed_dir, "catalog.csv")
+            _write_catalog_csv(data_path)
+            encoder = StubEncoder()
+            _stream(streamed_dir, data_path, encoder, chunk_size=4, index_type=index_type, **params)
+            # Every product was embedded exactly once
+            assert len(encoder.encoded) == 23
+
+            _build(in_memory_dir, pd.read_csv(data_path), StubEncoder(), index_type=index_type, **params)
+            streamed, in_memory = _artifacts(streamed_dir), _artifacts(in_memory_dir)
+            assert len(set(streamed["product_ids"].tolist())) == 23
+            assert list(streamed["metadata"].categories) == ["Fragrance", "Makeup", "Skincare"]
+            _assert_same_artifacts(streamed, in_memory)
+
+
+if __name__ == "__main__":
+    test_streaming_build_matches_the_in_memory_build()
+    print("[SUCCESS] All streaming build tests passed!")